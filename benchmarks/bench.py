@@ -0,0 +1,234 @@
+"""
+Benchmarks for listing, sorting, naming, preview and renaming.
+
+Builds synthetic folders of N empty files (names shaped like real episodes,
+spread-out mtimes) on tmpfs and on a regular disk, times every stage of the
+tool on them and writes the results as JSON so runs can be compared across
+versions:
+
+    python -m benchmarks.bench --sizes 1000 10000 100000 -o bench.json
+    python -m benchmarks.bench --sizes 1000000 --fs disk --repeat 1
+    python -m benchmarks.bench -o new.json --compare bench.json
+
+Stages: ``list`` (scan_listing), ``sort_<mode>`` (fresh and cached keys),
+``names`` (compiled template over the whole list), ``plan``, ``preview_*``
+(VirtualList on a real ttk.Treeview; skipped without a display), ``rename``
+(journaled execution) and ``rollback``. Each stage reports the best of
+``--repeat`` runs.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from folder_renamer import core, journal, scan
+from folder_renamer.executor import DEFAULT_WORKERS
+from folder_renamer.template import compile_template
+
+SIZES = (1000, 10000, 100000)
+TAGS = ('1080p', '720p', 'WEB-DL', 'x265', 'HDTV')
+EXTS = ('.mkv', '.mp4', '.avi', '.srt')
+
+
+def make_folder(parent, count, seed=0):
+    """Create ``count`` empty files with shuffled episode-like names; returns the folder."""
+    rnd = random.Random(seed)
+    folder = tempfile.mkdtemp(prefix=f'fr-bench-{count}-', dir=parent)
+    now = time.time()
+    for i in rnd.sample(range(count), count):
+        name = f"Show.Name.S{i // 1000 + 1:02}E{i % 1000:03}.{rnd.choice(TAGS)}.{i}{rnd.choice(EXTS)}"
+        path = os.path.join(folder, name)
+        with open(path, 'wb'):
+            pass
+        mtime = now - rnd.random() * 86400 * 365
+        os.utime(path, (mtime, mtime))
+    return folder
+
+
+def best_of(repeat, fn, setup=None):
+    """Best wall time of ``repeat`` calls of ``fn(setup())``, plus the last result."""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t0 = time.perf_counter()
+        result = fn(arg) if setup else fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def bench_folder(folder, count, repeat, workers, tk_root):
+    results = {}
+
+    def record(stage, seconds, **extra):
+        results[stage] = dict(seconds=round(seconds, 6), per_file_us=round(seconds / count * 1e6, 3), **extra)
+
+    seconds, listing = best_of(repeat, lambda: scan.scan_listing(folder))
+    record('list', seconds)
+    records = listing.records
+
+    for mode in core.ORDER_MODES:
+        seconds, _ = best_of(repeat, lambda recs: core.sort_records(recs, mode, r'E(\d+)', folder=folder),
+                             setup=lambda: list(records))
+        record(f'sort_{mode}', seconds)
+    keys = core.SortKeys()
+    core.sort_records(list(records), 'natural', keys=keys)
+    seconds, _ = best_of(repeat, lambda recs: core.sort_records(recs, 'natural', keys=keys),
+                         setup=lambda: list(records))
+    record('sort_natural_cached', seconds)
+
+    core.sort_records(records, 'name')
+    names = [r.name for r in records]
+    template = compile_template('{prefix} {n}{ext}', 'Episode', 1, len(str(count)))
+    seconds, new_names = best_of(repeat, lambda: template.render(names))
+    record('names', seconds)
+    seconds, plan = best_of(repeat, lambda: core.plan_renames(names, new_names, listing.taken_names()))
+    record('plan', seconds, steps=len(plan))
+
+    if tk_root is not None:
+        results.update(bench_preview(tk_root, names, template, count, repeat))
+
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        stats = journal.run_journaled(folder, plan, workers)
+        rename = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        journal.rollback(folder, workers)
+        rollback = time.perf_counter() - t0
+        if 'rename' not in results or rename < results['rename']['seconds']:
+            record('rename', rename, files_per_s=round(stats.rate), workers=stats.workers)
+        if 'rollback' not in results or rollback < results['rollback']['seconds']:
+            record('rollback', rollback)
+    return results
+
+
+def bench_preview(root, names, template, count, repeat):
+    """Time the virtual Treeview: first fill, paging through the list, renumbering."""
+    from tkinter import ttk
+    from folder_renamer.virtual_list import VirtualList
+
+    tree = ttk.Treeview(root, columns=('old', 'new'), show='headings')
+    state = {'template': template}
+
+    def row(idx):
+        return (names[idx], state['template'].name_for(names[idx], idx)), ('even' if idx % 2 == 0 else 'odd',)
+
+    vlist = VirtualList(tree, row, visible_rows=10)
+    out = {}
+
+    def fill():
+        vlist.set_count(count)
+        root.update_idletasks()
+    seconds, _ = best_of(repeat, fill)
+    out['preview_fill'] = dict(seconds=round(seconds, 6))
+
+    def page():
+        for top in range(0, count, max(1, count // 200)):
+            vlist.scroll_to(top)
+        root.update_idletasks()
+    seconds, _ = best_of(repeat, page)
+    out['preview_scroll_200_pages'] = dict(seconds=round(seconds, 6))
+
+    def renumber():
+        state['template'] = compile_template('{prefix} {n}{ext}', 'Ep', 2, 4)
+        vlist.refresh()
+        state['template'] = template
+        vlist.refresh()
+        root.update_idletasks()
+    seconds, _ = best_of(repeat, renumber)
+    out['preview_renumber'] = dict(seconds=round(seconds, 6))
+    tree.destroy()
+    return out
+
+
+def open_tk():
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:  # no display, or tkinter missing
+        print(f"preview stages skipped: {e}", file=sys.stderr)
+        return None
+    root.withdraw()
+    return root
+
+
+def filesystems(which, disk_dir):
+    found = {}
+    if which in ('all', 'tmpfs') and os.path.isdir('/dev/shm'):
+        found['tmpfs'] = '/dev/shm'
+    if which in ('all', 'disk'):
+        found['disk'] = disk_dir or tempfile.gettempdir()
+    return found
+
+
+def compare(current, baseline_path):
+    """Print the per-stage ratio against an earlier JSON run (>1 means slower now)."""
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {(r['fs'], r['files']): r['stages'] for r in json.load(fh)['runs']}
+    for run in current['runs']:
+        old = baseline.get((run['fs'], run['files']))
+        if old is None:
+            continue
+        for stage, data in run['stages'].items():
+            if stage in old and old[stage]['seconds'] > 0:
+                ratio = data['seconds'] / old[stage]['seconds']
+                flag = '  <-- slower' if ratio > 1.2 else ''
+                print(f"{run['fs']:>6} {run['files']:>8} {stage:<26} x{ratio:5.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help="files per folder (default: %(default)s)")
+    parser.add_argument('--fs', choices=('all', 'tmpfs', 'disk'), default='all')
+    parser.add_argument('--disk-dir', help="where to create the on-disk folders (default: the temp dir)")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per stage, best is kept (default: %(default)s)")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--no-preview', action='store_true', help="skip the Treeview stages")
+    parser.add_argument('-o', '--output', help="write JSON here (default: stdout)")
+    parser.add_argument('--compare', metavar='BASELINE', help="print ratios against an earlier JSON run")
+    args = parser.parse_args(argv)
+
+    tk_root = None if args.no_preview else open_tk()
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'workers': args.workers,
+            'repeat': args.repeat,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'preview': tk_root is not None,
+        },
+        'runs': [],
+    }
+    for fs, parent in filesystems(args.fs, args.disk_dir).items():
+        for count in args.sizes:
+            t0 = time.perf_counter()
+            folder = make_folder(parent, count)
+            setup = time.perf_counter() - t0
+            try:
+                stages = bench_folder(folder, count, args.repeat, args.workers, tk_root)
+            finally:
+                shutil.rmtree(folder, ignore_errors=True)
+            report['runs'].append({'fs': fs, 'files': count, 'setup_seconds': round(setup, 3), 'stages': stages})
+            print(f"{fs} {count}: done ({time.perf_counter() - t0:.1f}s)", file=sys.stderr)
+    if tk_root is not None:
+        tk_root.destroy()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            fh.write(text + '\n')
+    else:
+        print(text)
+    if args.compare:
+        compare(report, args.compare)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Folder Renamer: batch rename files sequentially (e.g., series episodes).
+
+The package is split so the rename engine can run without a display:
+- scan: single-pass os.scandir listing into FileRecords
+- cache: on-disk listing cache for reopening unchanged folders
+- filters: include/exclude scan filters (extensions, globs, regexes, size/age)
+- metadata: episode/track numbers and dates from MP4/MKV/JPEG headers
+- dupes: duplicate-content detection (size, then partial hash, then full hash)
+- preflight: checks a rename batch (clashes, case, length, characters) up front
+- store: column store of FileRecords (interned names, array columns, order array)
+- planner: orders renames through chains/cycles so occupied targets are fine
+- executor: runs independent chains in parallel, relative to a directory fd
+- journal: crash-safe write-ahead journal with resume/rollback
+- watch: inotify/mtime-poll folder watching that patches a cached listing
+- planfile: rename plans exported/imported as streaming JSONL/CSV
+- template: compiled new-name templates ({prefix} {n}{ext}, {stem}, regex groups)
+- core: sorting, numbering and renaming (no Tk imports)
+- batch: leaf folders of a tree renumbered in parallel on a process pool
+- trace: timing spans for the hot paths, dumped as a JSON trace on request
+- cli: ``python -m folder_renamer`` entry point
+- gui: CustomTkinter front end, imported only when the GUI starts
+"""
+from .errors import RenameError, ConflictError, TemplateError, FilterError, PlanError, ValidationError
+from .scan import FileRecord, Listing, scan_folder, scan_listing
+from .filters import FileFilter, compile_filter
+from .store import FileStore
+from .preflight import Problem, check_batch
+from .planner import RenamePlan, plan_moves
+from .template import DEFAULT_TEMPLATE, Template, compile_template
+from .planfile import PlanEntry, write_plan, iter_plan, load_plan
+from .executor import RenameStats, execute_plan
+from .journal import run_journaled, resume, rollback
+from .core import (
+    ORDER_MODES,
+    sort_records,
+    list_records,
+    list_files,
+    new_name,
+    compute_new_names,
+    plan_renames,
+    check_stale,
+    plan_folder,
+    rename_folder,
+)
+
+# Loaded on first use: the headless commands that do not need them (and their
+# thread/process pool imports) start faster
+_LAZY = {
+    'ListingCache': 'cache',
+    'MediaMeta': 'metadata',
+    'read_media_meta': 'metadata',
+    'find_duplicates': 'dupes',
+    'FolderResult': 'batch',
+    'leaf_folders': 'batch',
+    'run_batch': 'batch',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f'.{_LAZY[name]}', __name__), name)
+    globals()[name] = value
+    return value
+
+__all__ = [
+    'RenameError',
+    'ConflictError',
+    'TemplateError',
+    'FilterError',
+    'PlanError',
+    'ValidationError',
+    'FileRecord',
+    'Listing',
+    'scan_folder',
+    'scan_listing',
+    'FileFilter',
+    'compile_filter',
+    'FileStore',
+    'ListingCache',
+    'MediaMeta',
+    'read_media_meta',
+    'find_duplicates',
+    'Problem',
+    'check_batch',
+    'RenamePlan',
+    'plan_moves',
+    'DEFAULT_TEMPLATE',
+    'Template',
+    'compile_template',
+    'PlanEntry',
+    'write_plan',
+    'iter_plan',
+    'load_plan',
+    'RenameStats',
+    'execute_plan',
+    'run_journaled',
+    'resume',
+    'rollback',
+    'ORDER_MODES',
+    'sort_records',
+    'list_records',
+    'list_files',
+    'new_name',
+    'compute_new_names',
+    'plan_renames',
+    'check_stale',
+    'plan_folder',
+    'rename_folder',
+    'FolderResult',
+    'leaf_folders',
+    'run_batch',
+]
@@ -0,0 +1,136 @@
+"""
+Recursive batch mode: number every leaf folder of a tree (e.g. ``Show/Season NN``).
+
+Each leaf folder is listed, planned and renamed on its own in a process pool,
+so seasons run in parallel on separate cores (and separate GILs) while each
+one still gets its own journal. Folders fail independently: a conflict in one
+season is reported in the summary and the others go ahead. Leaves without a
+file to number are not submitted at all, and folders that hold files but
+also have sub-folders (a show's root with its posters, a season with a
+``Subs`` folder) are never renamed; they are reported instead, so nothing is
+left out silently.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+from .core import check_stale, plan_folder
+from .errors import FilterError, RenameError, TemplateError
+from .executor import DEFAULT_WORKERS
+from .journal import run_journaled
+from .filters import compile_filter
+from .scan import RESERVED_PREFIX
+from .template import DEFAULT_TEMPLATE
+from .trace import TRACE_ENV, span, tracer
+
+
+class FolderResult(NamedTuple):
+    folder: str
+    files: int  # files that got (or would get) a new name
+    steps: int  # renames issued, temporary hops included
+    elapsed: float
+    error: Optional[str] = None
+    skipped: int = 0  # files the scan filter left out
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def leaf_folders(root, file_filter=None, passed_over=None):
+    """Folders under ``root`` (itself included) with files to number and no sub-folders, sorted.
+
+    A folder counts when it directly holds a file whose name ``file_filter``
+    (a FileFilter) keeps. Folders that hold such files but also have
+    sub-folders are appended to ``passed_over`` when a list is given.
+    Symlinked folders are not followed, so a link cannot pull the walk out of
+    the tree or into a loop.
+    """
+    keep_name = file_filter.keep_name if file_filter else None
+    leaves = []
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        subdirs = []
+        has_files = False
+        try:
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.name.startswith(RESERVED_PREFIX):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif not has_files and entry.is_file():
+                            has_files = keep_name is None or keep_name(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        if subdirs:
+            stack.extend(subdirs)
+            if has_files and passed_over is not None:
+                passed_over.append(folder)
+        elif has_files:
+            leaves.append(folder)
+    if passed_over is not None:
+        passed_over.sort()
+    return sorted(leaves)
+
+
+def _init_worker():
+    # Only the parent writes the trace (it records each folder's time)
+    os.environ.pop(TRACE_ENV, None)
+    tracer.stop()
+
+
+def process_folder(folder, prefix='Episode', start=1, pad=2, order_mode='name', workers=DEFAULT_WORKERS,
+                   dry_run=False, pattern=None, template=DEFAULT_TEMPLATE, filter_spec='', skip_duplicates=False,
+                   portable=True):
+    """Plan (and unless ``dry_run``, apply) one folder; never raises RenameError/OSError."""
+    t0 = time.perf_counter()
+    files = steps = skipped = 0
+    try:
+        listing, plan = plan_folder(folder, prefix, start, pad, order_mode, pattern, template, filter_spec,
+                                    skip_duplicates, portable)
+        files, steps, skipped = plan.file_count, len(plan), len(listing.skipped)
+        if not dry_run and steps:
+            check_stale(listing)
+            run_journaled(folder, plan, workers)
+    except (RenameError, TemplateError, FilterError, OSError) as e:
+        return FolderResult(folder, files, steps, time.perf_counter() - t0, str(e), skipped)
+    return FolderResult(folder, files, steps, time.perf_counter() - t0, skipped=skipped)
+
+
+def run_batch(root, prefix='Episode', start=1, pad=2, order_mode='name', workers=DEFAULT_WORKERS,
+              processes=None, dry_run=False, on_result=None, pattern=None, template=DEFAULT_TEMPLATE,
+              filter_spec='', skip_duplicates=False, portable=True, passed_over=None):
+    """Process every leaf folder under ``root``; returns FolderResults sorted by folder.
+
+    ``processes`` bounds the pool (default: CPU count); ``on_result(result)``
+    is called in the parent as each folder finishes. Folders with files that
+    were not processed because they have sub-folders go to ``passed_over``
+    (see ``leaf_folders``).
+    """
+    folders = leaf_folders(root, compile_filter(filter_spec), passed_over)
+    results = []
+    if not folders:
+        return results
+    processes = max(1, min(processes or os.cpu_count() or 1, len(folders)))
+    args = (prefix, start, pad, order_mode, workers, dry_run, pattern, template, filter_spec, skip_duplicates,
+            portable)
+    with span('batch', folders=len(folders), processes=processes), \
+            ProcessPoolExecutor(max_workers=processes, initializer=_init_worker) as pool:
+        futures = {pool.submit(process_folder, folder, *args): folder for folder in folders}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:  # worker died (e.g. BrokenProcessPool)
+                result = FolderResult(futures[future], 0, 0, 0.0, f"{type(e).__name__}: {e}")
+            results.append(result)
+            tracer.add('folder', result.elapsed, folder=result.folder, files=result.files, ok=result.ok)
+            if on_result is not None:
+                on_result(result)
+    results.sort(key=lambda r: r.folder)
+    return results
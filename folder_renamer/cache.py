@@ -0,0 +1,183 @@
+"""
+On-disk cache of folder listings, so reopening a large unchanged folder skips the scan.
+
+One JSON file per folder under ``$XDG_CACHE_HOME/folder_renamer`` (default
+``~/.cache/folder_renamer``) holds the records in display order, the
+non-file and filtered-out names, the scan filter, the folder stamp the
+listing matches and whether the order was arranged by hand. Listings scanned
+with an age bound are not cached, since files age out without the folder
+changing. An entry is used only while ``folder_stamp`` (device,
+inode, mtime_ns of the folder) is unchanged, i.e. while no entry of the
+folder was added, removed or renamed. Rewriting a file in place does not
+touch the folder, so the size/mtime of such a file may be stale; Refresh
+Preview always re-lists.
+
+The cache is bounded by entry count and total size; reading an entry
+refreshes its file mtime and the least recently used entries are dropped
+when a new one is written. It is best effort throughout: an unreadable,
+corrupt or stale entry is a miss, and a failed write is ignored.
+"""
+import hashlib
+import json
+import os
+import time
+
+from .scan import Listing, folder_stamp
+from .store import FileStore
+
+CACHE_VERSION = 2
+MAX_ENTRIES = 32
+MAX_BYTES = 256 * 1024 * 1024
+# Smaller folders are re-listed faster than a cache entry is read back,
+# unless their order was arranged by hand
+MIN_FILES = 1000
+# A folder changed within this many seconds of being cached could change
+# again without its mtime moving on filesystems with coarse timestamps
+RACY_SECONDS = 2.0
+
+
+def default_cache_dir():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'folder_renamer')
+
+
+def _spec(file_filter):
+    return file_filter.spec if file_filter else ''
+
+
+def _cacheable(file_filter):
+    return not file_filter or file_filter.age == (None, None)
+
+
+class ListingCache:
+    def __init__(self, directory=None, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def _path(self, folder):
+        digest = hashlib.sha1(os.fsencode(os.path.abspath(folder))).hexdigest()
+        return os.path.join(self.directory, digest + '.json')
+
+    # ------------------------------------------------------------ READ
+    def load(self, folder, file_filter=None):
+        """``(listing, manual)`` for ``folder`` if the cached entry is current, else None.
+
+        ``listing.records`` is a FileStore in the saved display order;
+        ``manual`` tells whether that order was arranged by hand. The entry
+        must have been saved with the same ``file_filter`` spec.
+        """
+        if not _cacheable(file_filter):
+            return None
+        path = self._path(folder)
+        try:
+            stamp = folder_stamp(folder)
+            with open(path, encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        try:
+            if (data['version'] != CACHE_VERSION or data['folder'] != os.path.abspath(folder)
+                    or tuple(data['stamp']) != stamp or data['filter'] != _spec(file_filter)):
+                return None
+            records = FileStore.from_columns(data['names'], data['sizes'], data['mtimes'])
+            listing = Listing(folder, records, set(data['others']), stamp, set(data['skipped']))
+            manual = bool(data['manual'])
+        except (KeyError, TypeError, ValueError, OverflowError):
+            self._remove(path)  # written by another version, or damaged
+            return None
+        try:
+            os.utime(path)  # most recently used
+        except OSError:
+            pass
+        return listing, manual
+
+    # ------------------------------------------------------------ WRITE
+    def save(self, listing, manual=False, file_filter=None):
+        """Cache ``listing`` (records in display order); returns True if written.
+
+        ``file_filter`` is the filter the listing was scanned with. Skipped for
+        small folders (unless ``manual``) and for listings that no longer match
+        the folder.
+        """
+        records = listing.records
+        if listing.stamp is None or len(records) < MIN_FILES and not manual or not _cacheable(file_filter):
+            return False
+        try:
+            if folder_stamp(listing.folder) != listing.stamp:
+                return False
+        except OSError:
+            return False
+        if time.time() - listing.stamp[2] / 1e9 < RACY_SECONDS:
+            return False
+        if isinstance(records, FileStore):
+            columns = [records.ordered(c) for c in (records.names, records.sizes, records.mtimes)]
+        else:
+            columns = [[r[i] for r in records] for i in range(3)]
+        data = {
+            'version': CACHE_VERSION,
+            'folder': os.path.abspath(listing.folder),
+            'stamp': list(listing.stamp),
+            'manual': manual,
+            'names': columns[0],
+            'sizes': columns[1],
+            'mtimes': columns[2],
+            'others': sorted(listing.others),
+            'filter': _spec(file_filter),
+            'skipped': sorted(listing.skipped),
+        }
+        path = self._path(listing.folder)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                json.dump(data, fh, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, path)
+        except (OSError, ValueError):
+            self._remove(tmp)
+            return False
+        self._evict(keep=path)
+        return True
+
+    def forget(self, folder):
+        self._remove(self._path(folder))
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+
+    # ------------------------------------------------------------ LRU
+    def _entries(self):
+        """(path, last use, size) of every entry, least recently used first."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.json'):
+                        try:
+                            st = entry.stat()
+                        except OSError:
+                            continue
+                        entries.append((entry.path, st.st_mtime, st.st_size))
+        except OSError:
+            return []
+        entries.sort(key=lambda e: e[1])
+        return entries
+
+    def _evict(self, keep):
+        entries = self._entries()
+        count, total = len(entries), sum(e[2] for e in entries)
+        for path, _, size in entries:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            self._remove(path)
+            count, total = count - 1, total - size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
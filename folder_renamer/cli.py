@@ -0,0 +1,301 @@
+"""
+Command line entry point: ``python -m folder_renamer``.
+
+Without a sub-command the GUI is started. Headless sub-commands never import
+tkinter/customtkinter.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from . import core, planfile, scan
+from .errors import FilterError, RenameError, TemplateError
+from . import journal
+from .executor import DEFAULT_WORKERS
+from .filters import compile_filter
+from .template import DEFAULT_TEMPLATE, compile_template
+from .trace import TRACE_ENV, tracer
+
+
+def _add_numbering_args(parser):
+    parser.add_argument('--prefix', default='Episode', help="name prefix (default: %(default)s)")
+    parser.add_argument('--start', type=int, default=1, help="first number (default: %(default)s)")
+    parser.add_argument('--digits', type=int, default=2, help="zero padding (default: %(default)s)")
+    parser.add_argument('--order', choices=core.ORDER_MODES, default='name', help="initial order (default: %(default)s)")
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE,
+                        help="new-name template, e.g. '{prefix} S{g1}E{n}{ext}' (default: %(default)s)")
+    parser.add_argument('--pattern', '--number-pattern', dest='pattern', type=_regex, default=core.NUMBER_PATTERN,
+                        metavar='REGEX', help="regex for --order number (group 1) and the template's {gN} "
+                                              "fields (default: %(default)s)")
+    parser.add_argument('--filter', dest='filter_spec', type=_filter_spec, default='', metavar='SPEC',
+                        help="files to number, e.g. '.mkv .mp4 !*sample* size>50M' (terms: .EXT, GLOB, "
+                             "re:REGEX, size>N[KMGT], age<N[smhdw]; '!' excludes); the rest keep their names")
+    parser.add_argument('--skip-duplicates', action='store_true',
+                        help="leave out later copies of files with identical content (they keep their names)")
+    _add_portable_arg(parser)
+
+
+def _add_portable_arg(parser):
+    parser.add_argument('--no-portable-check', dest='portable', action='store_false',
+                        help="only check new names against this system's rules, not Windows/SMB/exFAT ones "
+                             "(case clashes, <>:\"\\|?* and the like)")
+
+
+def _regex(text):
+    try:
+        re.compile(text)
+    except re.error as e:
+        raise argparse.ArgumentTypeError(f"invalid regex {text!r}: {e}")
+    return text
+
+
+def _filter_spec(text):
+    try:
+        compile_filter(text)
+    except FilterError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return text
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='folder_renamer', description="Batch rename files sequentially.")
+    parser.add_argument('--trace', metavar='FILE',
+                        help=f"write a JSON timing trace (Chrome trace format) at exit; also ${TRACE_ENV}")
+    sub = parser.add_subparsers(dest='command')
+
+    p_gui = sub.add_parser('gui', help="start the desktop GUI (default)")
+    p_gui.add_argument('folder', nargs='?', help="folder to open")
+    p_gui.add_argument('--perf', action='store_true', help="show the stage timings line (toggle with F12)")
+    p_gui.add_argument('--no-cache', dest='cache', action='store_false',
+                       help="always list folders instead of reusing cached listings")
+
+    p_rename = sub.add_parser('rename', help="number and rename the files of a folder")
+    p_rename.add_argument('folder')
+    _add_numbering_args(p_rename)
+    p_rename.add_argument('-n', '--dry-run', action='store_true', help="print the mapping, rename nothing")
+    p_rename.add_argument('--export', metavar='PLAN',
+                          help="write the plan to PLAN (.jsonl or .csv) for review or a later 'apply'; rename nothing")
+    p_rename.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                          help="concurrent renames; tune per mount (default: %(default)s)")
+
+    p_batch = sub.add_parser('batch', help="number every leaf folder under a tree (e.g. Show/Season NN)")
+    p_batch.add_argument('root')
+    _add_numbering_args(p_batch)
+    p_batch.add_argument('-n', '--dry-run', action='store_true', help="plan every folder, rename nothing")
+    p_batch.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                         help="concurrent renames per folder (default: %(default)s)")
+    p_batch.add_argument('-P', '--processes', type=int, default=None,
+                         help="folders processed in parallel (default: CPU count)")
+
+    p_apply = sub.add_parser('apply', help="apply a plan written by 'rename --export' (or the GUI)")
+    p_apply.add_argument('plan', help="plan file (.jsonl or .csv)")
+    p_apply.add_argument('folder', nargs='?', help="folder to rename in (default: the one recorded in a .jsonl plan)")
+    p_apply.add_argument('-n', '--dry-run', action='store_true', help="validate and print the mapping, rename nothing")
+    p_apply.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS)
+    p_apply.add_argument('--mtime-slack', type=float, default=planfile.MTIME_SLACK, metavar='SECONDS',
+                         help="accept files whose mtime moved by this much, e.g. after a copy (default: %(default)s)")
+    _add_portable_arg(p_apply)
+
+    for name, help_text in (('resume', "finish a rename batch that was interrupted"),
+                            ('rollback', "undo the last (finished or interrupted) rename batch")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('folder')
+        p.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS)
+    return parser
+
+
+def _check_template(args):
+    try:
+        compile_template(args.template, args.prefix, args.start, args.digits, args.pattern)
+    except TemplateError as e:
+        print(e, file=sys.stderr)
+        return False
+    return True
+
+
+def cmd_gui(args):
+    # Imported here so headless commands never load Tk
+    from .gui import main as gui_main
+    gui_main(args.folder, show_perf=args.perf, use_cache=args.cache)
+    return 0
+
+
+def cmd_rename(args):
+    folder = args.folder
+    if not os.path.isdir(folder):
+        print(f"Not a folder: {folder}", file=sys.stderr)
+        return 2
+    if not _check_template(args):
+        return 1
+    listing = scan.scan_listing(folder, compile_filter(args.filter_spec))
+    core.sort_records(listing.records, args.order, args.pattern, folder=folder)
+    dropped = 0
+    if args.skip_duplicates:
+        from . import dupes
+        extras = dupes.duplicate_extras(dupes.find_duplicates(folder, listing.records))
+        dropped = dupes.drop_duplicates(listing, extras)
+        for name, kept in extras.items():
+            print(f"duplicate: {name} (same as {kept})")
+    names = [r.name for r in listing.records]
+    new_names = core.compute_new_names(names, args.prefix, args.start, args.digits, args.template, args.pattern)
+    if args.export:
+        records = listing.records
+        entries = planfile.plan_entries(names, new_names, (r.size for r in records), (r.mtime for r in records))
+        try:
+            count = planfile.write_plan(args.export, entries, folder, len(names))
+        except OSError as e:
+            print(f"Cannot write {args.export}: {e}", file=sys.stderr)
+            return 1
+        print(f"Wrote {count} entries to {args.export}.")
+        return 0
+    filtered = len(listing.skipped) - dropped
+    note = f", {filtered} skipped by the filter" if filtered else ""
+    if dropped:
+        note += f", {dropped} duplicates left out"
+    return _run_plan(folder, listing, names, new_names, args, note)
+
+
+def _run_plan(folder, listing, names, new_names, args, note=""):
+    try:
+        plan = core.plan_renames(names, new_names, listing.taken_names(), args.portable)
+        if not args.dry_run:
+            core.check_stale(listing)
+    except RenameError as e:
+        # Nothing was renamed; any journal in the folder belongs to an earlier batch
+        print(f"{e}\nAborting.", file=sys.stderr)
+        return 1
+    if args.dry_run:
+        for src, dst in plan:
+            print(f"{src} -> {dst}")
+        print(f"{plan.file_count} of {len(names)} files would be renamed"
+              f" ({len(plan)} renames, {plan.temp_count} temporary){note}.")
+        return 0
+    try:
+        stats = journal.run_journaled(folder, plan, args.workers)
+    except RenameError as e:
+        print(f"{e}\nAborting.", file=sys.stderr)
+        if journal.has_pending(folder):
+            print(f"Journal kept: run 'resume {folder}' or 'rollback {folder}'.", file=sys.stderr)
+        return 1
+    print(f"Renamed {plan.file_count} files: {stats}.")
+    return 0
+
+
+def cmd_batch(args):
+    root = args.root
+    if not os.path.isdir(root):
+        print(f"Not a folder: {root}", file=sys.stderr)
+        return 2
+    if not _check_template(args):
+        return 1
+    verb = "would rename" if args.dry_run else "renamed"
+
+    def report(result):
+        if result.ok and not result.files:
+            return  # already numbered
+        rel = os.path.relpath(result.folder, root)
+        status = f"FAILED: {result.error}" if result.error else f"{verb} {result.files}"
+        if result.skipped:
+            status += f", {result.skipped} skipped"
+        print(f"  {rel}: {status} ({result.elapsed:.2f}s)", flush=True)
+
+    t0 = time.perf_counter()
+    from . import batch  # imports the process pool machinery
+    passed_over = []
+    results = batch.run_batch(root, args.prefix, args.start, args.digits, args.order, args.workers,
+                              args.processes, args.dry_run, on_result=report, pattern=args.pattern, template=args.template,
+                              filter_spec=args.filter_spec, skip_duplicates=args.skip_duplicates,
+                              portable=args.portable, passed_over=passed_over)
+    wall = time.perf_counter() - t0
+
+    def list_passed_over():
+        if passed_over:
+            print(f"{len(passed_over)} folder(s) with files were left alone because they have sub-folders "
+                  f"(use 'rename' on them):")
+            for folder in passed_over:
+                print(f"  {os.path.relpath(folder, root)}")
+
+    if not results:
+        print("No folders with files to number found.")
+        list_passed_over()
+        return 0
+    failed = [r for r in results if not r.ok]
+    unchanged = sum(1 for r in results if r.ok and not r.files)
+    changed = [r for r in results if not r.ok or r.files]
+    if changed:
+        print(f"\n{'Folder':<40} {'Files':>7} {'Steps':>7} {'Time':>8}  Status")
+    for r in changed:
+        # One line per folder; multi-line errors were printed in full as the folder finished
+        error = r.error and r.error.split('\n', 1)[0].rstrip(':')
+        print(f"{os.path.relpath(r.folder, root):<40} {r.files:>7} {r.steps:>7} {r.elapsed:>7.2f}s  "
+              f"{'error: ' + error if error else 'ok'}")
+    files = sum(r.files for r in results if r.ok)
+    busy = sum(r.elapsed for r in results)
+    already = f", {unchanged} already numbered" if unchanged else ""
+    print(f"\n{len(results) - len(failed)} of {len(results)} folders ok{already}, {files} files {verb} "
+          f"in {wall:.2f}s ({busy:.2f}s of folder time).")
+    list_passed_over()
+    if failed:
+        print(f"{len(failed)} folder(s) failed; fix them and re-run (finished folders are left as they are).",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_apply(args):
+    try:
+        folder = args.folder or planfile.read_plan_header(args.plan).get('folder')
+    except (OSError, RenameError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not folder:
+        print("The plan does not record its folder; pass FOLDER.", file=sys.stderr)
+        return 2
+    if not os.path.isdir(folder):
+        print(f"Not a folder: {folder}", file=sys.stderr)
+        return 2
+    try:
+        listing, names, new_names = planfile.load_plan(args.plan, folder, args.mtime_slack)
+    except (OSError, RenameError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    return _run_plan(folder, listing, names, new_names, args)
+
+
+def _cmd_recover(args, action, verb):
+    try:
+        stats, steps = action(args.folder, args.workers)
+    except RenameError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{verb} {steps} renames: {stats}.")
+    return 0
+
+
+def cmd_resume(args):
+    return _cmd_recover(args, journal.resume, "Resumed")
+
+
+def cmd_rollback(args):
+    return _cmd_recover(args, journal.rollback, "Rolled back")
+
+
+COMMANDS = {
+    'gui': cmd_gui,
+    'rename': cmd_rename,
+    'batch': cmd_batch,
+    'apply': cmd_apply,
+    'resume': cmd_resume,
+    'rollback': cmd_rollback,
+}
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        tracer.start(args.trace)
+    if args.command is None:
+        args.command, args.folder, args.perf, args.cache = 'gui', None, False, True
+    return COMMANDS[args.command](args)
@@ -0,0 +1,308 @@
+"""
+Rename engine shared by the GUI and the command line.
+
+Nothing in here imports tkinter/customtkinter, so scripts and cron jobs can
+list -> number -> rename folders without paying for a window.
+"""
+import os
+import re
+from array import array
+from functools import partial
+from operator import attrgetter
+
+from .errors import RenameError, ValidationError
+from .executor import DEFAULT_WORKERS
+from .filters import compile_filter
+from .journal import run_journaled
+from .planner import plan_moves
+from .preflight import check_batch, name_key
+from .scan import scan_folder, scan_listing
+from .store import FileStore
+from .template import DEFAULT_TEMPLATE, compile_template
+from .trace import span
+
+ORDER_MODES = ('name', 'natural', 'number', 'mtime', 'metadata')
+NUMBER_PATTERN = r'(\d+)'  # default for 'number' order: first run of digits
+_DIGITS = re.compile(r'(\d+)')
+
+
+# ------------------------------------------------------------ LISTING
+def natural_key(name):
+    """Case-insensitive key that compares digit runs as numbers ("ep2" < "ep10")."""
+    parts = _DIGITS.split(name.casefold())
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
+
+
+def number_key(name, regex):
+    """Key ordering by the number ``regex`` extracts (group 1, else the whole match).
+
+    Names without a (numeric) match sort after the others, naturally.
+    """
+    m = regex.search(name)
+    if m is not None:
+        try:
+            return (0, int(m.group(1 if regex.groups else 0)), natural_key(name))
+        except (TypeError, ValueError):
+            pass
+    return (1, 0, natural_key(name))
+
+
+def media_key(meta, name):
+    """Key ordering by embedded metadata (see metadata.py).
+
+    Numbered files come first by (season, episode/track), then files that
+    only carry a date, then the rest, naturally.
+    """
+    if meta.number is not None:
+        return (0, meta.season or 0, meta.number, meta.date or 0.0, natural_key(name))
+    if meta.date is not None:
+        return (1, 0, 0, meta.date, natural_key(name))
+    return (2, 0, 0, 0.0, natural_key(name))
+
+
+def _key_func(order_mode, pattern=None):
+    if order_mode == 'mtime':
+        return attrgetter('mtime')
+    if order_mode == 'name':
+        return lambda r: r.name.lower()
+    if order_mode == 'natural':
+        return lambda r: natural_key(r.name)
+    if order_mode == 'number':
+        regex = re.compile(pattern or NUMBER_PATTERN)
+        return lambda r: number_key(r.name, regex)
+    raise ValueError(f"Unknown order mode: {order_mode}")
+
+
+class SortKeys:
+    """Sort keys cached per file name, so switching order modes is only a sort.
+
+    Natural and number keys cost a regex pass per name and compare as tuples.
+    A mode's first sort parses every name once and turns the keys into
+    integer ranks, so sorting again in that mode compares ints. Names added
+    since (e.g. by the folder watcher) are parsed on their own. Only the
+    latest number pattern is kept. Metadata keys read the headers of the
+    files in ``folder`` (on a thread pool, see ``load_metadata``).
+
+    A SortKeys is not thread-safe: a background job works on a ``fork`` and
+    the UI thread ``merge``s it back when the job is done.
+    """
+
+    def __init__(self, folder=None):
+        self.folder = folder
+        self._tables = {}  # 'natural' / 'metadata' / ('number', pattern) -> [keys, ranks]
+
+    def ranks_for(self, names, order_mode, pattern=None):
+        """Integer sort key for each of ``names`` (unique) in a natural/number/metadata order."""
+        table, compute = self._table(order_mode, pattern)
+        keys, ranks = table
+        missing = [n for n in names if n not in keys]
+        if missing:
+            keys.update(zip(missing, compute(missing)))
+            ranks = None
+        if ranks is None or len(ranks) != len(names):
+            if len(keys) != len(names):
+                keys = table[0] = {n: keys[n] for n in names}  # forget vanished names
+            ranks = table[1] = {n: i for i, n in enumerate(sorted(keys, key=keys.__getitem__))}
+        return list(map(ranks.__getitem__, names))
+
+    def fork(self):
+        """A copy whose keys can be extended without touching this one."""
+        other = SortKeys(self.folder)
+        other._tables = {table_id: [dict(keys), ranks] for table_id, (keys, ranks) in self._tables.items()}
+        return other
+
+    def merge(self, other):
+        """Take over the keys a ``fork`` computed since."""
+        for table_id, (keys, ranks) in other._tables.items():
+            table = self._tables.get(table_id)
+            if table is None:
+                self._tables[table_id] = [keys, ranks]
+            elif keys.keys() - table[0].keys():
+                table[0].update(keys)
+                table[1] = None
+
+    def missing_metadata(self, names):
+        keys = self._tables.get('metadata', [{}])[0]
+        return [n for n in names if n not in keys]
+
+    def load_metadata(self, names, progress=None, should_stop=None):
+        """Read the metadata keys of ``names`` not known yet; False if stopped early.
+
+        This is the slow part of the metadata order; the GUI calls it from a
+        worker so the sort itself only compares cached keys.
+        """
+        missing = self.missing_metadata(names)
+        if not missing:
+            return True
+        from .metadata import read_folder_meta  # only the metadata order needs it
+        metas = read_folder_meta(self.folder, missing, progress=progress, should_stop=should_stop)
+        if metas is None:
+            return False
+        table = self._tables.setdefault('metadata', [{}, None])
+        table[0].update(zip(missing, map(media_key, metas, missing)))
+        table[1] = None
+        return True
+
+    def sort(self, records, order_mode, pattern=None):
+        if order_mode not in ('natural', 'number', 'metadata'):
+            records.sort(key=_key_func(order_mode))
+            return
+        ranks = self.ranks_for([r.name for r in records], order_mode, pattern)
+        records[:] = [records[i] for i in sorted(range(len(records)), key=ranks.__getitem__)]
+
+    def _table(self, order_mode, pattern):
+        if order_mode == 'natural':
+            return self._tables.setdefault('natural', [{}, None]), partial(map, natural_key)
+        if order_mode == 'metadata':
+            if self.folder is None:
+                raise ValueError("The metadata order needs the folder")
+            return self._tables.setdefault('metadata', [{}, None]), self._read_metadata_keys
+        if order_mode != 'number':
+            raise ValueError(f"Unknown order mode: {order_mode}")
+        regex = re.compile(pattern or NUMBER_PATTERN)
+        table_id = ('number', regex.pattern)
+        if table_id not in self._tables:
+            self._tables = {k: v for k, v in self._tables.items() if k in ('natural', 'metadata')}
+
+        def compute(names):
+            return [number_key(name, regex) for name in names]
+        return self._tables.setdefault(table_id, [{}, None]), compute
+
+    def _read_metadata_keys(self, names):
+        from .metadata import read_folder_meta
+        return map(media_key, read_folder_meta(self.folder, names), names)
+
+
+def _sort_store(store, order_mode, pattern, keys):
+    # One key per slot, then a C-level sort of the order array: no records built
+    store.compact()  # no keys (or metadata reads) for removed files
+    if order_mode == 'mtime':
+        column = store.mtimes
+    elif order_mode == 'name':
+        column = [n.lower() for n in store.names]
+    else:
+        column = (keys or SortKeys()).ranks_for(store.names, order_mode, pattern)
+    store.permute(sorted(store.order, key=column.__getitem__))
+
+
+def sort_records(records, order_mode='name', pattern=None, keys=None, folder=None):
+    """Sort FileRecords (a list or a FileStore) in place using only the data already in them.
+
+    ``pattern`` is the regex for the 'number' order; pass a SortKeys as
+    ``keys`` to reuse parsed keys across sorts. The 'metadata' order is the
+    exception: it reads file headers in ``folder`` (or ``keys.folder``)
+    for keys not cached yet.
+    """
+    if keys is None and order_mode == 'metadata':
+        keys = SortKeys(folder)
+    with span('sort', mode=order_mode, files=len(records)):
+        if isinstance(records, FileStore):
+            _sort_store(records, order_mode, pattern, keys)
+        elif keys is None:
+            records.sort(key=_key_func(order_mode, pattern))
+        else:
+            keys.sort(records, order_mode, pattern)
+    return records
+
+
+def list_records(folder, order_mode='name', pattern=None):
+    """Scan ``folder`` once and return its FileRecords, sorted."""
+    return sort_records(scan_folder(folder), order_mode, pattern, folder=folder)
+
+
+def list_files(folder, order_mode='name', pattern=None):
+    """Return full paths of the regular files in ``folder``, sorted."""
+    return [os.path.join(folder, r.name) for r in list_records(folder, order_mode, pattern)]
+
+
+# ------------------------------------------------------------ NAMING
+def new_name(filename, index, prefix='Episode', start=1, pad=2, template=DEFAULT_TEMPLATE, pattern=None):
+    """New name for the file at position ``index`` (0-based) of the list."""
+    return compile_template(template, prefix, start, pad, pattern).name_for(filename, index)
+
+
+def compute_new_names(names, prefix='Episode', start=1, pad=2, template=DEFAULT_TEMPLATE, pattern=None):
+    """New names for a list of file names in display order (raises TemplateError)."""
+    return compile_template(template, prefix, start, pad, pattern).render(names)
+
+
+# ------------------------------------------------------------ REORDER
+def move_block(items, indices, insert_at):
+    """Move ``items[i] for i in indices`` (sorted) so they form a contiguous block at ``insert_at``.
+
+    ``insert_at`` is the block's first position in the final list and is
+    clamped to the valid range. Only the span between the old and new block
+    positions is rebuilt. Returns ``(new_range, (lo, hi))`` where ``new_range``
+    holds the block's new indices and ``[lo, hi)`` is the span whose entries
+    (and therefore numbering) changed.
+    """
+    if not indices:
+        return range(0), (0, 0)
+    size = len(indices)
+    insert_at = max(0, min(insert_at, len(items) - size))
+    lo = min(indices[0], insert_at)
+    hi = max(indices[-1] + 1, insert_at + size)
+    picked = set(indices)
+    block = [items[i] for i in indices]
+    rest = [items[i] for i in range(lo, hi) if i not in picked]
+    at = insert_at - lo
+    merged = rest[:at] + block + rest[at:]
+    if hasattr(items, 'typecode'):
+        merged = array(items.typecode, merged)  # FileStore.order and other arrays
+    items[lo:hi] = merged
+    return range(insert_at, insert_at + size), (lo, hi)
+
+
+# ------------------------------------------------------------ RENAME
+def plan_renames(names, new_names, taken=None, portable=True):
+    """Build a RenamePlan mapping ``names[i]`` to ``new_names[i]``.
+
+    ``taken`` is every name present in the folder (see Listing.taken_names);
+    it defaults to ``names``, i.e. the files are assumed to be alone in the
+    folder. Targets held by files of the same batch are handled by the planner
+    (chains and cycles), so renumbering an already numbered folder works.
+    Every new name is checked first (see preflight.py; ``portable`` adds the
+    Windows/SMB/exFAT rules) and ValidationError lists all problems at once.
+    """
+    taken = set(names) if taken is None else taken
+    problems = check_batch(names, new_names, taken, portable)
+    if problems:
+        raise ValidationError(problems)
+    with span('plan', files=len(names)):
+        return plan_moves(dict(zip(names, new_names)), taken, name_key if portable else None)
+
+
+def check_stale(listing):
+    """Refuse to apply a plan built from a listing the folder no longer matches."""
+    if listing.is_stale():
+        raise RenameError("Folder changed since it was listed; refresh and try again.")
+
+
+def plan_folder(folder, prefix='Episode', start=1, pad=2, order_mode='name', pattern=None,
+                template=DEFAULT_TEMPLATE, filter_spec='', skip_duplicates=False, portable=True):
+    """List and number ``folder``; returns (Listing, RenamePlan) without renaming anything.
+
+    ``pattern`` feeds both the 'number' order and the template's ``{gN}``
+    groups; files left out by ``filter_spec`` (see filters.py) keep their names,
+    and so do the later copies of identical files with ``skip_duplicates``.
+    """
+    new_names = compile_template(template, prefix, start, pad, pattern).render
+    listing = scan_listing(folder, compile_filter(filter_spec))
+    sort_records(listing.records, order_mode, pattern, folder=folder)
+    if skip_duplicates:
+        from .dupes import drop_duplicates, duplicate_extras, find_duplicates  # reads files; rarely used
+        drop_duplicates(listing, duplicate_extras(find_duplicates(folder, listing.records)))
+    names = [r.name for r in listing.records]
+    plan = plan_renames(names, new_names(names), listing.taken_names(), portable)
+    return listing, plan
+
+
+def rename_folder(folder, prefix='Episode', start=1, pad=2, order_mode='name', workers=DEFAULT_WORKERS,
+                  pattern=None, template=DEFAULT_TEMPLATE, filter_spec='', skip_duplicates=False, portable=True):
+    """List, number and rename ``folder`` in one call; returns the number of files renamed."""
+    listing, plan = plan_folder(folder, prefix, start, pad, order_mode, pattern, template, filter_spec,
+                                skip_duplicates, portable)
+    check_stale(listing)
+    run_journaled(folder, plan, workers)
+    return plan.file_count
@@ -0,0 +1,146 @@
+"""
+Duplicate-content detection, so a second copy of an episode is not numbered.
+
+Only files that could be duplicates are read, in three passes:
+
+1. group the listing by size (already in the records; no I/O). Files with a
+   unique size, or empty ones, are out.
+2. hash the first and last ``PARTIAL_BYTES`` of each remaining file. Files
+   no larger than two such blocks are then fully known.
+3. fully hash only the files that still collide, in ``CHUNK_BYTES`` reads
+   into one reused buffer per file.
+
+Copies of the same episode agree on size, and different ones almost never do,
+so a folder of hundreds of GB usually costs a few KB of reads per file.
+blake2b releases the GIL on large buffers, so hashing runs on a small thread
+pool and keeps several reads in flight. Plain chunked reads are used rather
+than mmap: the data is hashed once, and a file truncated while it is read
+fails that read instead of faulting.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import blake2b
+
+from .store import FileStore
+from .trace import span
+
+HASH_WORKERS = 4
+PARTIAL_BYTES = 64 * 1024
+CHUNK_BYTES = 1 << 20
+
+
+class _Stopped(Exception):
+    pass
+
+
+def _partial_hash(path, size, should_stop):
+    if should_stop is not None and should_stop():
+        raise _Stopped()
+    digest = blake2b(digest_size=32)
+    with open(path, 'rb', buffering=0) as fh:
+        if size <= 2 * PARTIAL_BYTES:
+            digest.update(fh.read())
+        else:
+            digest.update(fh.read(PARTIAL_BYTES))
+            fh.seek(-PARTIAL_BYTES, os.SEEK_END)
+            digest.update(fh.read(PARTIAL_BYTES))
+    return digest.digest()
+
+
+def _full_hash(path, should_stop):
+    digest = blake2b(digest_size=32)
+    buf = bytearray(CHUNK_BYTES)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as fh:
+        while True:
+            if should_stop is not None and should_stop():
+                raise _Stopped()
+            n = fh.readinto(buf)
+            if not n:
+                return digest.digest()
+            digest.update(view[:n])
+
+
+def _groups(pairs):
+    # (key, names) for the keys shared by several names, names in ``pairs`` order
+    by_key = {}
+    for key, name in pairs:
+        by_key.setdefault(key, []).append(name)
+    return [(key, names) for key, names in by_key.items() if len(names) > 1]
+
+
+def find_duplicates(folder, records, workers=HASH_WORKERS, progress=None, should_stop=None):
+    """Groups of names in ``folder`` whose files have identical content.
+
+    ``records`` are FileRecords (or a FileStore) in numbering order; each
+    group lists its names in that order, so the first one is the copy to
+    keep. ``progress(done, total)`` counts files hashed in the current pass.
+    Files that cannot be read are left out. Returns None when
+    ``should_stop()`` turned true.
+    """
+    order = {}
+    sizes = {}
+    for rec in records:
+        order[rec.name] = len(order)
+        if rec.size > 0:
+            sizes.setdefault(rec.size, []).append(rec.name)
+    candidates = [(name, size) for size, names in sizes.items() if len(names) > 1 for name in names]
+    with span('dupes', files=len(order), candidates=len(candidates)) as s, \
+            ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        try:
+            partial = _hash_all(pool, folder, candidates,
+                                lambda path, size: _partial_hash(path, size, should_stop), progress)
+            groups, unsure = [], []
+            for (size, _), names in _groups(((size, digest), name) for (name, size), digest in partial):
+                if size <= 2 * PARTIAL_BYTES:
+                    groups.append(names)  # the partial hash covered every byte
+                else:
+                    unsure.extend((name, size) for name in names)
+            full = _hash_all(pool, folder, unsure, lambda path, size: _full_hash(path, should_stop), progress)
+            groups.extend(names for _, names in _groups(((size, digest), name) for (name, size), digest in full))
+        except _Stopped:
+            return None
+        s.args['groups'] = len(groups)
+    for names in groups:
+        names.sort(key=order.__getitem__)
+    groups.sort(key=lambda names: order[names[0]])
+    return groups
+
+
+def _hash_all(pool, folder, items, hasher, progress):
+    # [((name, size), digest)] for the readable ones among ``items``
+    def work(item):
+        name, size = item
+        try:
+            return item, hasher(os.path.join(folder, name), size)
+        except OSError:
+            return item, None
+
+    out = []
+    for done, (item, digest) in enumerate(pool.map(work, items), 1):
+        if digest is not None:
+            out.append((item, digest))
+        if progress is not None:
+            progress(done, len(items))
+    return out
+
+
+def duplicate_extras(groups):
+    """``{name: kept name}`` for every copy after the first of its group."""
+    return {name: names[0] for names in groups for name in names[1:]}
+
+
+def drop_duplicates(listing, extras):
+    """Move the records named in ``extras`` out of ``listing.records`` into ``listing.skipped``.
+
+    Like files a scan filter leaves out, they keep their names and still
+    count as taken when the rename is planned.
+    """
+    records = listing.records
+    positions = [pos for pos, rec in enumerate(records) if rec.name in extras]
+    if isinstance(records, FileStore):
+        records.remove(positions)
+    else:
+        records[:] = [rec for rec in records if rec.name not in extras]
+    listing.skipped.update(extras)
+    return len(positions)
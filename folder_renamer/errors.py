@@ -0,0 +1,39 @@
+"""Exceptions shared by the rename engine modules."""
+import os
+
+
+class RenameError(Exception):
+    """A rename batch could not be applied."""
+
+
+class ConflictError(RenameError):
+    """A rename target is already taken by a file that is not being moved."""
+
+    def __init__(self, target, reason="Target exists"):
+        super().__init__(f"{reason}: {os.path.basename(target)}")
+        self.target = target
+
+
+class TemplateError(ValueError):
+    """A rename template (or the pattern its groups come from) is invalid."""
+
+
+class FilterError(ValueError):
+    """A scan filter spec is invalid."""
+
+
+class PlanError(RenameError):
+    """A saved rename plan is malformed or no longer matches the folder."""
+
+
+class ValidationError(RenameError):
+    """A rename batch failed its pre-flight checks; ``problems`` lists every one."""
+
+    MAX_REPORTED = 5
+
+    def __init__(self, problems):
+        shown = '\n'.join(p.message for p in problems[:self.MAX_REPORTED])
+        more = len(problems) - self.MAX_REPORTED
+        super().__init__(f"{len(problems)} files cannot be renamed as planned:\n{shown}"
+                         + (f"\n... and {more} more" if more > 0 else ""))
+        self.problems = problems
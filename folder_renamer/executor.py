@@ -0,0 +1,232 @@
+"""
+Parallel rename executor.
+
+The target folder is opened once and every rename is issued relative to that
+directory fd (``src_dir_fd``/``dst_dir_fd``), so the server resolves the
+folder path once instead of on every call. Independent chains of a
+RenamePlan run on a bounded pool of worker threads; on high-latency mounts
+throughput scales with the number of requests in flight. Platforms without
+dir_fd support (Windows) fall back to absolute paths.
+
+A rename never replaces an existing file: plans are checked against a
+listing, but a file created since then must fail the step, not be lost.
+Linux uses ``renameat2(RENAME_NOREPLACE)``; where that is missing or the
+filesystem refuses the flag, a hard link plus unlink of the old name does the
+same, and Windows' own rename already refuses existing targets. The link and
+the unlink are two calls, not one atomic step: a crash between them leaves
+the file under both names (one inode). Journal recovery recognizes that
+state and finishes the move (see ``journal.recover_progress``).
+"""
+import errno
+import os
+import threading
+import time
+from functools import lru_cache
+
+from .errors import RenameError
+from .planner import TEMP_PREFIX
+from .preflight import name_key
+
+DEFAULT_WORKERS = 4
+_RENAME_NOREPLACE = 1
+_AT_FDCWD = -100
+
+
+@lru_cache(maxsize=None)
+def _renameat2():
+    # (libc's renameat2, ctypes.get_errno) or None; loaded on the first rename
+    if os.name != 'posix':
+        return None
+    import ctypes
+    try:
+        fn = ctypes.CDLL(None, use_errno=True).renameat2
+    except (AttributeError, OSError):
+        return None  # not Linux, or a libc older than glibc 2.28
+    fn.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    return fn, ctypes.get_errno
+
+
+class RenameStats:
+    """Outcome of one execution: renames done, wall time and throughput."""
+
+    def __init__(self, total, workers):
+        self.total = total
+        self.workers = workers
+        self.done = 0
+        self.elapsed = 0.0
+        self.stopped = False
+
+    @property
+    def rate(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self):
+        return (f"{self.done}/{self.total} renames in {self.elapsed:.2f}s "
+                f"({self.rate:.0f} files/s, {self.workers} workers)")
+
+
+class DirRenamer:
+    """Renames names inside one folder, relative to an open directory fd when possible."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.fd = None
+        if os.rename in os.supports_dir_fd and hasattr(os, 'O_DIRECTORY'):
+            self.fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+        self._noreplace = _renameat2()  # None once the filesystem refuses the flag
+        self._link = os.name == 'posix'  # off once the filesystem refuses hard links
+
+    def _at(self, name):
+        # (path, dir_fd) arguments for ``name``
+        if self.fd is not None:
+            return name, self.fd
+        return os.path.join(self.folder, name), None
+
+    def rename(self, src, dst):
+        """Rename ``src`` to ``dst``; raises FileExistsError instead of replacing ``dst``."""
+        try:
+            self._rename_noreplace(src, dst)
+        except FileExistsError:
+            if not self._same_file(src, dst):
+                raise
+            self._rename(src, dst)  # a case-only change on a case-insensitive filesystem
+
+    def _rename_noreplace(self, src, dst):
+        (src_path, fd), (dst_path, _) = self._at(src), self._at(dst)
+        if self._noreplace:
+            at = _AT_FDCWD if fd is None else fd
+            renameat2, get_errno = self._noreplace
+            if renameat2(at, os.fsencode(src_path), at, os.fsencode(dst_path), _RENAME_NOREPLACE) == 0:
+                return
+            err = get_errno()
+            if err not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP):
+                raise OSError(err, os.strerror(err), src, None, dst)
+            self._noreplace = None
+        if self._link:
+            try:
+                os.link(src_path, dst_path, src_dir_fd=fd, dst_dir_fd=fd, follow_symlinks=False)
+            except FileExistsError:
+                raise
+            except OSError as e:
+                if e.errno not in (errno.EPERM, errno.ENOTSUP, errno.EOPNOTSUPP, errno.EMLINK, errno.ENOSYS):
+                    raise
+                self._link = False  # e.g. exFAT or SMB without hard links: check, then rename
+            else:
+                try:
+                    os.unlink(src_path, dir_fd=fd)
+                except OSError:
+                    os.unlink(dst_path, dir_fd=fd)  # take the link back: the step did not happen
+                    raise
+                return
+        if os.name == 'posix' and self._lstat(dst) is not None:
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), src, None, dst)
+        self._rename(src, dst)
+
+    def _rename(self, src, dst):
+        (src_path, fd), (dst_path, _) = self._at(src), self._at(dst)
+        os.rename(src_path, dst_path, src_dir_fd=fd, dst_dir_fd=fd)
+
+    def _lstat(self, name):
+        path, fd = self._at(name)
+        try:
+            return os.stat(path, dir_fd=fd, follow_symlinks=False)
+        except FileNotFoundError:
+            return None
+
+    def _same_file(self, src, dst):
+        # Both names reach the same directory entry: only the spelling changes
+        if name_key(src) != name_key(dst):
+            return False
+        try:
+            a, b = self._lstat(src), self._lstat(dst)
+        except OSError:
+            return False
+        return a is not None and b is not None and os.path.samestat(a, b)
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def execute_plan(folder, plan, workers=DEFAULT_WORKERS, progress=None, should_stop=None, on_step=None):
+    """Run a RenamePlan inside ``folder``; returns RenameStats.
+
+    ``progress(done, total)`` may be called from worker threads. When
+    ``should_stop()`` turns true, workers finish the step they are on (and
+    land any file parked under a temporary name) and return; ``stats.stopped``
+    is then set. ``on_step(chain_index, done_in_chain, src, dst)`` runs on the
+    worker after every successful rename (the journal hooks in here). The
+    first OSError stops all workers and is raised as RenameError (with the
+    partial stats attached as ``.stats``).
+    """
+    stats = RenameStats(len(plan), max(1, min(workers, len(plan.chains) or 1)))
+    lock = threading.Lock()
+    chains = enumerate(plan.chains)
+    errors = []
+    halt = threading.Event()
+
+    def next_chain():
+        with lock:
+            return next(chains, (None, None))
+
+    def stop_requested():
+        if halt.is_set():
+            return True
+        if should_stop is not None and should_stop():
+            stats.stopped = True
+            halt.set()
+            return True
+        return False
+
+    def worker(renamer):
+        while not stop_requested():
+            ci, chain = next_chain()
+            if chain is None:
+                return
+            parked = False
+            for k, (src, dst) in enumerate(chain, 1):
+                # Never stop while a file sits under a temporary name
+                if not parked and stop_requested():
+                    return
+                try:
+                    renamer.rename(src, dst)
+                except OSError as e:
+                    with lock:
+                        errors.append((src, dst, e))
+                    halt.set()
+                    return
+                if dst.startswith(TEMP_PREFIX):
+                    parked = True
+                elif src.startswith(TEMP_PREFIX):
+                    parked = False
+                if on_step is not None:
+                    on_step(ci, k, src, dst)
+                with lock:
+                    stats.done += 1
+                    done = stats.done
+                if progress is not None:
+                    progress(done, stats.total)
+
+    start = time.perf_counter()
+    with DirRenamer(folder) as renamer:
+        if stats.workers == 1:
+            worker(renamer)
+        else:
+            from concurrent.futures import ThreadPoolExecutor  # not needed (nor imported) for one worker
+            with ThreadPoolExecutor(max_workers=stats.workers) as pool:
+                for f in [pool.submit(worker, renamer) for _ in range(stats.workers)]:
+                    f.result()
+    stats.elapsed = time.perf_counter() - start
+    if errors:
+        src, dst, e = errors[0]
+        err = RenameError(f"Failed after {stats.done} of {stats.total} ({src} -> {dst}): {e}")
+        err.stats = stats
+        raise err from e
+    return stats
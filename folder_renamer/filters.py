@@ -0,0 +1,120 @@
+"""
+Include/exclude filters applied while a folder is listed.
+
+A filter spec is a list of terms separated by spaces (quote a term that
+contains spaces); ``!`` in front of a name term turns it into an exclude:
+
+    .mkv .mp4               keep only these extensions (case-insensitive)
+    !.nfo !.srt             drop these extensions
+    *E??* !*sample*         glob on the file name (case-insensitive)
+    re:S\\d+E\\d+ !re:^tmp    regex searched in the file name
+    size>100M size<4G       size bounds (K, M, G, T: powers of 1024)
+    age<30d age>2h          time since last modification (s, m, h, d, w)
+
+A file is kept when it matches one of the include terms (or there are none),
+none of the exclude terms and every bound. Globs are compiled into one regex
+per side and extensions into a set, so a name costs one dict lookup and at
+most two glob searches, plus one search per ``re:`` term. Those are compiled
+on their own, so inline flags such as ``(?i)`` and group numbers stay local
+to their term. Name terms are checked before the file is stat'ed; only the
+bounds need the stat the listing does anyway.
+"""
+import fnmatch
+import re
+import shlex
+from functools import lru_cache
+
+from .errors import FilterError
+from .template import split_ext
+
+_BOUND = re.compile(r'(size|age)([<>])(\d+(?:\.\d+)?)([a-z]?)$', re.IGNORECASE)
+_SIZE_UNITS = {'': 1, 'b': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30, 't': 1 << 40}
+_AGE_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+
+def _split(spec):
+    # Quotes group, backslashes stay (they belong to the regexes)
+    lexer = shlex.shlex(spec, posix=True)
+    lexer.whitespace_split = True
+    lexer.escape = ''
+    return list(lexer)
+
+
+class FileFilter:
+    """A compiled filter spec (immutable; see ``compile_filter``)."""
+
+    def __init__(self, spec=''):
+        self.spec = spec
+        self.include_exts, self.exclude_exts = set(), set()
+        includes, excludes = [], []  # compiled re: terms
+        include_globs, exclude_globs = [], []
+        self.size = [None, None]  # exclusive (min, max) in bytes
+        self.age = [None, None]  # exclusive (min, max) in seconds
+        try:
+            terms = _split(spec)
+        except ValueError as e:
+            raise FilterError(f"Bad filter {spec!r}: {e}") from e
+        for term in terms:
+            bound = _BOUND.match(term)
+            if bound:
+                self._add_bound(term, *bound.groups())
+                continue
+            exclude = term.startswith('!')
+            body = term[1:] if exclude else term
+            if not body:
+                raise FilterError(f"Empty filter term: {term!r}")
+            if body.startswith('re:'):
+                try:
+                    regex = re.compile(body[3:])
+                except re.error as e:
+                    raise FilterError(f"Bad filter regex {body[3:]!r}: {e}") from e
+                (excludes if exclude else includes).append(regex)
+            elif body.startswith('.') and not any(c in body for c in '*?['):
+                (self.exclude_exts if exclude else self.include_exts).add(body.lower())
+            else:
+                (exclude_globs if exclude else include_globs).append('^(?i:' + fnmatch.translate(body) + ')')
+        self.include_exts = frozenset(self.include_exts)
+        self.exclude_exts = frozenset(self.exclude_exts)
+        self._include = self._join(include_globs) + tuple(includes)
+        self._exclude = self._join(exclude_globs) + tuple(excludes)
+        self.has_includes = bool(self.include_exts or self._include)
+        self.size, self.age = tuple(self.size), tuple(self.age)
+        self.uses_stat = self.size != (None, None) or self.age != (None, None)
+
+    def _add_bound(self, term, what, op, number, unit):
+        units = _SIZE_UNITS if what.lower() == 'size' else _AGE_UNITS
+        if unit.lower() not in units:
+            raise FilterError(f"Unknown unit in {term!r}")
+        value = float(number) * units[unit.lower()]
+        bounds = self.size if what.lower() == 'size' else self.age
+        bounds[0 if op == '>' else 1] = value
+
+    @staticmethod
+    def _join(globs):
+        # () or a 1-tuple with the globs as one regex
+        return (re.compile('|'.join(f'(?:{p})' for p in globs)),) if globs else ()
+
+    def __bool__(self):
+        return self.has_includes or bool(self._exclude or self.exclude_exts) or self.uses_stat
+
+    def keep_name(self, name):
+        ext = split_ext(name)[1].lower()
+        if ext in self.exclude_exts or any(regex.search(name) for regex in self._exclude):
+            return False
+        if not self.has_includes:
+            return True
+        return ext in self.include_exts or any(regex.search(name) for regex in self._include)
+
+    def keep_stat(self, size, mtime, now):
+        lo, hi = self.size
+        if lo is not None and size <= lo or hi is not None and size >= hi:
+            return False
+        lo, hi = self.age
+        age = now - mtime
+        return not (lo is not None and age <= lo or hi is not None and age >= hi)
+
+
+@lru_cache(maxsize=32)
+def compile_filter(spec=''):
+    """Compiled FileFilter for ``spec`` (cached; raises FilterError)."""
+    return FileFilter(spec)
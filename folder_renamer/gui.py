@@ -0,0 +1,1414 @@
+"""
+CustomTkinter based GUI tool to batch rename files sequentially (e.g., series episodes).
+Features:
+- Select folder
+- Enter prefix, or a full template such as ``{prefix} S{g1}E{n}{ext}``
+- Choose start number & zero padding
+- Order by name, natural name, extracted number, modification time or embedded metadata
+- Reorder manually (multi-select, move block up/down)
+- Find files with duplicate content and leave them out of the numbering
+- Preview & rename
+- Watch the folder and update the preview as files come and go
+- Light / Dark / System appearance switching
+
+Listing, numbering and renaming live in ``core``; this module is only imported
+when the GUI starts, so customtkinter is never loaded by headless commands.
+"""
+import os
+import re
+import time
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+# Use customtkinter for modern UI
+try:
+    import customtkinter as ctk
+except ImportError:
+    raise SystemExit("Missing dependency: install with 'pip install customtkinter'")
+
+from . import core, dupes, planfile, scan
+from .cache import ListingCache
+from .filters import compile_filter
+from .errors import ConflictError, FilterError, RenameError, TemplateError, ValidationError
+from . import journal
+from .journal import run_journaled
+from .render import FrameScheduler
+from .store import FileStore
+from .tasks import TaskRunner
+from .template import DEFAULT_TEMPLATE, compile_template
+from .trace import span, tracer
+from .virtual_list import VirtualList
+from .watch import watch_job
+
+ctk.set_appearance_mode("System")  # Options: "Light", "Dark", "System"
+ctk.set_default_color_theme("blue")  # Built-in: blue, green, dark-blue
+
+# Stages shown on the perf line (F12), in pipeline order
+PERF_STAGES = ('scan', 'sort', 'meta', 'dupes', 'names', 'rows', 'renumber', 'move', 'watch', 'fit', 'frame', 'theme', 'validate', 'plan',
+               'rename')
+SCROLLBAR_HIDE_DELAY = 1.0  # seconds after the last scroll before the thumb hides
+
+# Preview colors per appearance mode, built once; a theme switch only points
+# the styles and row tags at the other set
+PALETTES = {
+    'Dark': {
+        'bg': '#1d232a',
+        'panel': '#242b33',
+        'header_bg': '#242b33',
+        'header_fg': '#9caec1',
+        'row_even': '#2a323c',
+        'row_odd': '#252d36',
+        'row_fg': '#e3e7eb',
+        'sel_bg': '#2563eb',
+        'sel_fg': '#ffffff',
+        'dup_bg': '#3b3222',
+        'dup_fg': '#fbbf24',
+        'bad_bg': '#3f1d22',
+        'bad_fg': '#f87171',
+        'border': '#2f3943'
+    },
+    'Light': {
+        'bg': '#ffffff',
+        'panel': '#f5f7f9',
+        'header_bg': '#eef1f4',
+        'header_fg': '#334155',
+        'row_even': '#ffffff',
+        'row_odd': '#f2f5f7',
+        'row_fg': '#1f2933',
+        'sel_bg': '#2563eb',
+        'sel_fg': '#ffffff',
+        'dup_bg': '#fff4dc',
+        'dup_fg': '#92400e',
+        'bad_bg': '#fde8e8',
+        'bad_fg': '#991b1b',
+        'border': '#d5dbe1'
+    },
+}
+
+class FolderRenamerGUI:
+    def __init__(self, root: ctk.CTk, show_perf=False, use_cache=True):
+        self.root = root
+        self.root.title("Folder Renamer")
+        # Start with minimal width, height will auto-fit after first preview build
+        self.root.minsize(640, 300)
+
+        # State variables
+        self.folder_path = tk.StringVar()
+        self.prefix_text = tk.StringVar(value="Episode")
+        self.template_text = tk.StringVar(value=DEFAULT_TEMPLATE)
+        self.start_number = tk.IntVar(value=1)
+        self.padding = tk.IntVar(value=2)
+        self.order_mode = tk.StringVar(value="name")
+        self.number_pattern = tk.StringVar(value=core.NUMBER_PATTERN)
+        self.filter_text = tk.StringVar(value="")
+        self.appearance_mode = tk.StringVar(value="System")
+        self.watch_enabled = tk.BooleanVar(value=False)
+
+        # Data containers
+        self.file_list = FileStore()  # FileRecords in display order
+        self.accent_color = '#2563eb'
+        self._max_tree_rows = 10  # fixed visible row count (height); DO NOT limit total files
+        self._auto_resize_window = True
+        self._scroll_hover = False
+        self._scroll_hide_job = None
+        self._scroll_hide_at = 0.0  # monotonic deadline, pushed on by every scroll event
+        self._scroll_reveal = False  # a scroll happened since the last frame
+        self._thumb_geometry = None  # (height, y) the thumb was last placed with
+        self._numbering = compile_template()  # compiled template used by visible rows
+        self._flash_indices = set()
+        self._flash_tag = None
+        self._flash_job = None
+        self.move_position = tk.StringVar(value="1")
+        self._preview_job = None
+        # Scrollbar, thumb and window-fit updates are applied at most once per frame
+        self._frame = FrameScheduler(self.root.after, self.root.after_idle, order=('fit', 'scrollbar'))
+        # Listing and renaming run on worker threads; results come back via root.after polling
+        self.tasks = TaskRunner(self.root.after)
+        self._task = None  # current scan/rename task (one at a time)
+        self._task_kind = None
+        self._listing = None  # complete scan of the folder (None while scanning / after cancel)
+        self._sort_keys = core.SortKeys()  # per-name keys, reused when switching order modes
+        self._sort_keys_folder = None
+        self._pattern = core.NUMBER_PATTERN  # last valid number pattern
+        self._filter = compile_filter()  # last valid scan filter
+        self._listing_filter = self._filter  # filter the current listing was scanned with
+        self._watch_task = None  # keeps _listing current while "Watch" is on
+        self._cache = ListingCache() if use_cache else None  # listings of reopened folders
+        self._manual_order = False  # display order arranged by hand since the last sort
+        self._cache_dirty = False  # listing or order changed since it was cached
+        self._duplicates = {}  # name -> name of the earlier copy, highlighted in the preview
+        self._duplicates_left_out = False  # copies moved out of the listing (not cached then)
+        self._problem_names = {}  # name -> why its new name was refused (see preflight.py)
+        self._perf_job = None
+
+        self._build_ui()
+        # Numbering edits only recompute the new-name column, coalesced per frame
+        for var in (self.prefix_text, self.template_text, self.start_number, self.padding):
+            var.trace_add('write', self._schedule_preview_update)
+        # Style tree after widgets exist
+        self._style_treeview()
+        # In System mode the OS theme can flip at any time; customtkinter tells its trackers
+        ctk.AppearanceModeTracker.add(self._apply_palette, self.root)
+        # Latest stage timings on demand
+        self.root.bind('<F12>', lambda e: self.toggle_perf())
+        if show_perf:
+            self.toggle_perf()
+        # Keep the listing (and a manual order) for the next time the folder is opened
+        self.root.protocol('WM_DELETE_WINDOW', self._on_close)
+        # Initial auto-size
+        self.root.after(50, self._auto_fit_height)
+
+    # --- Color helpers and styling additions ---
+    def _get_theme_palette(self, mode=None):
+        mode = mode or ctk.get_appearance_mode()
+        return PALETTES['Dark' if mode.lower() == 'dark' else 'Light']
+
+    def _style_treeview(self):
+        style = ttk.Style(self.tree)
+        # Pick a base theme first to ensure elements exist
+        try:
+            style.theme_use('clam')
+        except Exception:
+            pass
+        # Remove border separators (clam uses bordercolor option)
+        style.layout('Flat.Treeview', style.layout('Treeview'))
+        self.tree.configure(style='Flat.Treeview')
+        self._palette = None
+        self._apply_palette()
+
+    def _apply_palette(self, mode=None):
+        # Colors only: ttk styles, the two row tags and the scrollbar. Row items
+        # are never touched, so a theme switch costs the same for any folder size
+        palette = self._get_theme_palette(mode)
+        if palette is self._palette:
+            return
+        self._palette = palette
+        style = ttk.Style(self.tree)
+        style.configure('Flat.Treeview',
+                        background=palette['panel'],
+                        fieldbackground=palette['panel'],
+                        foreground=palette['row_fg'],
+                        borderwidth=0,
+                        relief='flat',
+                        rowheight=26,
+                        font=('Segoe UI', 10))
+        style.configure('Flat.Treeview.Heading',
+                        background=palette['header_bg'],
+                        foreground=palette['header_fg'],
+                        relief='flat',
+                        borderwidth=0,
+                        font=('Segoe UI Semibold', 10))
+        style.map('Flat.Treeview',
+                  background=[('selected', palette['sel_bg'])],
+                  foreground=[('selected', palette['sel_fg'])])
+        self.tree.tag_configure('even', background=palette['row_even'], foreground=palette['row_fg'])
+        self.tree.tag_configure('odd', background=palette['row_odd'], foreground=palette['row_fg'])
+        self.tree.tag_configure('dup', background=palette['dup_bg'], foreground=palette['dup_fg'])
+        self.tree.tag_configure('bad', background=palette['bad_bg'], foreground=palette['bad_fg'])
+        # Restyle custom scrollbar
+        if hasattr(self, 'scroll_track'):
+            self.scroll_track.configure(fg_color=palette['panel'])
+            self.scroll_thumb.configure(fg_color=self.accent_color)
+
+    # --- Modern hidden scrollbar logic ---
+    def _init_custom_scrollbar(self, container):
+        palette = self._get_theme_palette()
+        # width/height must be set via constructor or configure() in customtkinter, not via place()
+        self.scroll_track = ctk.CTkFrame(container, corner_radius=3, fg_color=palette['panel'], width=6)
+        # Provide an initial height for thumb; will be updated dynamically
+        self.scroll_thumb = ctk.CTkFrame(self.scroll_track, corner_radius=3, fg_color=self.accent_color, width=6, height=24)
+        # Initially hidden; shown on hover/scroll if needed
+        self._scrollbar_shown = False
+        self._thumb_placed = False
+
+    def _show_scrollbar(self):
+        if not hasattr(self, 'scroll_track'):
+            return
+        if self._needs_vertical_scroll():
+            if not self._scrollbar_shown:
+                # Width already set; do not pass width/height to place()
+                self.scroll_track.place(relx=1.0, rely=0.0, relheight=1.0, x=-2)
+                self._scrollbar_shown = True
+            self._update_scroll_thumb()
+
+    def _hide_scrollbar(self, force=False):
+        if not hasattr(self, 'scroll_track'):
+            return
+        if force or (not self._scroll_hover and not self._is_scrolling_active()):
+            if self._scrollbar_shown:
+                self.scroll_track.place_forget()
+                self._scrollbar_shown = False
+                self._thumb_visible = False
+
+    def _schedule_hide_scrollbar(self):
+        # One pending timer; further scrolling only moves the deadline
+        self._scroll_hide_at = time.monotonic() + SCROLLBAR_HIDE_DELAY
+        if self._scroll_hide_job is None:
+            self._scroll_hide_job = self.root.after(int(SCROLLBAR_HIDE_DELAY * 1000), self._on_hide_timer)
+
+    def _on_hide_timer(self):
+        left = self._scroll_hide_at - time.monotonic()
+        if left > 0.005:
+            self._scroll_hide_job = self.root.after(int(left * 1000) + 1, self._on_hide_timer)
+            return
+        self._scroll_hide_job = None
+        self._hide_scrollbar()
+
+    def _needs_vertical_scroll(self):
+        if not hasattr(self, 'tree'):
+            return False
+        first, last = self.vlist.yview()
+        return not (first <= 0.0001 and last >= 0.9999)
+
+    def _is_scrolling_active(self):
+        return time.monotonic() < self._scroll_hide_at
+
+    def _on_tree_scroll(self, first, last):
+        # Fires for every view change (wheel, keys, selection); the scrollbar follows once per frame
+        self._scroll_reveal = True
+        self._request_scrollbar()
+        self._schedule_hide_scrollbar()
+
+    def _request_scrollbar(self):
+        self._frame.request('scrollbar', self._render_scrollbar)
+
+    def _render_scrollbar(self):
+        reveal, self._scroll_reveal = self._scroll_reveal, False
+        if not self._needs_vertical_scroll():
+            self._hide_scrollbar(force=True)
+        elif reveal or self._scroll_hover:
+            self._show_scrollbar()
+        else:
+            self._update_scroll_thumb()
+
+    def _update_scroll_thumb(self, first=None, last=None):
+        if not hasattr(self, 'scroll_track'):
+            return
+        if first is None or last is None:
+            fv = self.vlist.yview()
+            if not fv:
+                return
+            first, last = fv
+        if not self._needs_vertical_scroll():
+            self._hide_scrollbar(force=True)
+            return
+        if not self._scrollbar_shown:
+            return
+        track_h = self.scroll_track.winfo_height() or 1
+        frac = max(0.02, last - first)
+        thumb_h = int(track_h * frac)
+        if thumb_h < 22:
+            thumb_h = 22
+        y = int(track_h * first)
+        max_y = track_h - thumb_h
+        if y > max_y:
+            y = max_y
+        if (thumb_h, y) == self._thumb_geometry:
+            return
+        self._thumb_geometry = (thumb_h, y)
+        # Configure thumb size (height) and place (position). Avoid width/height in place().
+        self.scroll_thumb.configure(height=thumb_h)
+        if not self._thumb_placed:
+            # Place once; then only adjust y position.
+            self.scroll_thumb.place(relx=0.0, x=0, y=y, relwidth=1.0)
+            self._thumb_placed = True
+        else:
+            self.scroll_thumb.place_configure(y=y)
+
+    def _update_scroll_visibility(self):
+        # Shown only if hovered / scrolling; applied with the next frame
+        self._request_scrollbar()
+
+    def _bind_mousewheel(self):
+        # Windows & Mac / Linux support
+        self.tree.bind_all('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind_all('<Button-4>', self._on_mousewheel)
+        self.tree.bind_all('<Button-5>', self._on_mousewheel)
+
+    def _unbind_mousewheel(self):
+        self.tree.unbind_all('<MouseWheel>')
+        self.tree.unbind_all('<Button-4>')
+        self.tree.unbind_all('<Button-5>')
+
+    def _on_mousewheel(self, event):
+        if event.num == 4:  # Linux scroll up
+            delta = -1
+        elif event.num == 5:  # Linux scroll down
+            delta = 1
+        else:  # Windows / Mac delta
+            delta = -1 * int(event.delta / 120)
+        if delta != 0:
+            self.vlist.scroll_units(delta)
+
+    def _auto_fit_height(self):
+        if self._auto_resize_window:
+            self._frame.request('fit', self._fit_height)
+
+    def _fit_height(self):
+        # Runs as an idle task after Tk's own geometry work, so the requested
+        # height is current without forcing update_idletasks
+        with span('fit'):
+            desired = self.root.winfo_reqheight()
+            if desired == self.root.winfo_height():
+                return
+            # Only grow/shrink vertically up to a practical max (rows already capped)
+            cur_w = self.root.winfo_width() or self.root.winfo_reqwidth()
+            self.root.geometry(f"{cur_w}x{desired}")
+
+    # ------------------------------------------------------------ UI BUILD
+    def _build_ui(self):
+        outer = ctk.CTkFrame(self.root, corner_radius=12)
+        outer.pack(fill='both', expand=True, padx=14, pady=14)
+
+        # SETTINGS SECTION --------------------------------------------------
+        settings = ctk.CTkFrame(outer)
+        settings.pack(fill='x', padx=8, pady=(8,10))
+
+        # Row 0: Folder selection
+        ctk.CTkLabel(settings, text="Folder:").grid(row=0, column=0, sticky='w', padx=4, pady=6)
+        self.ent_folder = ctk.CTkEntry(settings, textvariable=self.folder_path, width=420)
+        self.ent_folder.grid(row=0, column=1, sticky='w', pady=6)
+        self.ent_folder.bind('<Return>', lambda e: self.refresh_preview())
+        ctk.CTkButton(settings, text="Browse", width=90, command=self.browse_folder).grid(row=0, column=2, padx=6, pady=6)
+
+        # Row 1: Prefix / Start / Digits / Order
+        ctk.CTkLabel(settings, text="Prefix:").grid(row=1, column=0, sticky='w', padx=4)
+        ctk.CTkEntry(settings, textvariable=self.prefix_text, width=180).grid(row=1, column=1, sticky='w', padx=(0,12))
+
+        num_frame = ctk.CTkFrame(settings, fg_color="transparent")
+        num_frame.grid(row=1, column=2, sticky='e', padx=4)
+        ctk.CTkLabel(num_frame, text="Start").pack(side='left', padx=(0,4))
+        # Hover spin entries (with hidden + / - buttons appearing on hover)
+        self.start_spin = self._make_hover_spin(num_frame, self.start_number, width=50, minimum=0)
+        ctk.CTkLabel(num_frame, text="Digits").pack(side='left', padx=(10,4))
+        self.pad_spin = self._make_hover_spin(num_frame, self.padding, width=40, minimum=1)
+        # Enable mouse-wheel increment for numeric fields (entries have no arrows by design)
+        self._bind_number_wheel(self.start_spin, self.start_number, minimum=0)
+        self._bind_number_wheel(self.pad_spin, self.padding, minimum=1)
+
+        # Row 2: Template ({prefix}, {n}, {stem}, {ext}, regex groups {g1}...)
+        ctk.CTkLabel(settings, text="Template:").grid(row=2, column=0, sticky='w', padx=4, pady=(6,0))
+        ctk.CTkEntry(settings, textvariable=self.template_text, width=420).grid(row=2, column=1, columnspan=2, sticky='w', pady=(6,0))
+
+        # Row 3: Scan filter (.mkv !*sample* size>50M ...); the folder is re-read on Enter / focus out
+        ctk.CTkLabel(settings, text="Filter:").grid(row=3, column=0, sticky='w', padx=4, pady=(6,0))
+        ent_filter = ctk.CTkEntry(settings, textvariable=self.filter_text, width=420)
+        ent_filter.grid(row=3, column=1, columnspan=2, sticky='w', pady=(6,0))
+        ent_filter.bind('<Return>', lambda e: self._on_filter_change())
+        ent_filter.bind('<FocusOut>', lambda e: self._on_filter_change())
+
+        # Row 4: Order + Appearance
+        order_frame = ctk.CTkFrame(settings, fg_color="transparent")
+        order_frame.grid(row=4, column=0, columnspan=3, sticky='w', pady=(4,2), padx=2)
+        ctk.CTkLabel(order_frame, text="Order:").pack(side='left')
+        self.rb_name = ctk.CTkRadioButton(order_frame, text="Name", variable=self.order_mode, value='name', command=self._on_order_change)
+        self.rb_natural = ctk.CTkRadioButton(order_frame, text="Natural", variable=self.order_mode, value='natural', command=self._on_order_change)
+        self.rb_number = ctk.CTkRadioButton(order_frame, text="Number", variable=self.order_mode, value='number', command=self._on_order_change)
+        self.rb_mtime = ctk.CTkRadioButton(order_frame, text="Modified", variable=self.order_mode, value='mtime', command=self._on_order_change)
+        # Season/episode, track or recording date from MP4/MKV tags and JPEG EXIF
+        self.rb_metadata = ctk.CTkRadioButton(order_frame, text="Metadata", variable=self.order_mode, value='metadata', command=self._on_order_change)
+        self.rb_name.pack(side='left', padx=4)
+        self.rb_natural.pack(side='left', padx=4)
+        self.rb_number.pack(side='left', padx=4)
+        # Regex for the Number order (group 1) and the template's {gN} fields; applied on Enter / focus out
+        ent_pattern = ctk.CTkEntry(order_frame, textvariable=self.number_pattern, width=90)
+        ent_pattern.pack(side='left', padx=(0,4))
+        ent_pattern.bind('<Return>', lambda e: self._on_pattern_change())
+        ent_pattern.bind('<FocusOut>', lambda e: self._on_pattern_change())
+        self.rb_mtime.pack(side='left', padx=4)
+        self.rb_metadata.pack(side='left', padx=4)
+
+        ctk.CTkLabel(order_frame, text="Appearance:").pack(side='left', padx=(20,4))
+        self.appearance_menu = ctk.CTkOptionMenu(order_frame,
+                                                 values=["Light", "Dark", "System"],
+                                                 variable=self.appearance_mode,
+                                                 command=self._change_appearance)
+        self.appearance_menu.pack(side='left')
+        ctk.CTkSwitch(order_frame, text="Watch folder", variable=self.watch_enabled,
+                      command=self._on_watch_toggle).pack(side='left', padx=(20,0))
+
+        # PREVIEW SECTION ---------------------------------------------------
+        preview_frame = ctk.CTkFrame(outer, corner_radius=10)
+        preview_frame.pack(fill='both', expand=True, padx=8, pady=(0,8))
+
+        ctk.CTkLabel(preview_frame, text="Preview (original → new)", anchor='w', font=ctk.CTkFont(size=13, weight='bold')).pack(fill='x', padx=10, pady=(10,4))
+
+        tree_container = ctk.CTkFrame(preview_frame, fg_color='transparent')
+        tree_container.pack(fill='both', expand=True, padx=10, pady=(0,10))
+
+        # Treeview (ttk) for two-column mapping
+        columns = ("old", "new")
+        self.tree = ttk.Treeview(tree_container, columns=columns, show='headings', height=8, selectmode='extended', style='Flat.Treeview')
+        self.tree.heading('old', text='Original Filename')
+        self.tree.heading('new', text='New Filename')
+        self.tree.column('old', width=340, anchor='w')
+        self.tree.column('new', width=340, anchor='w')
+
+        # Virtual rows: the tree holds only the visible pool, the rest is logical
+        self.vlist = VirtualList(self.tree, self._row_values, visible_rows=self._max_tree_rows,
+                                 on_scroll=self._on_tree_scroll)
+        # Hidden modern scrollbar replacement (vertical only) & mousewheel scrolling
+        self.tree.grid(row=0, column=0, sticky='nsew')
+        tree_container.rowconfigure(0, weight=1)
+        tree_container.columnconfigure(0, weight=1)
+        self._init_custom_scrollbar(tree_container)
+        self.tree.bind('<Enter>', lambda e: (setattr(self, '_scroll_hover', True), self._bind_mousewheel(), self._show_scrollbar()))
+        self.tree.bind('<Leave>', lambda e: (setattr(self, '_scroll_hover', False), self._unbind_mousewheel(), self._schedule_hide_scrollbar()))
+        self.tree.bind('<Configure>', lambda e: self._request_scrollbar())
+
+        # Reorder buttons
+        reorder_frame = ctk.CTkFrame(preview_frame, fg_color='transparent')
+        reorder_frame.pack(fill='x', padx=10, pady=(0,10))
+        ctk.CTkButton(reorder_frame, text="Move Up", width=110, command=self.move_up).pack(side='left')
+        ctk.CTkButton(reorder_frame, text="Move Down", width=110, command=self.move_down).pack(side='left', padx=8)
+        ctk.CTkButton(reorder_frame, text="Refresh Preview", command=lambda: self.refresh_preview(use_cache=False)).pack(side='left', padx=(16,0))
+        ctk.CTkButton(reorder_frame, text="Export Plan…", width=110, command=self.export_plan).pack(side='left', padx=(16,0))
+        ctk.CTkButton(reorder_frame, text="Apply Plan…", width=110, command=self.apply_plan).pack(side='left', padx=8)
+        ctk.CTkButton(reorder_frame, text="Rename", fg_color='#16a34a', hover_color='#15803d', command=self.rename_files).pack(side='right')
+
+        # Jump moves: top / bottom / explicit 1-based position
+        move_frame = ctk.CTkFrame(preview_frame, fg_color='transparent')
+        move_frame.pack(fill='x', padx=10, pady=(0,10))
+        ctk.CTkButton(move_frame, text="Move to Top", width=110, command=self.move_to_top).pack(side='left')
+        ctk.CTkButton(move_frame, text="Move to Bottom", width=110, command=self.move_to_bottom).pack(side='left', padx=8)
+        ctk.CTkButton(move_frame, text="Move to #", width=80, command=self.move_to_position).pack(side='left', padx=(16,4))
+        ent_pos = ctk.CTkEntry(move_frame, textvariable=self.move_position, width=60)
+        ent_pos.pack(side='left')
+        ent_pos.bind('<Return>', lambda e: self.move_to_position())
+        ctk.CTkButton(move_frame, text="Find Duplicates", width=120, command=self.find_duplicates).pack(side='left', padx=(16,0))
+        ctk.CTkButton(move_frame, text="Undo Last Rename", width=130, command=self.undo_last_rename).pack(side='right')
+
+        # Background scan/rename status: progress bar + cancel
+        status_frame = ctk.CTkFrame(preview_frame, fg_color='transparent')
+        status_frame.pack(fill='x', padx=10, pady=(0,10))
+        self.progress = ctk.CTkProgressBar(status_frame, width=220, height=8)
+        self.progress.set(0)
+        self.progress.pack(side='left')
+        self.status_label = ctk.CTkLabel(status_frame, text="", anchor='w')
+        self.status_label.pack(side='left', fill='x', expand=True, padx=8)
+        self.btn_cancel = ctk.CTkButton(status_frame, text="Cancel", width=80, state='disabled', command=self.cancel_task)
+        self.btn_cancel.pack(side='right')
+
+        # Perf line (F12): latest duration of each traced stage
+        self.perf_label = ctk.CTkLabel(preview_frame, text="", anchor='w', font=ctk.CTkFont(family='Courier', size=11))
+
+        # FOOTER ------------------------------------------------------------
+        footer = ctk.CTkLabel(outer, text="Tip: Multi-select rows with Shift/Ctrl, then use Move Up/Down, Top/Bottom or Move to #.", anchor='w', font=ctk.CTkFont(size=11))
+        footer.pack(fill='x', padx=12, pady=(0,4))
+
+    # ------------------------------------------------------------ APPEARANCE
+    def _change_appearance(self, mode: str):
+        with span('theme'):
+            ctk.set_appearance_mode(mode)
+            self._apply_palette()
+
+    # ------------------------------------------------------------ FILE LIST
+    def browse_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.folder_path.set(folder)
+            self.refresh_preview()
+
+    def _new_names(self):
+        # One pass of the compiled template over the whole list
+        store = self.file_list
+        return self._numbering.render(store.ordered(store.names), store.ordered(store.exts))
+
+    # ------------------------------------------------------------ PREVIEW
+    def refresh_preview(self, use_cache=True):
+        # Explicit re-list (folder change, Refresh Preview, after renaming).
+        # An unchanged folder comes back from the listing cache unless
+        # ``use_cache`` is off (Refresh Preview always reads the folder).
+        if self._task and not self._task.finished:
+            if self._task_kind == 'rename':
+                return
+            self._task.cancel()  # superseded scan
+        self._stop_watch()
+        self._save_cache()
+        folder = self.folder_path.get()
+        order_mode = self.order_mode.get()
+        pattern = self._read_pattern()
+        if folder != self._sort_keys_folder:
+            self._sort_keys, self._sort_keys_folder = core.SortKeys(folder), folder
+        keys = self._sort_keys.fork()  # the UI thread keeps sorting with its own
+        cache = self._cache if use_cache else None
+        file_filter = self._read_filter()
+        self.file_list = FileStore()
+        self._listing = None
+        self._manual_order = self._cache_dirty = False
+        self._duplicates, self._duplicates_left_out = {}, False
+        self._problem_names = {}
+        self._refresh_tree_from_file_list()
+        if not folder or not os.path.isdir(folder):
+            return
+
+        # File headers are read after the scan, as their own job (see _load_metadata)
+        sort_here = order_mode != 'metadata'
+
+        def job(task):
+            cached = cache.load(folder, file_filter) if cache is not None else None
+            if cached is not None:
+                listing, manual = cached
+                if not manual and sort_here:
+                    core.sort_records(listing.records, order_mode, pattern, keys)
+                return listing, manual, True
+            listing = scan.Listing(folder, records=FileStore(), stamp=scan.folder_stamp(folder))
+            with span('scan') as s:
+                for batch in scan.iter_batches(folder, others=listing.others, file_filter=file_filter,
+                                               skipped=listing.skipped):
+                    task.check()
+                    listing.records.extend(batch)
+                    task.partial(batch)
+                    task.progress(len(listing.records))
+                s.args['files'] = len(listing.records)
+            if sort_here:
+                core.sort_records(listing.records, order_mode, pattern, keys)
+            if self._cache is not None:
+                self._cache.save(listing, file_filter=file_filter)
+            return listing, False, False
+
+        def on_done(result):
+            if task is not self._task:
+                return
+            self._sort_keys.merge(keys)
+            listing, manual, from_cache = result
+            records = listing.records
+            by_metadata = not manual and self.order_mode.get() == 'metadata'
+            if not manual and not by_metadata and (self.order_mode.get(), self._pattern) != (order_mode, pattern):
+                self._sort_file_list(records)
+            self._listing, self._listing_filter = listing, file_filter
+            self.file_list = records
+            self._manual_order = manual
+            # All files are kept; only the visible window is ever rendered
+            self._refresh_tree_from_file_list()
+            skipped = f", {len(listing.skipped)} skipped by the filter" if listing.skipped else ""
+            self._end_busy(f"{len(records)} files{skipped}" + (" (cached)" if from_cache else ""))
+            self._start_watch()
+            if by_metadata:
+                self._on_order_change()
+
+        def on_cancel(_):
+            if task is not self._task:
+                return
+            self._sort_keys.merge(keys)
+            self._sort_file_list(self.file_list)
+            self._refresh_tree_from_file_list()
+            self._end_busy(f"Scan cancelled: {len(self.file_list)} files listed (partial)")
+
+        def on_error(e):
+            if task is not self._task:
+                return
+            self._end_busy("")
+            messagebox.showerror("Error", f"Cannot list folder: {e}")
+
+        task = self.tasks.submit(job, on_partial=self._on_scan_batch, on_progress=self._on_task_progress,
+                                 on_done=on_done, on_cancel=on_cancel, on_error=on_error)
+        self._task, self._task_kind = task, 'scan'
+        self._begin_busy("Scanning…", determinate=False)
+
+    def _save_cache(self):
+        # Write back a listing changed since it was scanned or loaded (manual
+        # order, watch events); the cache skips it if the folder moved on
+        listing = self._listing
+        if self._cache is None or listing is None or not self._cache_dirty or self._duplicates_left_out:
+            return
+        self._cache_dirty = False
+        self._cache.save(listing, manual=self._manual_order, file_filter=self._listing_filter)
+
+    def _on_close(self):
+        self._stop_watch()
+        self._save_cache()
+        self.root.destroy()
+
+    def _on_scan_batch(self, batch):
+        # Let the preview fill in while the scan is still running
+        grew_pool = len(self.file_list) < self._max_tree_rows
+        self.file_list.extend(batch)
+        self.vlist.set_count(len(self.file_list), reset=False)
+        self._update_scroll_visibility()
+        if grew_pool:
+            self._auto_fit_height()
+
+    def _on_order_change(self):
+        # Re-sort the cached records; the folder is not listed again
+        if not self.file_list:
+            self.refresh_preview()
+            return
+        if not self._sort_file_list(self.file_list):
+            self._load_metadata()
+            return
+        self._refresh_tree_from_file_list()
+
+    def _load_metadata(self):
+        # Read the headers the metadata order needs on a worker, then sort
+        if self._task and not self._task.finished:
+            return  # a scan sorts when it is done; a rename re-lists the folder
+        names = self.file_list.ordered(self.file_list.names)  # the watcher may add names meanwhile
+        keys = self._sort_keys.fork()  # order changes keep sorting with the UI thread's keys
+
+        def job(task):
+            keys.load_metadata(names, progress=task.progress, should_stop=lambda: task.cancelled)
+
+        def on_progress(done, total):
+            self.progress.set(done / total)
+            self.status_label.configure(text=f"Reading metadata… {done}/{total}")
+
+        def on_done(_):
+            if task is not self._task:
+                return
+            self._sort_keys.merge(keys)
+            self._end_busy(f"{len(self.file_list)} files")
+            if self.order_mode.get() == 'metadata':
+                self._on_order_change()
+
+        def on_cancel(_):
+            if task is not self._task:
+                return
+            self._end_busy("Metadata reading cancelled; order unchanged")
+
+        def on_error(e):
+            if task is not self._task:
+                return
+            self._end_busy("")
+            messagebox.showerror("Error", f"Cannot read file metadata: {e}")
+
+        task = self.tasks.submit(job, on_progress=on_progress,
+                                 on_done=on_done, on_cancel=on_cancel, on_error=on_error)
+        self._task, self._task_kind = task, 'metadata'
+        self._begin_busy("Reading metadata…", determinate=True)
+
+    def _on_pattern_change(self):
+        applied = self._pattern
+        if self._read_pattern() == applied:
+            return
+        if self.order_mode.get() == 'number':
+            self._on_order_change()
+        self._schedule_preview_update()
+
+    def _read_pattern(self):
+        pattern = self.number_pattern.get() or core.NUMBER_PATTERN
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            self.status_label.configure(text=f"Invalid number pattern: {e}")
+            return self._pattern  # keep the last good pattern
+        self._pattern = pattern
+        return pattern
+
+    def _on_filter_change(self):
+        applied = self._filter
+        if self._read_filter() is applied:
+            return
+        # Left-out files were never listed, so the folder is read again
+        self.refresh_preview()
+
+    def _read_filter(self):
+        try:
+            self._filter = compile_filter(self.filter_text.get().strip())
+        except FilterError as e:
+            self.status_label.configure(text=str(e))  # keep the last good filter
+        return self._filter
+
+    def _sort_file_list(self, records):
+        # Keys are cached per name: re-sorting 100k records does not re-parse them.
+        # Returns False (records untouched) while metadata keys still need reading.
+        order_mode = self.order_mode.get()
+        if order_mode == 'metadata' and self._sort_keys.missing_metadata(records.ordered(records.names)):
+            return False
+        core.sort_records(records, order_mode, self._read_pattern(), self._sort_keys)
+        self._problem_names = {}  # new numbers, new names
+        if self._manual_order:
+            self._manual_order = False
+            self._cache_dirty = True
+        return True
+
+    def _read_numbering(self):
+        try:
+            return compile_template(self.template_text.get(), self.prefix_text.get().strip(),
+                                    int(self.start_number.get()), int(self.padding.get()), self._read_pattern())
+        except TemplateError as e:
+            self.status_label.configure(text=str(e))
+            return None  # half-typed template; keep the last good numbering
+        except (tk.TclError, ValueError):
+            return None  # half-typed value; keep the last good numbering
+
+    def _schedule_preview_update(self, *_):
+        # Coalesce bursts of input changes (wheel ticks, typing) into one update per frame
+        if self._preview_job is None:
+            self._preview_job = self.root.after(16, self._apply_numbering)
+
+    def _apply_numbering(self):
+        self._preview_job = None
+        numbering = self._read_numbering()
+        if numbering is None or numbering == self._numbering:
+            return
+        self._numbering = numbering
+        self._problem_names = {}
+        # Same files, same order: only the new-name column of visible rows changes
+        with span('renumber') as s:
+            s.args['rows'] = self.vlist.refresh()
+
+    def _row_values(self, idx):
+        # Row provider for the virtual list: new names are computed for visible rows only
+        name = self.file_list.name_at(idx)
+        if idx in self._flash_indices:
+            tag = self._flash_tag
+        elif name in self._problem_names:
+            tag = 'bad'
+        elif name in self._duplicates:
+            tag = 'dup'
+        else:
+            tag = 'even' if idx % 2 == 0 else 'odd'
+        return (name, self._numbering.name_for(name, idx)), (tag,)
+
+    # ------------------------------------------------------------ REORDER
+    def move_up(self):
+        indices = self.vlist.selection()
+        if not indices or indices[0] == 0:
+            return
+        self._move_selection(indices, indices[0] - 1, focus='first')
+
+    def move_down(self):
+        indices = self.vlist.selection()
+        if not indices or indices[-1] == len(self.file_list) - 1:
+            return
+        self._move_selection(indices, indices[-1] - (len(indices) - 1) + 1, focus='last')
+
+    def move_to_top(self):
+        indices = self.vlist.selection()
+        if indices:
+            self._move_selection(indices, 0, focus='first')
+
+    def move_to_bottom(self):
+        indices = self.vlist.selection()
+        if indices:
+            self._move_selection(indices, len(self.file_list), focus='last')
+
+    def move_to_position(self):
+        indices = self.vlist.selection()
+        if not indices:
+            return
+        try:
+            position = int(self.move_position.get())
+        except (ValueError, tk.TclError):
+            return
+        # Positions are 1-based in the UI
+        self._move_selection(indices, position - 1, focus='first')
+
+    def _move_selection(self, indices, insert_at, focus='first'):
+        with span('move', files=len(indices)):
+            # Permutes the store's slot numbers; no record or name is touched
+            new_range, (lo, hi) = core.move_block(self.file_list.order, indices, insert_at)
+            self._manual_order = self._cache_dirty = True
+            if self._problem_names:
+                self._problem_names = {}
+                lo, hi = 0, len(self.file_list)  # highlighted rows may lie outside the block
+            # Only rows in [lo, hi) changed name or position; everything else stays in Tk untouched
+            self.vlist.selection_set(new_range, anchor=new_range[0], cursor=new_range[-1])
+            self.vlist.refresh(lo, hi)
+            self.vlist.see(new_range[0] if focus == 'first' else new_range[-1])
+        self._flash_rows(new_range)
+
+    def _refresh_tree_from_file_list(self, select_indices=None, focus_index=None):
+        # Preserve preview numbering after manual reordering
+        self._numbering = self._read_numbering() or self._numbering
+        # Pool size (displayed rows) follows min(len(file_list), _max_tree_rows)
+        with span('rows', files=len(self.file_list)):
+            self.vlist.set_count(len(self.file_list), reset=select_indices is None)
+        if select_indices is not None:
+            self.vlist.selection_set(select_indices)
+            if focus_index is not None and 0 <= focus_index < len(self.file_list):
+                self.vlist.see(focus_index)
+        self._update_scroll_visibility()
+        self._auto_fit_height()
+
+    def _flash_rows(self, indices):
+        colors = ['#3b82f6', '#60a5fa', '#93c5fd', '#60a5fa', '#3b82f6']
+        # A new flash replaces one still running; restore the rows it was animating
+        if self._flash_job:
+            self.root.after_cancel(self._flash_job)
+            self._flash_job = None
+            self._end_flash()
+        self._flash_indices = set(indices)
+        def step(n=0):
+            if n >= len(colors):
+                self._flash_job = None
+                self._end_flash()
+                return
+            tag_name = f'flash{n}'
+            self.tree.tag_configure(tag_name, background=colors[n], foreground='white')
+            self._flash_tag = tag_name
+            self.vlist.refresh_rows(self._flash_indices)
+            self._flash_job = self.root.after(110, lambda: step(n+1))
+        step()
+
+    def _end_flash(self):
+        # Restore only the flashed rows to their even/odd tags
+        flashed, self._flash_indices = self._flash_indices, set()
+        self._flash_tag = None
+        self.vlist.refresh_rows(flashed)
+
+    # ------------------------------------------------------------ WATCH
+    def _on_watch_toggle(self):
+        if self.watch_enabled.get():
+            self._start_watch()
+        else:
+            self._stop_watch()
+            if self._listing is not None and self._listing.stamp is None:
+                # Stopped mid-burst: the rest of the changes will never arrive
+                self.refresh_preview()
+
+    def _start_watch(self):
+        # Watching starts from a complete listing and keeps it current
+        self._stop_watch()
+        if self.watch_enabled.get() and self._listing is not None:
+            job = watch_job(self._listing, file_filter=self._listing_filter)
+            self._watch_task = self.tasks.submit(job, on_partial=self._on_watch_batch, on_error=self._on_watch_error)
+
+    def _stop_watch(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    def _on_watch_error(self, e):
+        self._watch_task = None
+        self.status_label.configure(text=f"Watching stopped: {e}")
+
+    def _on_watch_batch(self, payload):
+        events, stamp = payload
+        listing = self._listing
+        if listing is None:
+            return
+        if any(ev[0] == 'rescan' for ev in events):
+            self.refresh_preview()
+            return
+        if events:
+            with span('watch', events=len(events)):
+                self._apply_watch_events(listing, events)
+        # None until the watcher saw the folder settle; renaming waits for it
+        listing.stamp = stamp
+
+    def _listing_settled(self, listing):
+        if listing.stamp is not None:
+            return True
+        if self._watch_task is not None:
+            messagebox.showinfo("Busy", "The folder is still changing; try again in a moment.")
+        else:
+            # Watching stopped mid-burst; only a re-list makes the listing current
+            messagebox.showinfo("Info", "The folder changed after it was listed; click Refresh Preview first.")
+        return False
+
+    def _apply_watch_events(self, listing, events):
+        # Patch the cached records in place: new files go to the end, renamed
+        # ones keep their position, so a manual order survives. Files are
+        # found through the store's name index, so a batch costs what it
+        # touches, not the size of the folder.
+        records = self.file_list
+        removed = set()  # slots
+
+        def find(name):
+            slot = records.slot_of(name)
+            return None if slot in removed else slot
+
+        def drop(name):
+            slot = find(name)
+            if slot is None:
+                listing.others.discard(name)
+                listing.skipped.discard(name)
+            else:
+                removed.add(slot)
+
+        for event in events:
+            kind = event[0]
+            if kind == 'other':
+                drop(event[1])
+                listing.others.add(event[1])
+            elif kind == 'remove':
+                drop(event[1])
+            else:
+                rec = event[-1]
+                listing.others.discard(rec.name)
+                listing.skipped.discard(rec.name)
+                i = find(event[1]) if kind == 'rename' else None
+                if kind == 'rename' and i is None:
+                    listing.others.discard(event[1])
+                    listing.skipped.discard(event[1])
+                j = find(rec.name)
+                if i is None:
+                    i = j
+                elif j is not None:
+                    removed.add(j)  # renamed over another listed file
+                if i is None:
+                    records.append(rec)
+                else:
+                    records.set_slot(i, rec)
+        self._cache_dirty = True
+        if removed:
+            if self._flash_job:
+                self.root.after_cancel(self._flash_job)
+                self._flash_job = None
+                self._end_flash()
+            positions = records.remove_slots(removed)
+        pool_rows = len(self.vlist.pool)
+        if removed:
+            self.vlist.count = len(records) + len(positions)
+            self.vlist.remove_rows(positions)
+        elif len(records) != self.vlist.count:
+            self.vlist.set_count(len(records), reset=False)
+        else:
+            self.vlist.refresh()  # only visible rows whose content changed are written
+        self._update_scroll_visibility()
+        if len(self.vlist.pool) != pool_rows:
+            self._auto_fit_height()
+        if not (self._task and not self._task.finished):
+            self.status_label.configure(text=f"{len(records)} files (watching)")
+
+    # ------------------------------------------------------------ RENAME
+    def rename_files(self):
+        folder = self.folder_path.get()
+        if not folder:
+            messagebox.showerror("Error", "Select a folder.")
+            return
+        if not self.file_list:
+            messagebox.showinfo("Info", "Nothing to rename.")
+            return
+        if self._task and not self._task.finished:
+            messagebox.showinfo("Busy", "Wait for the current scan or rename to finish (or cancel it).")
+            return
+        # Flush a pending numbering update so we rename exactly what is previewed
+        if self._preview_job:
+            self.root.after_cancel(self._preview_job)
+            self._apply_numbering()
+        listing = self._listing
+        if listing is None or listing.folder != folder:
+            messagebox.showinfo("Info", "The listing is incomplete; click Refresh Preview first.")
+            return
+        if not self._listing_settled(listing):
+            return
+        # New names come from the engine, not from the Treeview cells
+        names = self.file_list.ordered(self.file_list.names)
+        self._start_rename(folder, listing, names, self._new_names())
+
+    def _start_rename(self, folder, listing, names, new_names):
+        # Our own renames must not be fed back into the list; it is re-listed afterwards
+        self._stop_watch()
+        status = {'total': 0}
+
+        def job(task):
+            # Conflicts are checked against the cached listing; occupied targets
+            # inside the batch become chains/cycles instead of errors
+            plan = core.plan_renames(names, new_names, listing.taken_names())
+            core.check_stale(listing)
+            status['total'] = len(plan)
+            stats = run_journaled(folder, plan, progress=task.progress,
+                                  should_stop=lambda: task.cancelled)
+            return plan, stats
+
+        def on_done(result):
+            plan, stats = result
+            self._end_busy(f"Renamed {plan.file_count} files ({stats.rate:.0f} files/s)")
+            messagebox.showinfo("Done", f"Renamed {plan.file_count} files.")
+            self.refresh_preview()
+
+        def on_cancel(result):
+            done = result[1].done if result else 0
+            self._end_busy(f"Rename cancelled after {done} of {status['total']} steps")
+            self.refresh_preview()
+            self._offer_recovery(folder, f"Cancelled after {done} of {status['total']} rename steps.")
+
+        def on_error(e):
+            if isinstance(e, ValidationError):
+                # Nothing was renamed: keep the preview and point at the rows to fix
+                self._show_problems(names, e.problems)
+                self._end_busy(f"{len(e.problems)} files cannot be renamed as planned; nothing was renamed")
+                self._start_watch()
+                messagebox.showerror("Cannot rename", str(e))
+                return
+            self._end_busy("")
+            self.refresh_preview()
+            if isinstance(e, ConflictError):
+                messagebox.showerror("Conflict", f"{e}\nAborting.")
+            elif self._has_pending_journal(folder):
+                self._offer_recovery(folder, str(e))
+            else:
+                messagebox.showerror("Error", str(e))
+
+        self._task = self.tasks.submit(job, on_progress=self._on_task_progress,
+                                       on_done=on_done, on_cancel=on_cancel, on_error=on_error)
+        self._task_kind = 'rename'
+        self._begin_busy("Renaming…", determinate=True)
+
+    def _show_problems(self, names, problems):
+        # Highlights both sides of a clash; rows of an applied plan file may not be listed
+        found = {}
+        for p in problems:
+            found.setdefault(names[p.index], p.message)
+            if p.other is not None:
+                found.setdefault(names[p.other], p.message)
+        self._problem_names = found
+        self.vlist.refresh()
+        first = next((i for i, name in enumerate(self.file_list.ordered(self.file_list.names)) if name in found), None)
+        if first is not None:
+            self.vlist.see(first)
+
+    # ------------------------------------------------------------ PLAN FILES
+    def _preview_listing(self, action):
+        # The complete, settled listing the preview shows, or None after telling the user why not
+        folder = self.folder_path.get()
+        if self._task and not self._task.finished:
+            messagebox.showinfo("Busy", "Wait for the current scan or rename to finish (or cancel it).")
+            return None
+        listing = self._listing
+        if not folder or listing is None or listing.folder != folder or not self.file_list:
+            messagebox.showinfo("Info", f"Nothing to {action}; pick a folder and wait for the preview.")
+            return None
+        if not self._listing_settled(listing):
+            return None
+        if self._preview_job:
+            self.root.after_cancel(self._preview_job)
+            self._apply_numbering()
+        return listing
+
+    def export_plan(self):
+        listing = self._preview_listing("export")
+        if listing is None:
+            return
+        path = filedialog.asksaveasfilename(defaultextension='.jsonl',
+                                            filetypes=[("JSON Lines", "*.jsonl"), ("CSV", "*.csv")])
+        if not path:
+            return
+        store = self.file_list
+        columns = [store.ordered(c) for c in (store.names, store.sizes, store.mtimes)]
+        new_names = self._new_names()
+
+        def job(task):
+            entries = planfile.plan_entries(columns[0], new_names, columns[1], columns[2])
+            done = 0
+
+            def stream():
+                nonlocal done
+                for entry in entries:
+                    yield entry
+                    done += 1
+                    if done % 10000 == 0:
+                        task.check()
+                        task.progress(done, len(new_names))
+            return planfile.write_plan(path, stream(), listing.folder, len(new_names))
+
+        def on_progress(done, total):
+            self.progress.set(done / total)
+            self.status_label.configure(text=f"Exporting… {done}/{total}")
+
+        def on_done(count):
+            self._end_busy(f"Exported {count} entries to {os.path.basename(path)}")
+
+        def on_cancel(_):
+            self._end_busy("Export cancelled")
+
+        def on_error(e):
+            self._end_busy("")
+            messagebox.showerror("Error", f"Cannot write the plan: {e}")
+
+        self._task = self.tasks.submit(job, on_progress=on_progress,
+                                       on_done=on_done, on_cancel=on_cancel, on_error=on_error)
+        self._task_kind = 'export'
+        self._begin_busy("Exporting…", determinate=True)
+
+    def apply_plan(self):
+        if self._task and not self._task.finished:
+            messagebox.showinfo("Busy", "Wait for the current scan or rename to finish (or cancel it).")
+            return
+        path = filedialog.askopenfilename(filetypes=[("Rename plans", "*.jsonl *.csv"), ("All files", "*")])
+        if not path:
+            return
+        try:
+            planned_for = planfile.read_plan_header(path).get('folder')
+        except (OSError, RenameError) as e:
+            messagebox.showerror("Error", str(e))
+            return
+        folder = self.folder_path.get() or planned_for
+        if not folder or not os.path.isdir(folder):
+            messagebox.showerror("Error", "Select the folder the plan is for.")
+            return
+        if planned_for and os.path.abspath(folder) != planned_for and not messagebox.askyesno(
+                "Other folder", f"The plan was made for\n{planned_for}\n\nApply it to\n{folder}?"):
+            return
+        self._stop_watch()
+
+        def job(task):
+            # Every entry is checked against a fresh scan before anything is renamed
+            return planfile.load_plan(path, folder)
+
+        def on_done(result):
+            listing, names, new_names = result
+            self._end_busy("")
+            changed = sum(1 for old, new in zip(names, new_names) if old != new)
+            if messagebox.askyesno("Apply plan", f"Rename {changed} of {len(names)} files in\n{folder}?"):
+                self.folder_path.set(folder)
+                self._start_rename(folder, listing, names, new_names)
+            else:
+                self._start_watch()
+
+        def on_error(e):
+            self._end_busy("")
+            messagebox.showerror("Plan does not match" if isinstance(e, RenameError) else "Error", str(e))
+            self._start_watch()
+
+        self._task = self.tasks.submit(job, on_done=on_done, on_error=on_error)
+        self._task_kind = 'scan'
+        self._begin_busy("Checking plan…", determinate=False)
+
+    # ------------------------------------------------------------ DUPLICATES
+    def find_duplicates(self):
+        listing = self._preview_listing("check")
+        if listing is None:
+            return
+        records = list(self.file_list)  # numbering order: the first copy is the one kept
+
+        def job(task):
+            return dupes.find_duplicates(listing.folder, records, progress=task.progress,
+                                         should_stop=lambda: task.cancelled)
+
+        def on_progress(done, total):
+            self.progress.set(done / total)
+            self.status_label.configure(text=f"Checking for duplicates… {done}/{total}")
+
+        def on_done(groups):
+            if task is not self._task:
+                return
+            self._duplicates = dupes.duplicate_extras(groups or [])
+            self.vlist.refresh()
+            count = len(self._duplicates)
+            if not count:
+                self._end_busy("No duplicates")
+                return
+            self._end_busy(f"{count} duplicates highlighted")
+            shown = '\n'.join(f"{name}  =  {kept}" for name, kept in list(self._duplicates.items())[:5])
+            more = f"\n... and {count - 5} more" if count > 5 else ""
+            if messagebox.askyesno("Duplicates", f"{count} files have the same content as a file before them:\n"
+                                                 f"{shown}{more}\n\nLeave them out of the numbering? "
+                                                 "They keep their names."):
+                self._leave_out_duplicates()
+
+        def on_cancel(_):
+            if task is not self._task:
+                return
+            self._end_busy("Duplicate check cancelled")
+
+        def on_error(e):
+            if task is not self._task:
+                return
+            self._end_busy("")
+            messagebox.showerror("Error", f"Cannot check for duplicates: {e}")
+
+        task = self.tasks.submit(job, on_progress=on_progress,
+                                 on_done=on_done, on_cancel=on_cancel, on_error=on_error)
+        self._task, self._task_kind = task, 'dupes'
+        self._begin_busy("Checking for duplicates…", determinate=True)
+
+    def _leave_out_duplicates(self):
+        # The copies move to listing.skipped: not numbered, but still taken names
+        listing = self._listing
+        if listing is None or listing.records is not self.file_list:
+            return
+        count = dupes.drop_duplicates(listing, self._duplicates)
+        self._duplicates = {}
+        self._duplicates_left_out = True
+        self._refresh_tree_from_file_list()
+        self.status_label.configure(text=f"{len(self.file_list)} files, {count} duplicates left out")
+
+    # ------------------------------------------------------------ JOURNAL RECOVERY
+    def _has_pending_journal(self, folder):
+        state = journal.read_journal(folder)
+        return state is not None and state.planned and not state.committed
+
+    def _offer_recovery(self, folder, message):
+        choice = messagebox.askyesnocancel(
+            "Unfinished rename",
+            f"{message}\n\nYes: finish the batch\nNo: roll it back\nCancel: leave the folder as it is")
+        if choice is True:
+            self._run_recovery(folder, journal.resume, "Resuming…", "Resumed")
+        elif choice is False:
+            self._run_recovery(folder, journal.rollback, "Rolling back…", "Rolled back")
+
+    def undo_last_rename(self):
+        folder = self.folder_path.get()
+        state = journal.read_journal(folder) if folder else None
+        if state is None or state.undo and state.committed:
+            messagebox.showinfo("Info", "No rename to undo in this folder.")
+            return
+        if self._task and not self._task.finished:
+            messagebox.showinfo("Busy", "Wait for the current scan or rename to finish (or cancel it).")
+            return
+        if messagebox.askyesno("Undo", "Restore the names from before the last rename batch?"):
+            self._run_recovery(folder, journal.rollback, "Rolling back…", "Rolled back")
+
+    def _run_recovery(self, folder, action, busy_text, verb):
+        self._stop_watch()
+
+        def job(task):
+            return action(folder, progress=task.progress)
+
+        def on_done(result):
+            _, steps = result
+            self._end_busy(f"{verb} {steps} renames")
+            messagebox.showinfo("Done", f"{verb} {steps} renames.")
+            self.refresh_preview()
+
+        def on_error(e):
+            self._end_busy("")
+            messagebox.showerror("Error", str(e))
+            self.refresh_preview()
+
+        self._task = self.tasks.submit(job, on_progress=self._on_task_progress,
+                                       on_done=on_done, on_error=on_error)
+        self._task_kind = 'rename'
+        self._begin_busy(busy_text, determinate=True)
+
+    # ------------------------------------------------------------ PERF LINE
+    def toggle_perf(self):
+        if self._perf_job is not None:
+            self.root.after_cancel(self._perf_job)
+            self._perf_job = None
+            self.perf_label.pack_forget()
+        else:
+            self.perf_label.pack(fill='x', padx=10, pady=(0,6))
+            self._update_perf()
+        self._auto_fit_height()
+
+    def _update_perf(self):
+        # Cheap poll of tracer.latest while the line is visible
+        self.perf_label.configure(text=tracer.summary(PERF_STAGES) or "no timings yet")
+        self._perf_job = self.root.after(500, self._update_perf)
+
+    # ------------------------------------------------------------ BACKGROUND TASKS
+    def _begin_busy(self, text, determinate):
+        self.status_label.configure(text=text)
+        self.btn_cancel.configure(state='normal')
+        self.progress.stop()
+        if determinate:
+            self.progress.configure(mode='determinate')
+            self.progress.set(0)
+        else:
+            self.progress.configure(mode='indeterminate')
+            self.progress.start()
+
+    def _end_busy(self, text):
+        self.progress.stop()
+        self.progress.configure(mode='determinate')
+        self.progress.set(0)
+        self.btn_cancel.configure(state='disabled')
+        self.status_label.configure(text=text)
+
+    def _on_task_progress(self, done, total):
+        if total:
+            self.progress.set(done / total)
+            self.status_label.configure(text=f"Renaming… {done}/{total}")
+        else:
+            self.status_label.configure(text=f"Scanning… {done} files")
+
+    def cancel_task(self):
+        if self._task and not self._task.finished:
+            self._task.cancel()
+
+    def _bind_number_wheel(self, entry, var: tk.IntVar, minimum=0, maximum=None):
+        def on_wheel(event):
+            # Determine scroll direction
+            if event.num == 4 or getattr(event, 'delta', 0) > 0:  # up
+                delta = 1
+            elif event.num == 5 or getattr(event, 'delta', 0) < 0:  # down
+                delta = -1
+            else:
+                delta = 0
+            try:
+                value = int(var.get())
+            except Exception:
+                value = minimum if minimum is not None else 0
+            value += delta
+            if minimum is not None and value < minimum:
+                value = minimum
+            if maximum is not None and value > maximum:
+                value = maximum
+            var.set(value)
+            # Auto refresh the new names when changing numbering inputs (no re-listing)
+            self._schedule_preview_update()
+            return 'break'
+        # Bind platform-specific events to the entry (not globally)
+        entry.bind('<MouseWheel>', on_wheel, add='+')      # Windows / macOS
+        entry.bind('<Button-4>', on_wheel, add='+')        # Linux scroll up
+        entry.bind('<Button-5>', on_wheel, add='+')        # Linux scroll down
+
+    def _make_hover_spin(self, parent, var: tk.IntVar, width=60, minimum=0, maximum=None):
+        # Create a borderless frame to mimic a single input box
+        container = ctk.CTkFrame(parent, fg_color='transparent', corner_radius=0)
+        container.pack(side='left', padx=0, pady=0)
+        # Use grid for tight alignment
+        entry = ctk.CTkEntry(container, textvariable=var, width=width, height=28, border_width=0)
+        entry.grid(row=0, column=0, sticky='nsew', padx=(0,0), pady=0)
+        # Arrow button frame (vertical)
+        btn_frame = ctk.CTkFrame(container, width=16, height=28, fg_color='transparent', corner_radius=0)
+        btn_frame.grid(row=0, column=1, sticky='ns', padx=(0,0), pady=0)
+        btn_frame.grid_propagate(False)
+        # Fixed 8pt font for arrows
+        font_small = ctk.CTkFont(size=8, weight='bold')
+        # Arrow buttons (fixed size, do not resize on hover)
+        arrow_up = ctk.CTkButton(btn_frame, text='▲', width=16, height=12, corner_radius=0,
+                                 fg_color='transparent', hover_color=self.accent_color,
+                                 font=font_small, command=lambda: self._adjust_spin_value(var, 1, minimum, maximum), border_width=0)
+        arrow_down = ctk.CTkButton(btn_frame, text='▼', width=16, height=12, corner_radius=0,
+                                   fg_color='transparent', hover_color=self.accent_color,
+                                   font=font_small, command=lambda: self._adjust_spin_value(var, -1, minimum, maximum), border_width=0)
+        arrow_up.pack(fill='x', padx=0, pady=(1,0))
+        arrow_down.pack(fill='x', padx=0, pady=(0,1))
+        # Hide arrows until hover
+        arrow_up.pack_forget()
+        arrow_down.pack_forget()
+        state = {'visible': False, 'hide_job': None}
+        def show(_=None):
+            if state['hide_job']:
+                self.root.after_cancel(state['hide_job'])
+                state['hide_job'] = None
+            if not state['visible']:
+                arrow_up.pack(fill='x', padx=0, pady=(1,0))
+                arrow_down.pack(fill='x', padx=0, pady=(0,1))
+                state['visible'] = True
+        def schedule_hide():
+            if state['hide_job']:
+                self.root.after_cancel(state['hide_job'])
+            def do_hide():
+                arrow_up.pack_forget()
+                arrow_down.pack_forget()
+                state['visible'] = False
+            state['hide_job'] = self.root.after(350, do_hide)
+        def on_leave(_=None):
+            schedule_hide()
+        for w in (container, entry, btn_frame, arrow_up, arrow_down):
+            w.bind('<Enter>', show)
+            w.bind('<Leave>', on_leave)
+        # Make entry expand to fill container
+        container.grid_rowconfigure(0, weight=1)
+        container.grid_columnconfigure(0, weight=1)
+        return entry
+
+    def _adjust_spin_value(self, var: tk.IntVar, delta: int, minimum=None, maximum=None):
+        try:
+            value = int(var.get())
+        except Exception:
+            value = minimum if minimum is not None else 0
+        value += delta
+        if minimum is not None and value < minimum:
+            value = minimum
+        if maximum is not None and value > maximum:
+            value = maximum
+        var.set(value)
+        self._schedule_preview_update()
+
+# ------------------------------------------------------------ ENTRY POINT
+
+def main(folder=None, show_perf=False, use_cache=True):
+    root = ctk.CTk()
+    app = FolderRenamerGUI(root, show_perf=show_perf, use_cache=use_cache)
+    if folder:
+        app.folder_path.set(folder)
+        app.refresh_preview()
+    root.mainloop()
@@ -0,0 +1,348 @@
+"""
+Write-ahead rename journal, kept next to the files as ``.folder_renamer.journal``.
+
+Layout (JSON lines)::
+
+    {"journal": 1, "chains": C, "steps": S}     "undo": true when the batch is a rollback
+    {"c": 0, "steps": [[src, dst], ...]}        one line per plan chain
+    {"d": [chain, done]}                        progress carried over by ``resume``
+    {"planned": true}                           fsync'd before the first rename
+    {"d": [chain, done]}                        progress markers, group-committed
+    {"commit": true}                            batch finished
+
+Progress markers are buffered and fsync'd in groups (every ``group_size``
+markers or ``interval`` seconds), so durability costs a handful of fsyncs per
+batch instead of one per file. After a crash the steps past the last durable
+marker are recovered from the folder itself: inside a chain exactly one name
+is free at any time (the "hole") and it moves one step per rename, so a few
+lstat calls tell how far each unfinished chain got. The only ambiguous case,
+a cycle whose hole is back on its temporary name, is settled by forcing the
+marker of every park-to-temp step to disk immediately (one fsync per cycle).
+
+A committed journal is kept so the last batch can be undone; a new batch
+refuses to start while an uncommitted one exists. ``resume`` rewrites the
+journal with the same chains and their progress so far, so the journal always
+describes the whole batch and a later rollback undoes all of it. A rollback
+is journaled as an undo batch; rolling back again only finishes an
+interrupted undo, it never re-applies the batch.
+"""
+import json
+import os
+import threading
+import time
+
+from .errors import RenameError
+from .executor import DEFAULT_WORKERS, execute_plan
+from .planner import TEMP_PREFIX, RenamePlan
+from .preflight import name_key
+from .scan import RESERVED_PREFIX
+from .trace import span
+
+JOURNAL_NAME = RESERVED_PREFIX + '.journal'
+VERSION = 1
+
+
+def journal_path(folder):
+    return os.path.join(folder, JOURNAL_NAME)
+
+
+class JournalState:
+    """A journal read back from disk."""
+
+    def __init__(self, chains, done, planned, committed, undo=False):
+        self.chains = chains
+        self.done = done  # durable per-chain progress (steps completed)
+        self.planned = planned
+        self.committed = committed
+        self.undo = undo  # the batch is the rollback of an earlier one
+
+    @property
+    def total(self):
+        return sum(len(c) for c in self.chains)
+
+
+class Journal:
+    """Journal writer; ``mark`` is safe to call from executor worker threads."""
+
+    def __init__(self, folder, group_size=256, interval=0.05):
+        self.folder = folder
+        self.group_size = group_size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = []
+        self._last_sync = time.monotonic()
+        self._fh = None
+
+    def open(self, plan, done=None, undo=False):
+        """Write the full plan durably (atomic replace of any previous journal).
+
+        ``done`` is the progress per chain of a batch being resumed.
+        """
+        path = journal_path(self.folder)
+        tmp = path + '.new'
+        with open(tmp, 'w', encoding='utf-8') as fh:
+            header = {'journal': VERSION, 'chains': len(plan.chains), 'steps': len(plan)}
+            if undo:
+                header['undo'] = True
+            _write(fh, header)
+            for ci, chain in enumerate(plan.chains):
+                _write(fh, {'c': ci, 'steps': chain})
+            for ci, k in enumerate(done or ()):
+                if k:
+                    _write(fh, {'d': [ci, k]})
+            _write(fh, {'planned': True})
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+        _fsync_dir(self.folder)
+        self._fh = open(path, 'a', encoding='utf-8')
+        return self
+
+    def mark(self, ci, done, src, dst):
+        with self._lock:
+            self._pending.append(json.dumps({'d': [ci, done]}))
+            force = dst.startswith(TEMP_PREFIX)  # see module docstring
+            if force or len(self._pending) >= self.group_size or \
+                    time.monotonic() - self._last_sync >= self.interval:
+                self._sync()
+
+    def _sync(self):
+        if self._pending:
+            self._fh.write('\n'.join(self._pending) + '\n')
+            self._pending.clear()
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+        self._last_sync = time.monotonic()
+
+    def commit(self):
+        with self._lock:
+            self._pending.append(json.dumps({'commit': True}))
+            self._sync()
+
+    def close(self):
+        if self._fh is not None:
+            with self._lock:
+                self._sync()
+            self._fh.close()
+            self._fh = None
+
+
+def _write(fh, obj):
+    fh.write(json.dumps(obj, separators=(',', ':')) + '\n')
+
+
+def _fsync_dir(folder):
+    # Make the journal's directory entry durable (POSIX only)
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(folder, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ------------------------------------------------------------ READ / RECOVER
+def read_journal(folder):
+    """Parse the folder's journal; None when there is none."""
+    try:
+        fh = open(journal_path(folder), encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    chains, done, planned, committed, undo = [], [], False, False, False
+    with fh:
+        for line in fh:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                break  # torn tail write
+            if 'journal' in rec:
+                undo = rec.get('undo', False)
+            elif 'c' in rec:
+                chains.append([tuple(s) for s in rec['steps']])
+                done.append(0)
+            elif 'd' in rec:
+                ci, n = rec['d']
+                done[ci] = max(done[ci], n)
+            elif rec.get('planned'):
+                planned = True
+            elif rec.get('commit'):
+                committed = True
+    return JournalState(chains, done, planned, committed, undo)
+
+
+def _holes(chain):
+    # Name that is free after k steps: the target of step k + 1, then the last
+    # source. (Step k + 1 moves into the name step k freed, spelled as the
+    # target: with case-insensitive planning the spellings can differ.)
+    return [dst for _, dst in chain] + [chain[-1][0]]
+
+
+def recover_progress(folder, state):
+    """Actual steps completed per chain (durable markers + folder inspection).
+
+    A step cut short between the link and the unlink of the executor's
+    fallback rename (both names are the same file) is finished here.
+    """
+    if state.committed:
+        return [len(c) for c in state.chains]
+    progress = []
+    for chain, durable in zip(state.chains, state.done):
+        if durable >= len(chain):
+            progress.append(durable)
+            continue
+        holes = _holes(chain)
+        for k in range(durable, len(chain) + 1):
+            if not os.path.lexists(os.path.join(folder, holes[k])):
+                progress.append(k)
+                break
+            if k < len(chain) and _finish_link(folder, *chain[k]):
+                progress.append(k + 1)
+                break
+        else:
+            raise RenameError(f"Cannot recover: folder no longer matches the journal (near {chain[durable][0]})")
+    return progress
+
+
+def _finish_link(folder, src, dst):
+    # True when ``src`` and ``dst`` are two links to one file (a crash between
+    # link and unlink) and the old name was dropped
+    if name_key(src) == name_key(dst):
+        return False  # one entry, spelled two ways on a case-insensitive folder
+    src_path = os.path.join(folder, src)
+    try:
+        if not os.path.samestat(os.lstat(src_path), os.lstat(os.path.join(folder, dst))):
+            return False
+    except OSError:
+        return False
+    os.unlink(src_path)
+    return True
+
+
+def remaining_plan(state, progress):
+    """(RenamePlan of the steps still to run, (journal chain, steps done) of each of its chains)."""
+    origin = [(ci, k) for ci, (chain, k) in enumerate(zip(state.chains, progress)) if k < len(chain)]
+    chains = [state.chains[ci][k:] for ci, k in origin]
+    return RenamePlan(chains, _count_temps(chains)), origin
+
+
+def rollback_plan(state, progress):
+    chains = [[(dst, src) for src, dst in reversed(chain[:k])]
+              for chain, k in zip(state.chains, progress) if k]
+    return RenamePlan(chains, _count_temps(chains))
+
+
+def check_recovery(folder, plan):
+    """Raise RenameError unless every step of ``plan`` can run without replacing a file.
+
+    The journal only knows the names of the batch; the folder may have
+    changed since (a new file under an old name, a renamed file gone). Steps
+    are played on the folder's current entries: a source must be there and a
+    target must be free, unless an earlier step of the plan moved it.
+    """
+    present = {}  # name -> exists, after the steps simulated so far
+    moved = set()  # name_key of names moved away (a case-insensitive folder still finds them)
+
+    def exists(name):
+        if name not in present:
+            present[name] = name_key(name) not in moved and os.path.lexists(os.path.join(folder, name))
+        return present[name]
+
+    for chain in plan.chains:
+        for src, dst in chain:
+            if not exists(src):
+                raise RenameError(f"Cannot recover: {src} is missing from the folder")
+            if exists(dst):
+                raise RenameError(f"Cannot recover: {dst} exists and would be replaced by {src}; "
+                                  f"move it away first")
+            present[src], present[dst] = False, True
+            moved.add(name_key(src))
+            moved.discard(name_key(dst))
+
+
+def _count_temps(chains):
+    return sum(1 for chain in chains for _, dst in chain if dst.startswith(TEMP_PREFIX))
+
+
+# ------------------------------------------------------------ RUN
+def has_pending(folder):
+    """True when the folder's journal holds a batch that was planned but never committed."""
+    state = read_journal(folder)
+    return state is not None and state.planned and not state.committed
+
+
+def check_no_pending(folder):
+    if has_pending(folder):
+        raise RenameError("An earlier rename batch did not finish; resume or roll it back first.")
+
+
+def run_journaled(folder, plan, workers=DEFAULT_WORKERS, progress=None, should_stop=None):
+    """Execute ``plan`` under a fresh journal; returns RenameStats.
+
+    The journal is committed only when every step ran; after a failure or a
+    cancel it stays uncommitted for ``resume``/``rollback``.
+    """
+    check_no_pending(folder)
+    journal = Journal(folder).open(plan)
+    try:
+        with span('rename', steps=len(plan), workers=workers):
+            stats = execute_plan(folder, plan, workers, progress, should_stop, on_step=journal.mark)
+        if not stats.stopped:
+            journal.commit()
+        return stats
+    finally:
+        journal.close()
+
+
+def _read_planned(folder):
+    state = read_journal(folder)
+    if state is None or not state.planned:
+        raise RenameError("No rename journal in this folder.")
+    return state
+
+
+def resume(folder, workers=DEFAULT_WORKERS, progress=None):
+    """Finish an interrupted batch; returns (RenameStats, steps that were left)."""
+    state = _read_planned(folder)
+    if state.committed:
+        raise RenameError("The last rename batch already finished; nothing to resume.")
+    return _finish(folder, state, workers, progress)
+
+
+def rollback(folder, workers=DEFAULT_WORKERS, progress=None):
+    """Restore the names from before the journaled batch (finished or not); returns (RenameStats, steps)."""
+    state = _read_planned(folder)
+    if state.undo:
+        if state.committed:
+            raise RenameError("The last rename batch was already rolled back.")
+        return _finish(folder, state, workers, progress)  # an interrupted rollback
+    plan = rollback_plan(state, recover_progress(folder, state))
+    check_recovery(folder, plan)
+    # The rollback is a batch of its own, journaled as an undo
+    journal = Journal(folder).open(plan, undo=True)
+    try:
+        stats = execute_plan(folder, plan, workers, progress, on_step=journal.mark)
+        journal.commit()
+        return stats, len(plan)
+    finally:
+        journal.close()
+
+
+def _finish(folder, state, workers, progress):
+    # Runs the rest of the journaled batch; the journal keeps every chain, so
+    # its progress is still marked against the original batch
+    done = recover_progress(folder, state)
+    plan, origin = remaining_plan(state, done)
+    check_recovery(folder, plan)
+    journal = Journal(folder).open(RenamePlan(state.chains), done, state.undo)
+
+    def mark(ci, k, src, dst):
+        base_ci, base_k = origin[ci]
+        journal.mark(base_ci, base_k + k, src, dst)
+
+    try:
+        stats = execute_plan(folder, plan, workers, progress, on_step=mark)
+        journal.commit()
+        return stats, len(plan)
+    finally:
+        journal.close()
@@ -0,0 +1,439 @@
+"""
+Episode/track numbers and dates embedded in media files, for the 'metadata' order.
+
+Supported containers, picked by extension:
+
+    .mp4 .m4v .mov .m4a .3gp   iTunes-style tags in moov/udta/meta/ilst (tvsn
+                               season, tves episode, trkn track, (c)day date),
+                               else the mvhd creation time
+    .mkv .mka .mk3d .webm      Matroska Tags (PART_NUMBER per target level,
+                               DATE_RECORDED / DATE_RELEASED), else Info/DateUTC
+    .jpg .jpeg                 EXIF DateTimeOriginal, else DateTime
+
+Only headers are read, with small bounded reads: MP4 boxes are skipped by
+their sizes (a moov after gigabytes of mdat costs a few 16-byte reads),
+Matroska elements are found through the SeekHead, and a JPEG's EXIF block
+lives in its first segments. Nothing is mmap'ed, so a file truncated on a
+network share fails one read instead of faulting. A folder is parsed on a
+small thread pool and each result is cached per file identity (device,
+inode, size, mtime), so a renamed or re-listed file is not parsed again.
+Files that cannot be parsed simply have no metadata.
+"""
+import calendar
+import os
+import re
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+from .template import split_ext
+from .trace import span
+
+META_WORKERS = 8
+MAX_CACHED = 100_000  # MediaMeta entries kept across folders
+HEAD_BYTES = 64 * 1024  # first read of a Matroska or JPEG file
+MAX_ELEMENT = 16 << 20  # largest moov / Matroska Info or Tags read into memory
+_MAX_TOP_BOXES = 256
+
+MP4_EXTS = frozenset({'.mp4', '.m4v', '.mov', '.m4a', '.3gp', '.3g2'})
+MKV_EXTS = frozenset({'.mkv', '.mka', '.mk3d', '.webm'})
+EXIF_EXTS = frozenset({'.jpg', '.jpeg'})
+MEDIA_EXTS = MP4_EXTS | MKV_EXTS | EXIF_EXTS
+
+_MP4_EPOCH = -2082844800  # 1904-01-01 in Unix time
+_MKV_EPOCH = 978307200  # 2001-01-01 in Unix time
+_DATE = re.compile(r'(\d{4})(?:[-:](\d\d)(?:[-:](\d\d)(?:[T ](\d\d):(\d\d)(?::(\d\d))?)?)?)?')
+_PARSE_ERRORS = (OSError, ValueError, IndexError, struct.error)
+
+
+class MediaMeta(NamedTuple):
+    season: Optional[int] = None
+    number: Optional[int] = None  # episode, else track
+    date: Optional[float] = None  # Unix time (recording/release, else creation)
+
+
+NO_META = MediaMeta()
+
+
+def _parse_date(text):
+    m = _DATE.match(text.strip())
+    if m is None:
+        return None
+    y, mo, d, h, mi, s = (int(g) if g else 0 for g in m.groups())
+    if not (1 <= (mo or 1) <= 12 and 1 <= (d or 1) <= 31 and y > 0):
+        return None  # e.g. EXIF's "0000:00:00 00:00:00"
+    return float(calendar.timegm((y, mo or 1, d or 1, h, mi, s, 0, 0, 0)))
+
+
+# ------------------------------------------------------------ MP4
+def _boxes(data, pos, end):
+    # (type, payload start, payload end) of the boxes in data[pos:end]
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from('>I4s', data, pos)
+        head = 8
+        if size == 1:
+            size, head = struct.unpack_from('>Q', data, pos + 8)[0], 16
+        elif size == 0:
+            size = end - pos
+        if size < head or pos + size > end:
+            return
+        yield kind, pos + head, pos + size
+        pos += size
+
+
+def _find_top_box(fh, file_size, want):
+    # Walk the top-level boxes by their headers only; returns (payload offset, length)
+    pos = 0
+    for _ in range(_MAX_TOP_BOXES):
+        fh.seek(pos)
+        head = fh.read(16)
+        if len(head) < 8:
+            return None
+        size, kind = struct.unpack_from('>I4s', head)
+        head_len = 8
+        if size == 1 and len(head) == 16:
+            size, head_len = struct.unpack_from('>Q', head, 8)[0], 16
+        elif size == 0:
+            size = file_size - pos
+        if size < head_len:
+            return None
+        if kind == want:
+            return pos + head_len, size - head_len
+        pos += size
+    return None
+
+
+def _ilst_value(data, pos, end):
+    for kind, start, stop in _boxes(data, pos, end):
+        if kind == b'data' and stop - start >= 8:
+            return data[start + 8:stop]  # after type and locale
+    return None
+
+
+def _read_mp4(fh, file_size):
+    found = _find_top_box(fh, file_size, b'moov')
+    if found is None or found[1] > MAX_ELEMENT:
+        return NO_META
+    start, length = found
+    fh.seek(start)
+    moov = fh.read(length)
+    season = number = track = date = created = None
+    for kind, pos, end in _boxes(moov, 0, len(moov)):
+        if kind == b'mvhd':
+            if moov[pos] == 1:
+                stamp = struct.unpack_from('>Q', moov, pos + 4)[0]
+            else:
+                stamp = struct.unpack_from('>I', moov, pos + 4)[0]
+            created = float(stamp + _MP4_EPOCH) if stamp else None
+        elif kind == b'udta':
+            for meta_kind, mpos, mend in _boxes(moov, pos, end):
+                if meta_kind != b'meta':
+                    continue
+                if moov[mpos + 4:mpos + 8] != b'hdlr':
+                    mpos += 4  # ISO full box: version and flags come first
+                for list_kind, lpos, lend in _boxes(moov, mpos, mend):
+                    if list_kind != b'ilst':
+                        continue
+                    for item, ipos, iend in _boxes(moov, lpos, lend):
+                        value = _ilst_value(moov, ipos, iend)
+                        if not value:
+                            continue
+                        if item == b'tves':
+                            number = int.from_bytes(value, 'big')
+                        elif item == b'tvsn':
+                            season = int.from_bytes(value, 'big')
+                        elif item == b'trkn' and len(value) >= 4:
+                            track = int.from_bytes(value[2:4], 'big')
+                        elif item == b'\xa9day':
+                            date = _parse_date(value.decode('utf-8', 'replace'))
+    if number is None:
+        number = track or None
+    return MediaMeta(season, number, date if date is not None else created)
+
+
+# ------------------------------------------------------------ MATROSKA
+_EBML = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_SEEK_HEAD, _SEEK, _SEEK_ID, _SEEK_POS = 0x114D9B74, 0x4DBB, 0x53AB, 0x53AC
+_INFO, _DATE_UTC = 0x1549A966, 0x4461
+_TAGS, _TAG, _TARGETS, _TARGET_TYPE = 0x1254C367, 0x7373, 0x63C0, 0x68CA
+_SIMPLE_TAG, _TAG_NAME, _TAG_STRING = 0x67C8, 0x45A3, 0x4487
+_CLUSTER = 0x1F43B675
+
+
+def _vint(data, pos, is_id):
+    first = data[pos]
+    if not first:
+        raise ValueError("bad EBML length")
+    length = 9 - first.bit_length()
+    if pos + length > len(data):
+        raise ValueError("truncated EBML header")
+    value = int.from_bytes(data[pos:pos + length], 'big')
+    if not is_id:
+        mask = (1 << (7 * length)) - 1
+        value &= mask
+        if value == mask:
+            value = None  # unknown size
+    return value, pos + length
+
+
+def _elements(data, pos, end):
+    # (id, payload start, payload stop); an unknown size runs to ``end``. A
+    # ``stop`` beyond ``end`` (element cut off by the buffer) ends the walk.
+    while pos < end:
+        ident, pos = _vint(data, pos, True)
+        size, pos = _vint(data, pos, False)
+        stop = end if size is None else pos + size
+        yield ident, pos, stop
+        if size is None or stop > end:
+            return
+        pos = stop
+
+
+def _payload(fh, head, start, stop):
+    # Bytes [start, stop) of the file, from ``head`` when they are all in it
+    if stop - start > MAX_ELEMENT:
+        return None
+    if stop <= len(head):
+        return head[start:stop]
+    fh.seek(start)
+    return fh.read(stop - start)
+
+
+def _read_element(fh, head, offset):
+    # Payload of the element whose id starts at absolute ``offset``
+    if offset + 12 <= len(head):
+        buf, base = head, 0
+    else:
+        fh.seek(offset)
+        buf, base = fh.read(12), offset
+    _, pos = _vint(buf, offset - base, True)
+    size, pos = _vint(buf, pos, False)
+    start = base + pos
+    if size is None:
+        return None
+    return _payload(fh, head, start, start + size)
+
+
+def _read_mkv(fh, file_size):
+    head = fh.read(HEAD_BYTES)
+    ident, pos = _vint(head, 0, True)
+    if ident != _EBML:
+        return NO_META
+    size, pos = _vint(head, pos, False)
+    ident, pos = _vint(head, pos + size, True)
+    if ident != _SEGMENT:
+        return NO_META
+    _, segment = _vint(head, pos, False)
+    payloads, offsets = {}, {}
+    try:
+        for ident, start, stop in _elements(head, segment, len(head)):
+            if ident in (_INFO, _TAGS):
+                payloads.setdefault(ident, _payload(fh, head, start, stop))
+            elif ident == _SEEK_HEAD and stop <= len(head):
+                for seek, spos, send in _elements(head, start, stop):
+                    if seek != _SEEK:
+                        continue
+                    target = where = None
+                    for field, fpos, fend in _elements(head, spos, send):
+                        if field == _SEEK_ID:
+                            target = int.from_bytes(head[fpos:fend], 'big')
+                        elif field == _SEEK_POS:
+                            where = int.from_bytes(head[fpos:fend], 'big')
+                    if target in (_INFO, _TAGS) and where is not None:
+                        offsets.setdefault(target, segment + where)
+            elif ident == _CLUSTER:
+                break
+    except ValueError:
+        pass  # the head ended inside an element header
+    for ident, offset in offsets.items():
+        if payloads.get(ident) is None and offset < file_size:
+            payloads[ident] = _read_element(fh, head, offset)
+    created = None
+    info = payloads.get(_INFO)
+    if info:
+        for field, fpos, fend in _elements(info, 0, len(info)):
+            if field == _DATE_UTC and fend == fpos + 8:
+                created = _MKV_EPOCH + struct.unpack_from('>q', info, fpos)[0] / 1e9
+    season, number, date = _mkv_tags(payloads.get(_TAGS))
+    return MediaMeta(season, number, date if date is not None else created)
+
+
+def _mkv_tags(tags):
+    season = date = None
+    number, level = None, -1
+    if not tags:
+        return season, number, date
+    for tag, tpos, tend in _elements(tags, 0, len(tags)):
+        if tag != _TAG:
+            continue
+        target = 50
+        simple = []
+        for field, fpos, fend in _elements(tags, tpos, tend):
+            if field == _TARGETS:
+                for t, vpos, vend in _elements(tags, fpos, fend):
+                    if t == _TARGET_TYPE:
+                        target = int.from_bytes(tags[vpos:vend], 'big')
+            elif field == _SIMPLE_TAG:
+                name = value = None
+                for t, vpos, vend in _elements(tags, fpos, fend):
+                    if t == _TAG_NAME:
+                        name = tags[vpos:vend].decode('utf-8', 'replace').upper()
+                    elif t == _TAG_STRING:
+                        value = tags[vpos:vend].decode('utf-8', 'replace')
+                if name and value:
+                    simple.append((name, value))
+        for name, value in simple:
+            if name == 'PART_NUMBER' and value.strip().isdigit():
+                if target >= 60:
+                    season = int(value)
+                elif target > level:  # the episode (50) beats a track (30)
+                    number, level = int(value), target
+            elif name in ('DATE_RECORDED', 'DATE_RELEASED') and date is None:
+                date = _parse_date(value)
+    return season, number, date
+
+
+# ------------------------------------------------------------ EXIF
+def _read_exif(fh, file_size):
+    head = fh.read(HEAD_BYTES)
+    if head[:2] != b'\xff\xd8':
+        return NO_META
+    pos = 2
+    while pos + 4 <= len(head) and head[pos] == 0xFF:
+        marker = head[pos + 1]
+        length = struct.unpack_from('>H', head, pos + 2)[0]
+        if marker == 0xDA:  # start of scan: no metadata after this
+            break
+        if marker == 0xE1 and head[pos + 4:pos + 10] == b'Exif\0\0':
+            return MediaMeta(date=_tiff_date(head[pos + 10:pos + 2 + length]))
+        pos += 2 + length
+    return NO_META
+
+
+def _tiff_date(tiff):
+    order = '<' if tiff[:2] == b'II' else '>'
+
+    def ifd(offset):
+        count = struct.unpack_from(order + 'H', tiff, offset)[0]
+        for i in range(count):
+            tag, kind, n, value = struct.unpack_from(order + 'HHII', tiff, offset + 2 + 12 * i)
+            yield tag, kind, n, value, offset + 10 + 12 * i
+
+    def text(n, value, at):
+        raw = tiff[value:value + n] if n > 4 else tiff[at:at + n]
+        return raw.split(b'\0', 1)[0].decode('ascii', 'replace')
+
+    date = exif_ifd = None
+    for tag, kind, n, value, at in ifd(struct.unpack_from(order + 'I', tiff, 4)[0]):
+        if tag == 0x0132:
+            date = _parse_date(text(n, value, at))
+        elif tag == 0x8769:
+            exif_ifd = value
+    if exif_ifd is not None:
+        for tag, kind, n, value, at in ifd(exif_ifd):
+            if tag == 0x9003:
+                return _parse_date(text(n, value, at)) or date
+    return date
+
+
+_READERS = dict.fromkeys(MP4_EXTS, _read_mp4)
+_READERS.update(dict.fromkeys(MKV_EXTS, _read_mkv))
+_READERS.update(dict.fromkeys(EXIF_EXTS, _read_exif))
+
+
+# ------------------------------------------------------------ READ
+def read_media_meta(path):
+    """MediaMeta of the file at ``path`` (NO_META for other types or unreadable headers)."""
+    reader = _READERS.get(split_ext(path)[1].lower())
+    if reader is None:
+        return NO_META
+    try:
+        with open(path, 'rb', buffering=0) as fh:
+            return reader(fh, os.fstat(fh.fileno()).st_size)
+    except _PARSE_ERRORS:
+        return NO_META
+
+
+class MetaCache:
+    """MediaMeta per file identity (device, inode, size, mtime); safe to share between threads."""
+
+    def __init__(self, max_entries=MAX_CACHED):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path):
+        if split_ext(path)[1].lower() not in MEDIA_EXTS:
+            return NO_META  # not even stat'ed
+        try:
+            st = os.stat(path)
+        except OSError:
+            return NO_META
+        key = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+        meta = self._entries.get(key)
+        if meta is None:
+            meta = read_media_meta(path)
+            with self._lock:
+                if len(self._entries) >= self.max_entries:
+                    # Oldest half goes (dicts keep insertion order)
+                    for old in list(self._entries)[:self.max_entries // 2]:
+                        del self._entries[old]
+                self._entries[key] = meta
+        return meta
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every sort in the process, so a re-listed folder is not parsed again
+default_cache = MetaCache()
+
+
+def read_folder_meta(folder, names, cache=None, workers=META_WORKERS, progress=None, should_stop=None):
+    """MediaMeta for each of ``names`` in ``folder``, read on up to ``workers`` threads.
+
+    ``progress(done, total)`` may be called from worker threads. When
+    ``should_stop()`` turns true the workers return early and None is
+    returned instead of a list.
+    """
+    cache = default_cache if cache is None else cache
+    total = len(names)
+    metas = [None] * total
+    lock = threading.Lock()
+    pending = iter(range(total))
+    done = 0
+    stopped = threading.Event()
+
+    def worker():
+        nonlocal done
+        while True:
+            if should_stop is not None and should_stop():
+                stopped.set()
+                return
+            with lock:
+                i = next(pending, None)
+            if i is None:
+                return
+            metas[i] = cache.get(os.path.join(folder, names[i]))
+            with lock:
+                done += 1
+                count = done
+            if progress is not None:
+                progress(count, total)
+
+    with span('meta', files=total):
+        workers = max(1, min(workers, total))
+        if workers == 1:
+            worker()
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for f in [pool.submit(worker) for _ in range(workers)]:
+                    f.result()
+    return None if stopped.is_set() else metas
+
@@ -0,0 +1,189 @@
+"""
+Rename plans saved to a file, to be reviewed and applied later or elsewhere.
+
+A plan file lists, in numbering order, each file's current name, its new
+name and the size/mtime the file had when the plan was made. Two formats,
+picked by extension:
+
+    plan.jsonl   a header line, then one object per file:
+                 {"folder_renamer_plan": 1, "folder": "/media/Show/Season 01", "files": 24}
+                 {"old": "Show.S01E01.mkv", "new": "Episode 01.mkv", "size": 734003200, "mtime": 1700000000.25}
+    plan.csv     a header row ``old,new,size,mtime``, then one row per file
+
+Both are written and read one entry at a time, so a plan never has to be
+held in memory as parsed rows; applying one keeps only the two name lists
+the planner needs. Before anything is renamed, ``load_plan`` checks every
+entry against one fresh scan of the folder: the file must still exist with
+the same size and mtime, and its new name must be a plain file name. The
+pairs then go through the regular planner and journal, so chains, cycles,
+conflicts and recovery behave as for any other rename.
+"""
+import csv
+import json
+import os
+from json.encoder import encode_basestring_ascii
+from typing import NamedTuple
+
+from .errors import PlanError
+from .preflight import name_problem
+from .scan import Listing, folder_stamp, iter_records
+
+PLAN_VERSION = 1
+CSV_HEADER = ['old', 'new', 'size', 'mtime']
+# mtimes are compared with this much slack (seconds); copies between machines
+# or onto coarse filesystems can round them
+MTIME_SLACK = 0.001
+_MAX_REPORTED = 5
+
+
+class PlanEntry(NamedTuple):
+    old: str
+    new: str
+    size: int
+    mtime: float
+
+
+def plan_format(path):
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def plan_entries(names, new_names, sizes, mtimes):
+    """PlanEntries from parallel sequences (e.g. FileStore columns in display order)."""
+    return map(PlanEntry, names, new_names, sizes, mtimes)
+
+
+# ------------------------------------------------------------ WRITE
+def write_plan(path, entries, folder=None, count=None):
+    """Write ``entries`` (PlanEntries, consumed lazily) to ``path``; returns how many.
+
+    The file is written next to ``path`` and moved into place when complete.
+    ``folder`` and ``count`` only go into the JSONL header.
+    """
+    fmt = plan_format(path)
+    tmp = path + '.part'
+    written = 0
+    try:
+        # surrogateescape: names that are not valid UTF-8 survive the round trip
+        with open(tmp, 'w', encoding='utf-8', errors='surrogateescape', newline='') as fh:
+            if fmt == 'csv':
+                writer = csv.writer(fh)
+                writer.writerow(CSV_HEADER)
+                for entry in entries:
+                    writer.writerow((entry.old, entry.new, entry.size, repr(float(entry.mtime))))
+                    written += 1
+            else:
+                header = {'folder_renamer_plan': PLAN_VERSION, 'folder': folder and os.path.abspath(folder)}
+                if count is not None:
+                    header['files'] = count
+                fh.write(json.dumps(header) + '\n')
+                # Same text as json.dumps of the entry dict, without building one per line
+                enc = encode_basestring_ascii
+                for entry in entries:
+                    fh.write(f'{{"old": {enc(entry.old)}, "new": {enc(entry.new)}, '
+                             f'"size": {int(entry.size)}, "mtime": {float(entry.mtime)!r}}}\n')
+                    written += 1
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return written
+
+
+# ------------------------------------------------------------ READ
+def read_plan_header(path):
+    """The JSONL header ({} for CSV plans); raises PlanError if it is not a plan file."""
+    if plan_format(path) == 'csv':
+        return {}
+    with open(path, encoding='utf-8', errors='surrogateescape') as fh:
+        return _header(fh.readline(), path)
+
+
+def _header(line, path):
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or 'folder_renamer_plan' not in header:
+        raise PlanError(f"{path}: not a rename plan")
+    if header['folder_renamer_plan'] != PLAN_VERSION:
+        raise PlanError(f"{path}: unsupported plan version {header['folder_renamer_plan']}")
+    return header
+
+
+def iter_plan(path):
+    """Yield the PlanEntries of ``path`` one at a time; raises PlanError on a malformed line."""
+    with open(path, encoding='utf-8', errors='surrogateescape', newline='') as fh:
+        if plan_format(path) == 'csv':
+            rows = csv.reader(fh)
+            if next(rows, None) != CSV_HEADER:
+                raise PlanError(f"{path}: expected a header row {','.join(CSV_HEADER)}")
+            for row in rows:
+                if not row:
+                    continue
+                yield _entry(row, path, rows.line_num)
+        else:
+            _header(fh.readline(), path)
+            for line_num, line in enumerate(fh, 2):
+                if not line.strip():
+                    continue
+                try:
+                    obj = json.loads(line)
+                    row = (obj['old'], obj['new'], obj['size'], obj['mtime'])
+                except (ValueError, KeyError, TypeError) as e:
+                    raise PlanError(f"{path}:{line_num}: malformed entry ({e})") from e
+                yield _entry(row, path, line_num)
+
+
+def _entry(row, path, line_num):
+    try:
+        old, new, size, mtime = row
+        if not isinstance(old, str) or not isinstance(new, str):
+            raise TypeError("names must be text")
+        return PlanEntry(old, new, int(size), float(mtime))
+    except (ValueError, TypeError) as e:
+        raise PlanError(f"{path}:{line_num}: malformed entry ({e})") from e
+
+
+# ------------------------------------------------------------ VALIDATE
+def load_plan(path, folder, mtime_slack=MTIME_SLACK):
+    """Check ``path`` against ``folder``; returns (Listing, names, new_names).
+
+    Raises PlanError listing the first few problems (missing or changed
+    files, invalid or duplicate names) when any entry does not match. The
+    Listing comes from the same scan, so ``check_stale`` can still catch a
+    change made between validation and renaming.
+    """
+    stamp = folder_stamp(folder)
+    others = set()
+    current = {rec.name: rec for rec in iter_records(folder, others)}
+    names, new_names = [], []
+    seen = set()
+    problems, bad = [], 0
+    for entry in iter_plan(path):
+        rec = current.get(entry.old)
+        if entry.old in seen:
+            problem = f"listed twice: {entry.old}"
+        elif rec is None:
+            problem = f"missing: {entry.old}"
+        elif rec.size != entry.size or abs(rec.mtime - entry.mtime) > mtime_slack:
+            problem = f"changed since the plan was made: {entry.old}"
+        elif name_problem(entry.new, portable=False) is not None:
+            problem = f"invalid new name for {entry.old}: {entry.new!r}"
+        else:
+            problem = None
+        if problem is not None:
+            bad += 1
+            if bad <= _MAX_REPORTED:
+                problems.append(problem)
+        seen.add(entry.old)
+        names.append(entry.old)
+        new_names.append(entry.new)
+    if problems:
+        shown = '\n'.join(problems)
+        more = f"\n... and {bad - _MAX_REPORTED} more" if bad > _MAX_REPORTED else ""
+        raise PlanError(f"The plan does not match {folder}:\n{shown}{more}")
+    listing = Listing(folder, list(current.values()), others, stamp)
+    return listing, names, new_names
@@ -0,0 +1,135 @@
+"""
+Rename planner: orders a batch of renames so existing targets are not a problem.
+
+Renumbering a folder that is already partly numbered means many targets are
+currently occupied by other files of the same batch. With unique targets the
+``src -> dst`` mapping is a set of disjoint chains and cycles:
+
+- a chain ``a -> b -> c`` (``c`` free) runs back to front: ``b -> c`` then ``a -> b``
+- a cycle ``a -> b -> c -> a`` parks one file under a temporary name:
+  ``a -> tmp``, ``c -> a``, ``b -> c``, ``tmp -> b``
+
+That is one rename per file plus one per cycle, the minimum possible. Conflicts
+are decided against the in-memory listing (``taken``), not one stat per target.
+
+With a ``key`` (``preflight.name_key`` for case-insensitive filesystems) a
+target also waits for the source it only differs from in case: on SMB or
+exFAT, ``a -> Episode 02`` must not run while ``EPISODE 02`` is still there.
+"""
+from .errors import ConflictError
+from .scan import RESERVED_PREFIX
+
+TEMP_PREFIX = RESERVED_PREFIX + '-tmp-'
+
+
+class RenamePlan:
+    """Ordered rename steps, grouped into chains that do not depend on each other.
+
+    Steps inside a chain must run in order; different chains touch disjoint
+    names and may run in any order (or concurrently).
+    """
+
+    def __init__(self, chains=None, temp_count=0):
+        self.chains = chains if chains is not None else []
+        self.temp_count = temp_count
+
+    def __len__(self):
+        return sum(len(c) for c in self.chains)
+
+    def __iter__(self):
+        for chain in self.chains:
+            yield from chain
+
+    @property
+    def file_count(self):
+        """Files that end up with a new name (temporary hops not counted)."""
+        return len(self) - self.temp_count
+
+
+def plan_moves(moves, taken=(), key=None):
+    """Order ``moves`` ({old_name: new_name}) into a RenamePlan.
+
+    ``taken`` holds every name currently present in the folder (files and
+    non-files). Raises ConflictError when a target is held by an entry that is
+    not being renamed, or when two files would get the same name (the same
+    ``key``, when given).
+    """
+    moves = {src: dst for src, dst in moves.items() if src != dst}
+    if not moves:
+        return RenamePlan()
+    seen = set()
+    for dst in moves.values():
+        if dst in seen:
+            raise ConflictError(dst, "Duplicate target")
+        seen.add(dst)
+        if dst in taken and dst not in moves:
+            raise ConflictError(dst)
+    after = _dependencies(moves, key)
+
+    targets = set(after.values())
+    chains = []
+    done = set()
+    # Chains start at a source nobody renames into
+    for head in moves:
+        if head in targets:
+            continue
+        path = []
+        node = head
+        while node is not None:
+            path.append((node, moves[node]))
+            done.add(node)
+            node = after.get(node)
+        chains.append(path[::-1])
+
+    # Whatever is left forms cycles
+    temp_count = 0
+    used = set(taken) | targets | set(moves)
+    for start in moves:
+        if start in done:
+            continue
+        cycle = []
+        node = start
+        while node not in done:
+            done.add(node)
+            cycle.append((node, moves[node]))
+            node = after[node]
+        tmp = _temp_name(used, temp_count)
+        used.add(tmp)
+        temp_count += 1
+        # Park the first file, run the rest of the cycle backwards, then land it
+        first_src, first_dst = cycle[0]
+        steps = [(first_src, tmp)]
+        steps.extend(reversed(cycle[1:]))
+        steps.append((tmp, first_dst))
+        chains.append(steps)
+    return RenamePlan(chains, temp_count)
+
+
+def _dependencies(moves, key):
+    # {src: the source that has to move away before src can take its target}
+    after = {src: dst for src, dst in moves.items() if dst in moves}
+    if key is None:
+        return after
+    by_key = {}
+    for src in moves:
+        by_key.setdefault(key(src), []).append(src)
+    seen = {}
+    for src, dst in moves.items():
+        folded = key(dst)
+        if folded in seen:
+            raise ConflictError(dst, f"Same name as {seen[folded]} on a case-insensitive filesystem")
+        seen[folded] = dst
+        if src in after:
+            continue
+        holders = [other for other in by_key.get(folded, ()) if other != src]
+        if len(holders) == 1:  # (several: a case-sensitive folder, the exact names decide)
+            after[src] = holders[0]
+    return after
+
+
+def _temp_name(used, n):
+    name = f"{TEMP_PREFIX}{n}"
+    while name in used:
+        n += 1
+        name = f"{TEMP_PREFIX}{n}"
+    return name
@@ -0,0 +1,123 @@
+"""
+Pre-flight checks of a rename batch, run before the first ``os.rename``.
+
+A target that only fails on the server (an invalid character on an SMB
+share, a name two files end up sharing on a case-insensitive exFAT stick)
+would otherwise stop a batch halfway. ``check_batch`` looks at the final
+state of the folder instead: every new name plus every name nobody renames.
+It builds two indexes of that state in one pass, one by exact name and one
+by normalized name (NFC, case-folded), and checks each changed name against
+both:
+
+- invalid         empty, ``.``/``..``, a path separator or NUL, or the tool's
+                  own reserved prefix
+- too long        more than NAME_MAX bytes (UTF-8), or 255 UTF-16 units when
+                  ``portable`` (exFAT, NTFS, SMB)
+- duplicate       two files of the batch get the same name
+- taken           the name belongs to a file that is not being renamed
+- case clash      differs from another final name only in case or Unicode
+                  normalization (``portable`` only)
+- not portable    ``<>:"\\|?*`` or control characters, a trailing dot or
+                  space, or a reserved device name such as ``CON`` or ``LPT1``
+                  (``portable`` only)
+
+Names that do not change are not checked: the file already has them. A new
+name that only clashes with a file of the batch moving away is fine; with
+``portable`` the planner runs that file's rename first (see planner.py).
+"""
+import os
+import unicodedata
+from typing import NamedTuple, Optional
+
+from .scan import RESERVED_PREFIX
+from .trace import span
+
+NAME_MAX = 255  # bytes per name on the usual Linux filesystems
+PORTABLE_NAME_MAX = 255  # UTF-16 units (exFAT, NTFS, SMB)
+_SEPARATORS = frozenset({'/', '\0', os.sep, os.altsep} - {None})
+_UNPORTABLE = frozenset('<>:"\\|?*' + ''.join(map(chr, range(32))))
+_DEVICES = frozenset({'CON', 'PRN', 'AUX', 'NUL'} | {f'{d}{i}' for d in ('COM', 'LPT') for i in range(1, 10)})
+
+
+class Problem(NamedTuple):
+    index: int  # position in the batch
+    kind: str  # 'invalid', 'length', 'duplicate', 'taken', 'case' or 'portable'
+    message: str
+    other: Optional[int] = None  # the batch entry it clashes with, if any
+
+
+def name_key(name):
+    """The name as a case-insensitive, normalization-insensitive filesystem sees it."""
+    if name.isascii():
+        return name.lower()  # the common case, and a lot cheaper
+    return unicodedata.normalize('NFC', name).casefold()
+
+
+def name_problem(name, portable=True):
+    """(kind, message) when ``name`` cannot be a file name, else None."""
+    if not name or name in ('.', '..') or not _SEPARATORS.isdisjoint(name):
+        return 'invalid', f"invalid name {name!r}"
+    if name.startswith(RESERVED_PREFIX):
+        return 'invalid', f"{name!r} uses the reserved prefix {RESERVED_PREFIX}"
+    # (at most 4 UTF-8 bytes and 2 UTF-16 units per character: most names need no encoding)
+    if len(name) * 4 > NAME_MAX and len(name.encode('utf-8', 'surrogateescape')) > NAME_MAX:
+        return 'length', f"longer than {NAME_MAX} bytes: {name[:40]}…"
+    if not portable:
+        return None
+    if len(name) * 2 > PORTABLE_NAME_MAX and len(name.encode('utf-16-le', 'surrogatepass')) // 2 > PORTABLE_NAME_MAX:
+        return 'length', f"longer than {PORTABLE_NAME_MAX} characters: {name[:40]}…"
+    if not _UNPORTABLE.isdisjoint(name):
+        shown = ' '.join(repr(c)[1:-1] for c in sorted(_UNPORTABLE.intersection(name)))
+        return 'portable', f"{name!r} contains {shown} (not allowed on Windows/SMB/exFAT)"
+    if name[-1] in '. ':
+        return 'portable', f"{name!r} ends with a dot or space (not allowed on Windows/SMB/exFAT)"
+    if name.split('.', 1)[0].rstrip(' ').upper() in _DEVICES:
+        return 'portable', f"{name!r} is a reserved device name on Windows/SMB"
+    return None
+
+
+def check_batch(names, new_names, taken=None, portable=True):
+    """Problems of renaming ``names[i]`` to ``new_names[i]``, in batch order.
+
+    ``taken`` is every name present in the folder (see Listing.taken_names;
+    default: only ``names``). One pass over the batch and one over ``taken``,
+    each a couple of dict lookups per name.
+    """
+    problems = []
+    batch = set(names)
+    exact = {}  # final name -> batch index (None: a file that stays as it is)
+    folded = {}  # name_key(final name) -> (final name, batch index)
+    for name in (taken if taken is not None else ()):
+        if name not in batch:
+            exact[name] = None
+            if portable:
+                folded.setdefault(name_key(name), (name, None))
+    with span('validate', files=len(names)):
+        for i, (src, dst) in enumerate(zip(names, new_names)):
+            changed = src != dst
+            if changed:
+                found = name_problem(dst, portable)
+                if found is not None:
+                    problems.append(Problem(i, found[0], f"{src}: {found[1]}"))
+                    continue
+            owner = exact.get(dst, -1)
+            if owner != -1:
+                if owner is None:
+                    problems.append(Problem(i, 'taken', f"{src}: {dst} is taken by a file that is not renamed"))
+                else:
+                    problems.append(Problem(i, 'duplicate', f"{src}: {dst} is also the new name of {names[owner]}",
+                                            owner))
+                continue
+            exact[dst] = i
+            if not portable:
+                continue
+            key = name_key(dst)
+            clash = folded.get(key)
+            if clash is None:
+                folded[key] = (dst, i)
+            elif changed or clash[1] is not None and names[clash[1]] != new_names[clash[1]]:
+                # (two names that exist already and stay are the folder's business)
+                other_name, other = clash
+                problems.append(Problem(i, 'case', f"{src}: {dst} differs from {other_name} only in case",
+                                        other))
+    return problems
@@ -0,0 +1,49 @@
+"""
+Frame-coalesced UI updates.
+
+Scroll callbacks, wheel events and list refreshes can fire many times between
+two repaints; each used to re-place the scrollbar thumb or force a layout pass
+on the spot. ``FrameScheduler`` collects such updates under a key and runs
+each at most once per frame, in a fixed order (layout before the things that
+are measured from it). A key requested again before the frame only replaces
+its callback, so the last state wins.
+
+The frame callback is itself run as an idle task, after the geometry
+managers' own idle work, so sizes read during the frame are current without
+``update_idletasks``. Like TaskRunner, the scheduler only needs Tk's
+``after``/``after_idle`` and imports nothing from Tk.
+"""
+from .trace import span
+
+FRAME_MS = 16
+
+
+class FrameScheduler:
+    def __init__(self, after, after_idle, order=(), frame_ms=FRAME_MS):
+        self._after = after
+        self._after_idle = after_idle
+        self._rank = {key: i for i, key in enumerate(order)}
+        self.frame_ms = frame_ms
+        self._pending = {}  # key -> callback
+        self._job = None
+
+    def request(self, key, fn):
+        """Run ``fn()`` with the next frame (once, however often it is requested)."""
+        self._pending[key] = fn
+        if self._job is None:
+            self._job = self._after(self.frame_ms, lambda: self._after_idle(self.flush))
+
+    @property
+    def pending(self):
+        return bool(self._pending)
+
+    def flush(self):
+        """Run every pending update now (also the scheduled frame callback)."""
+        self._job = None
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        last = len(self._rank)
+        with span('frame', updates=len(pending)):
+            for key in sorted(pending, key=lambda k: self._rank.get(k, last)):
+                pending[key]()
@@ -0,0 +1,129 @@
+"""
+Directory listing built on ``os.scandir``.
+
+Each regular file costs at most one stat call: ``DirEntry.is_file()`` answers
+from the readdir type information (d_type on POSIX, the find data on Windows)
+and ``DirEntry.stat()`` is cached on the entry. The resulting records carry
+everything sorting and preview need, so nothing downstream touches the
+filesystem again. A scan filter (filters.py) is applied as entries stream
+in, so files it leaves out are never stored, and never stat'ed when their
+name alone rules them out.
+"""
+import os
+import time
+from typing import NamedTuple
+
+from .trace import traced
+
+# Names the tool itself creates inside a folder (rename journal, temporary
+# names); never listed as files to number
+RESERVED_PREFIX = '.folder_renamer'
+
+
+class FileRecord(NamedTuple):
+    name: str
+    size: int
+    mtime: float
+
+
+class Listing:
+    """Everything one scan learned about a folder.
+
+    ``records`` is a list of FileRecords or a FileStore. ``others`` holds the
+    names of non-file entries (sub-folders, sockets...) and ``skipped`` those
+    of files left out of numbering (by a scan filter, or as duplicates),
+    so rename conflicts can be decided without touching the disk, and
+    ``stamp`` identifies the folder state the scan started from.
+    """
+
+    def __init__(self, folder, records=None, others=None, stamp=None, skipped=None):
+        self.folder = folder
+        self.records = records if records is not None else []
+        self.others = others if others is not None else set()
+        self.stamp = stamp
+        self.skipped = skipped if skipped is not None else set()
+
+    def taken_names(self):
+        ordered = getattr(self.records, 'ordered', None)  # FileStore: the live names, no records built
+        if ordered is None:
+            names = (r.name for r in self.records)
+        else:
+            names = ordered(self.records.names)
+        return set(names) | self.others | self.skipped
+
+    def is_stale(self):
+        """True when the folder changed (entries added/removed/renamed) since the scan."""
+        try:
+            return folder_stamp(self.folder) != self.stamp
+        except OSError:
+            return True
+
+
+def folder_stamp(folder):
+    """(device, inode, mtime_ns) of ``folder``; changes whenever its entries change."""
+    st = os.stat(folder)
+    return (st.st_dev, st.st_ino, st.st_mtime_ns)
+
+
+def iter_records(folder, others=None, file_filter=None, skipped=None):
+    """Yield a FileRecord for every regular file directly inside ``folder``.
+
+    Names of entries that are not regular files are added to ``others`` when
+    a set is given. Files ``file_filter`` (a FileFilter) rejects are not
+    yielded; their names go to ``skipped`` (default: ``others``). A file
+    rejected by name is never stat'ed.
+    """
+    if skipped is None:
+        skipped = others
+    keep_name = file_filter.keep_name if file_filter else None
+    keep_stat = file_filter.keep_stat if file_filter and file_filter.uses_stat else None
+    now = time.time()
+    with os.scandir(folder) as it:
+        for entry in it:
+            name = entry.name
+            try:
+                if not entry.is_file() or name.startswith(RESERVED_PREFIX):
+                    if others is not None:
+                        others.add(name)
+                    continue
+                if keep_name is not None and not keep_name(name):
+                    if skipped is not None:
+                        skipped.add(name)
+                    continue
+                st = entry.stat()
+            except OSError:
+                # Vanished (or became unreadable) between readdir and stat
+                continue
+            if keep_stat is not None and not keep_stat(st.st_size, st.st_mtime, now):
+                if skipped is not None:
+                    skipped.add(name)
+                continue
+            yield FileRecord(name, st.st_size, st.st_mtime)
+
+
+def iter_batches(folder, size=1000, others=None, file_filter=None, skipped=None):
+    """Yield lists of up to ``size`` FileRecords as the scan streams in."""
+    batch = []
+    for rec in iter_records(folder, others, file_filter, skipped):
+        batch.append(rec)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def scan_folder(folder, file_filter=None):
+    """List ``folder`` into FileRecords ([] when it is not a folder)."""
+    if not folder or not os.path.isdir(folder):
+        return []
+    return list(iter_records(folder, file_filter=file_filter))
+
+
+@traced('scan')
+def scan_listing(folder, file_filter=None):
+    """Scan ``folder`` into a Listing (stamped before reading, so later changes show as stale)."""
+    stamp = folder_stamp(folder)
+    others, skipped = set(), set()
+    records = list(iter_records(folder, others, file_filter, skipped))
+    return Listing(folder, records, others, stamp, skipped)
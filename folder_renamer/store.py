@@ -0,0 +1,163 @@
+"""
+Column store for a folder's FileRecords.
+
+A list of FileRecord tuples costs a tuple, a float and usually an int object
+per file on top of the name. ``FileStore`` keeps the same data in columns:
+names (interned, so a re-scan or the sort-key cache shares the strings
+instead of holding a second copy), extensions split once and interned (a
+folder has a handful of distinct ones), and sizes/mtimes in ``array``
+columns. The display order is a separate ``array('I')`` of slot numbers, so
+sorting and manual moves permute machine ints instead of moving objects.
+
+The store behaves like a read-mostly sequence of FileRecords in display
+order (``len``, indexing, iteration); records are built on demand, which is
+cheap for the handful of visible rows.
+
+Watch updates find files through a name -> slot index, built on first use
+and kept current by every edit (reorders do not touch slots). Removed slots
+leave the display order at once but stay in the columns as dead entries
+until they outnumber the live ones (or a sort runs), so a burst of small
+changes does not copy every column each time.
+"""
+import sys
+from array import array
+
+from .scan import FileRecord
+from .template import split_ext
+
+
+class FileStore:
+    __slots__ = ('names', 'exts', 'sizes', 'mtimes', 'order', '_index', '_dead')
+
+    def __init__(self, records=()):
+        self.names = []  # slot -> name
+        self.exts = []  # slot -> extension (dot included)
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.order = array('I')  # display position -> slot
+        self._index = None  # name -> slot of the live entries, once slot_of was used
+        self._dead = 0  # removed slots still in the columns
+        self.extend(records)
+
+    # ------------------------------------------------------------ BUILD
+    def extend(self, records):
+        intern = sys.intern
+        names, exts = self.names, self.exts
+        base = len(names)
+        for rec in records:
+            name = intern(rec.name)
+            names.append(name)
+            exts.append(intern(split_ext(name)[1]))
+            self.sizes.append(rec.size)
+            self.mtimes.append(rec.mtime)
+        self.order.extend(range(base, len(names)))
+        if self._index is not None:
+            self._index.update(zip(names[base:], range(base, len(names))))
+
+    def append(self, rec):
+        self.extend((rec,))
+
+    @classmethod
+    def from_columns(cls, names, sizes, mtimes):
+        """Store built from parallel name/size/mtime sequences (e.g. a cache entry)."""
+        store = cls()
+        intern = sys.intern
+        store.names = [intern(n) for n in names]
+        store.exts = [intern(split_ext(n)[1]) for n in store.names]
+        store.sizes = array('q', sizes)
+        store.mtimes = array('d', mtimes)
+        if not len(store.names) == len(store.sizes) == len(store.mtimes):
+            raise ValueError("Columns differ in length")
+        store.order = array('I', range(len(store.names)))
+        return store
+
+    # ------------------------------------------------------------ SEQUENCE
+    def __len__(self):
+        return len(self.order)
+
+    def __getitem__(self, pos):
+        slot = self.order[pos]
+        return FileRecord(self.names[slot], self.sizes[slot], self.mtimes[slot])
+
+    def __setitem__(self, pos, rec):
+        # Replace the record shown at ``pos`` (watch updates / renames)
+        self.set_slot(self.order[pos], rec)
+
+    def __iter__(self):
+        names, sizes, mtimes = self.names, self.sizes, self.mtimes
+        for slot in self.order:
+            yield FileRecord(names[slot], sizes[slot], mtimes[slot])
+
+    def name_at(self, pos):
+        return self.names[self.order[pos]]
+
+    def ordered(self, column):
+        """``column`` (e.g. ``store.names``) in display order, as a list."""
+        return list(map(column.__getitem__, self.order))
+
+    def slot_of(self, name):
+        """Slot of the live record called ``name`` (None if there is none)."""
+        if self._index is None:
+            names = self.names
+            self._index = {names[slot]: slot for slot in self.order}
+        return self._index.get(name)
+
+    # ------------------------------------------------------------ EDIT
+    def set_slot(self, slot, rec):
+        """Replace the record in ``slot``, wherever it is shown."""
+        name = sys.intern(rec.name)
+        if self._index is not None:
+            if self._index.get(self.names[slot]) == slot:
+                del self._index[self.names[slot]]
+            self._index[name] = slot
+        self.names[slot] = name
+        self.exts[slot] = sys.intern(split_ext(name)[1])
+        self.sizes[slot] = rec.size
+        self.mtimes[slot] = rec.mtime
+
+    def permute(self, slots):
+        """Set the display order to ``slots`` (an iterable of slot numbers)."""
+        self.order = array('I', slots)
+
+    def remove(self, positions):
+        """Drop the records at display ``positions``."""
+        self.remove_slots([self.order[pos] for pos in positions])
+
+    def remove_slots(self, slots):
+        """Drop the records in ``slots``; returns the display positions they had, ascending."""
+        gone = set(slots)
+        if not gone:
+            return []
+        order = self.order
+        if len(gone) <= 16:
+            # A handful of files: C-level searches instead of a Python pass
+            positions = sorted(order.index(slot) for slot in gone)
+        else:
+            positions = [pos for pos, slot in enumerate(order) if slot in gone]
+        kept, start = array('I'), 0
+        for pos in positions:
+            kept += order[start:pos]
+            start = pos + 1
+        kept += order[start:]
+        self.order = kept
+        if self._index is not None:
+            for slot in gone:
+                if self._index.get(self.names[slot]) == slot:
+                    del self._index[self.names[slot]]
+        self._dead += len(gone)
+        if self._dead > len(kept):
+            self.compact()
+        return positions
+
+    def compact(self):
+        """Drop dead slots from the columns; the remaining records are renumbered."""
+        if not self._dead:
+            return
+        keep = self.order
+        self.names = [self.names[s] for s in keep]
+        self.exts = [self.exts[s] for s in keep]
+        self.sizes = array('q', map(self.sizes.__getitem__, keep))
+        self.mtimes = array('d', map(self.mtimes.__getitem__, keep))
+        self.order = array('I', range(len(keep)))
+        self._index = None
+        self._dead = 0
@@ -0,0 +1,130 @@
+"""
+Background jobs for the GUI.
+
+A job is a plain function ``fn(task)`` run on a daemon thread. It reports back
+through ``task.partial(payload)`` and ``task.progress(done, total)`` and should
+call ``task.check()`` (or test ``task.cancelled`` and return early) between
+units of work; ``on_cancel`` receives whatever the job returned (None when it
+stopped via ``check()``). The messages travel through a queue that the GUI
+thread drains on a timer (``schedule`` is ``root.after``), so callbacks always
+run on the Tk thread and workers never touch widgets. Nothing here imports
+tkinter.
+"""
+import queue
+import threading
+import time
+
+
+class Cancelled(Exception):
+    """Raised inside a job by ``Task.check()`` once the task was cancelled."""
+
+
+class Task:
+    PROGRESS_INTERVAL = 0.05  # seconds between forwarded progress updates
+
+    def __init__(self, runner, fn, on_partial=None, on_progress=None, on_done=None,
+                 on_error=None, on_cancel=None):
+        self._runner = runner
+        self._fn = fn
+        self.on_partial = on_partial
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self._cancel = threading.Event()
+        self._last_progress = 0.0
+        self.finished = False
+
+    # ------------------------------------------------------------ WORKER SIDE
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def partial(self, payload):
+        self._runner._post(self, 'partial', payload)
+
+    def progress(self, done, total=None):
+        # Throttled so a 100k-file job does not flood the queue
+        now = time.monotonic()
+        if done == total or now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self._runner._post(self, 'progress', (done, total))
+
+    def _run(self):
+        try:
+            result = self._fn(self)
+        except Cancelled:
+            self._runner._post(self, 'cancel', None)
+        except Exception as e:
+            self._runner._post(self, 'error', e)
+        else:
+            self._runner._post(self, 'cancel' if self.cancelled else 'done', result)
+
+    # ------------------------------------------------------------ GUI SIDE
+    def cancel(self):
+        self._cancel.set()
+
+
+class TaskRunner:
+    """Starts jobs on threads and dispatches their messages on the GUI thread."""
+
+    def __init__(self, schedule, interval=30, max_messages=200):
+        self._schedule = schedule
+        self._interval = interval
+        self._max_messages = max_messages  # per poll, keeps the UI responsive
+        self._queue = queue.Queue()
+        self._active = set()
+        self._polling = False
+
+    @property
+    def busy(self):
+        return bool(self._active)
+
+    def submit(self, fn, **callbacks):
+        task = Task(self, fn, **callbacks)
+        self._active.add(task)
+        threading.Thread(target=task._run, daemon=True).start()
+        if not self._polling:
+            self._polling = True
+            self._schedule(self._interval, self._poll)
+        return task
+
+    def _post(self, task, kind, payload):
+        self._queue.put((task, kind, payload))
+
+    def _poll(self):
+        for _ in range(self._max_messages):
+            try:
+                task, kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            self._dispatch(task, kind, payload)
+        if self._active or not self._queue.empty():
+            self._schedule(self._interval, self._poll)
+        else:
+            self._polling = False
+
+    def _dispatch(self, task, kind, payload):
+        if kind in ('done', 'error', 'cancel'):
+            task.finished = True
+            self._active.discard(task)
+        elif task.cancelled:
+            # Drop streamed results of a cancelled job
+            return
+        callback = {
+            'partial': task.on_partial,
+            'progress': task.on_progress,
+            'done': task.on_done,
+            'error': task.on_error,
+            'cancel': task.on_cancel,
+        }[kind]
+        if callback is None:
+            return
+        if kind == 'progress':
+            callback(*payload)
+        else:
+            callback(payload)
@@ -0,0 +1,163 @@
+"""
+Rename templates: ``{prefix} {n}{ext}``, ``{orig_stem} - {n:03}{ext}``, ``S{g1}E{n}{ext}``...
+
+Fields:
+
+    {prefix}               the prefix setting
+    {n}                    the file's number (start + position); padded to the
+                           digit setting unless a format spec is given ({n:03})
+    {stem} / {orig_stem}   original name without extension
+    {name} / {orig_name}   original name
+    {ext}                  original extension, dot included
+    {g1}, {g2}...          regex capture groups (text; {g0} is the whole match)
+    {season}...            named regex groups
+
+The regex is searched in the whole original name, extension included, the
+same subject the Number order reads its number from.
+
+Format specs and conversions work as in ``str.format`` (``{stem:.20}``
+truncates, ``{g1:0>2}`` pads a group). A template is compiled once into a
+plain positional format string plus the list of values it needs, so
+generating names for a whole listing is one ``str.format`` call per file with
+no parsing, and the regex only runs when the template uses a group. Leading and trailing
+whitespace is dropped from the result, so an empty prefix does not leave a
+space behind.
+"""
+import os
+import re
+import string
+from functools import lru_cache
+
+from .errors import TemplateError
+from .trace import traced
+
+DEFAULT_TEMPLATE = '{prefix} {n}{ext}'
+
+_ALIASES = {'orig_stem': 'stem', 'orig_name': 'name'}
+_GROUP = re.compile(r'g(\d+)$')
+_formatter = string.Formatter()
+_SEPARATORS = {'/', os.sep, os.altsep} - {None}
+
+
+def _escape(text):
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def split_ext(name):
+    """``os.path.splitext`` for a bare file name, without the path handling."""
+    i = name.rfind('.')
+    if i <= 0 or name[0] == '.' and not name[:i].lstrip('.'):
+        return name, ''
+    return name[:i], name[i:]
+
+
+class Template:
+    """A compiled rename template (immutable; see ``compile_template``)."""
+
+    def __init__(self, text=DEFAULT_TEMPLATE, prefix='', start=1, pad=2, pattern=None):
+        self.text = text
+        self.prefix = prefix.strip()
+        self.start = start
+        self.pad = pad
+        try:
+            self.regex = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise TemplateError(f"Bad pattern {pattern!r}: {e}") from e
+        self._fmt, self._fields = self._compile()
+        if any(sep in self._fmt for sep in _SEPARATORS):
+            raise TemplateError("New names cannot contain path separators")
+        self.uses_match = any(f[0] == 'group' for f in self._fields)
+        # Catch bad format specs now rather than halfway through a listing
+        try:
+            self.name_for('sample.ext', 0)
+        except (ValueError, TypeError, IndexError) as e:
+            raise TemplateError(f"Bad template {text!r}: {e}") from e
+
+    def _compile(self):
+        parts, fields = [], []
+        try:
+            parsed = list(_formatter.parse(self.text))
+        except ValueError as e:
+            raise TemplateError(f"Bad template {self.text!r}: {e}") from e
+        for literal, field, spec, conversion in parsed:
+            parts.append(_escape(literal))
+            if field is None:
+                continue
+            if '{' in spec:
+                raise TemplateError(f"Nested fields are not supported: {{{field}:{spec}}}")
+            field = _ALIASES.get(field, field)
+            if field == 'prefix' and not conversion:
+                # Constant: baked into the format string
+                parts.append(_escape(format(self.prefix, spec)))
+                continue
+            if field == 'prefix':
+                kind = ('prefix',)
+            elif field == 'n':
+                kind = ('n',)
+                spec = spec or f'0{self.pad}d'
+            elif field in ('stem', 'name', 'ext'):
+                kind = (field,)
+            else:
+                kind = ('group', self._group_ref(field))
+            slot = f"{len(fields)}{'!' + conversion if conversion else ''}{':' + spec if spec else ''}"
+            parts.append('{' + slot + '}')
+            fields.append(kind)
+        return ''.join(parts), tuple(fields)
+
+    def _group_ref(self, field):
+        m = _GROUP.match(field)
+        ref = int(m.group(1)) if m else field
+        if self.regex is None:
+            raise TemplateError(f"{{{field}}} needs a pattern with capture groups")
+        if m and ref > self.regex.groups or not m and ref not in self.regex.groupindex:
+            raise TemplateError(f"Unknown template field {{{field}}}")
+        return ref
+
+    # ------------------------------------------------------------ FORMAT
+    def _values(self, name, number, ext=None):
+        if ext is None:
+            stem, ext = split_ext(name)
+        else:
+            stem = name[:len(name) - len(ext)]
+        match = self.regex.search(name) if self.uses_match else None
+        values = []
+        for kind in self._fields:
+            what = kind[0]
+            if what == 'n':
+                values.append(number)
+            elif what == 'stem':
+                values.append(stem)
+            elif what == 'ext':
+                values.append(ext)
+            elif what == 'name':
+                values.append(name)
+            elif what == 'prefix':
+                values.append(self.prefix)
+            else:
+                values.append((match.group(kind[1]) or '') if match else '')
+        return values
+
+    def name_for(self, name, index):
+        """New name for ``name`` at position ``index`` (0-based) of the list."""
+        return self._fmt.format(*self._values(name, self.start + index)).strip()
+
+    @traced('names')
+    def render(self, names, exts=None):
+        """New names for ``names`` in display order, in one pass.
+
+        ``exts`` may hold the names' extensions, already split (FileStore keeps them).
+        """
+        fmt = self._fmt.format
+        if exts is None:
+            exts = [split_ext(name)[1] for name in names]
+        if self._fields == (('n',), ('ext',)):
+            # Fast path for the default template
+            return [fmt(n, ext).strip() for n, ext in enumerate(exts, self.start)]
+        values = self._values
+        return [fmt(*values(name, n, ext)).strip() for n, (name, ext) in enumerate(zip(names, exts), self.start)]
+
+
+@lru_cache(maxsize=32)
+def compile_template(text=DEFAULT_TEMPLATE, prefix='', start=1, pad=2, pattern=None):
+    """Compiled Template for these settings (cached; raises TemplateError)."""
+    return Template(text, prefix, start, pad, pattern)
@@ -0,0 +1,216 @@
+"""
+Virtual rows for a ttk.Treeview.
+
+The tree only ever holds a fixed pool of items (one per visible row). Scrolling
+moves a logical window over ``count`` rows and refills the pool through a
+``row_provider(index) -> (values, tags)`` callback, so Tk state and preview
+cost stay flat no matter how many files the folder has. Selection is kept as
+logical indices because pool items are reused for different rows.
+
+Rendering is incremental: each slot remembers what it last showed, so
+``refresh(lo, hi)`` after a reorder only touches the visible rows whose
+values or tags actually changed, and item ids map to slots through a dict
+instead of asking Tk for ``index()``.
+"""
+from bisect import bisect_left
+
+
+class VirtualList:
+    def __init__(self, tree, row_provider, visible_rows=10, on_scroll=None):
+        self.tree = tree
+        self.row_provider = row_provider
+        self.visible_rows = visible_rows
+        self.on_scroll = on_scroll  # called with (first, last) fractions
+        self.count = 0
+        self.top = 0
+        self.pool = []  # item ids, one per visible slot
+        self._slots = {}  # item id -> slot
+        self._shown = []  # (values, tags) last written to each slot
+        self._shown_sel = ()  # items last passed to selection_set
+        self.selected = set()  # logical row indices
+        self.anchor = None  # fixed end of a Shift range
+        self.cursor = None  # moving end (last clicked / keyed row)
+        tree.bind('<Button-1>', self._on_click)
+        tree.bind('<Shift-Button-1>', self._on_shift_click)
+        tree.bind('<Control-Button-1>', self._on_ctrl_click)
+        tree.bind('<Up>', lambda e: self._on_key(-1, extend=False))
+        tree.bind('<Down>', lambda e: self._on_key(1, extend=False))
+        tree.bind('<Shift-Up>', lambda e: self._on_key(-1, extend=True))
+        tree.bind('<Shift-Down>', lambda e: self._on_key(1, extend=True))
+
+    # ------------------------------------------------------------ MODEL
+    def set_count(self, count, reset=True):
+        """Resize to ``count`` logical rows; ``reset`` drops selection and scrolls to the top."""
+        self.count = count
+        if reset:
+            self.top = 0
+            self.selected.clear()
+            self.anchor = self.cursor = None
+        else:
+            self.selected = {i for i in self.selected if i < count}
+        want = min(count, self.visible_rows)
+        while len(self.pool) < want:
+            item = self.tree.insert('', 'end', values=('', ''))
+            self._slots[item] = len(self.pool)
+            self.pool.append(item)
+            self._shown.append(None)
+        if len(self.pool) > want:
+            self.tree.delete(*self.pool[want:])
+            for item in self.pool[want:]:
+                del self._slots[item]
+            del self.pool[want:]
+            del self._shown[want:]
+        self.tree.configure(height=max(1, want))
+        self._clamp_top()
+        self.render()
+
+    def remove_rows(self, removed):
+        """Drop logical rows ``removed``; selection and the scroll position follow the remaining rows."""
+        removed = sorted(removed)
+        gone = set(removed)
+
+        def shift(i):
+            return i - bisect_left(removed, i)
+
+        self.selected = {shift(i) for i in self.selected if i not in gone}
+        self.anchor = None if self.anchor is None else shift(self.anchor)
+        self.cursor = None if self.cursor is None else shift(self.cursor)
+        self.top = shift(self.top)
+        self.set_count(self.count - len(removed), reset=False)
+
+    def _clamp_top(self):
+        self.top = max(0, min(self.top, self.count - len(self.pool)))
+
+    def visible_range(self):
+        return range(self.top, self.top + len(self.pool))
+
+    def index_of(self, item):
+        """Logical index shown by pool ``item`` (None if not a pool item)."""
+        slot = self._slots.get(item)
+        return None if slot is None else self.top + slot
+
+    def item_of(self, index):
+        """Pool item currently showing logical row ``index`` (None if off-screen)."""
+        slot = index - self.top
+        if 0 <= slot < len(self.pool):
+            return self.pool[slot]
+        return None
+
+    # ------------------------------------------------------------ RENDER
+    def render(self):
+        """Refill the whole visible window (after scrolling or a new listing)."""
+        self.refresh()
+        if self.on_scroll:
+            self.on_scroll(*self.yview())
+
+    def refresh(self, lo=0, hi=None):
+        """Re-render visible rows in [lo, hi) whose content changed; returns rows written."""
+        hi = self.count if hi is None else hi
+        first = max(lo, self.top)
+        last = min(hi, self.top + len(self.pool))
+        written = 0
+        for idx in range(first, last):
+            slot = idx - self.top
+            row = self.row_provider(idx)
+            if self._shown[slot] != row:
+                values, tags = row
+                self.tree.item(self.pool[slot], values=values, tags=tags)
+                self._shown[slot] = row
+                written += 1
+        self._sync_selection()
+        return written
+
+    def refresh_rows(self, indices):
+        for idx in indices:
+            if self.top <= idx < self.top + len(self.pool):
+                self.refresh(idx, idx + 1)
+
+    def _sync_selection(self):
+        shown = tuple(item for item, idx in zip(self.pool, self.visible_range()) if idx in self.selected)
+        if shown != self._shown_sel:
+            self.tree.selection_set(shown)
+            self._shown_sel = shown
+
+    # ------------------------------------------------------------ SCROLL
+    def yview(self):
+        if self.count <= 0:
+            return 0.0, 1.0
+        return self.top / self.count, (self.top + len(self.pool)) / self.count
+
+    def scroll_to(self, top):
+        old = self.top
+        self.top = top
+        self._clamp_top()
+        if self.top != old:
+            self.render()
+
+    def scroll_units(self, delta):
+        self.scroll_to(self.top + delta)
+
+    def yview_moveto(self, fraction):
+        self.scroll_to(int(round(fraction * self.count)))
+
+    def see(self, index):
+        if index < self.top:
+            self.scroll_to(index)
+        elif index >= self.top + len(self.pool):
+            self.scroll_to(index - len(self.pool) + 1)
+
+    # ------------------------------------------------------------ SELECTION
+    def selection(self):
+        return sorted(self.selected)
+
+    def selection_set(self, indices, anchor=None, cursor=None):
+        self.selected = {i for i in indices if 0 <= i < self.count}
+        if anchor is not None:
+            self.anchor = anchor
+        if cursor is not None:
+            self.cursor = cursor
+        self._sync_selection()
+
+    def _event_index(self, event):
+        # Headings and column separators keep the default Treeview bindings
+        if self.tree.identify_region(event.x, event.y) not in ('cell', 'tree'):
+            return None
+        return self.index_of(self.tree.identify_row(event.y))
+
+    def _on_click(self, event):
+        idx = self._event_index(event)
+        if idx is None:
+            return None
+        self.tree.focus_set()
+        self.selection_set([idx], anchor=idx, cursor=idx)
+        return 'break'
+
+    def _on_ctrl_click(self, event):
+        idx = self._event_index(event)
+        if idx is None:
+            return None
+        self.selected ^= {idx}
+        self.anchor = self.cursor = idx
+        self._sync_selection()
+        return 'break'
+
+    def _on_shift_click(self, event):
+        idx = self._event_index(event)
+        if idx is None:
+            return None
+        self._select_to(idx)
+        return 'break'
+
+    def _select_to(self, idx):
+        anchor = idx if self.anchor is None else self.anchor
+        lo, hi = sorted((anchor, idx))
+        self.selection_set(range(lo, hi + 1), anchor=anchor, cursor=idx)
+
+    def _on_key(self, delta, extend):
+        if not self.count:
+            return 'break'
+        cur = self.cursor if self.cursor is not None else self.top - delta
+        idx = max(0, min(self.count - 1, cur + delta))
+        if extend:
+            self._select_to(idx)
+        else:
+            self.selection_set([idx], anchor=idx, cursor=idx)
+        self.see(idx)
+        return 'break'
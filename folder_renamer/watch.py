@@ -0,0 +1,263 @@
+"""
+Live folder watching.
+
+On Linux the folder is watched with inotify (through ctypes, no extra
+dependency); elsewhere, or when inotify is unavailable, a cheap poll of the
+folder's mtime triggers a re-scan that is diffed against the previous one.
+Either way the watcher produces small change events that the GUI applies to
+its cached listing, so the preview stays correct without full rescans:
+
+    ('add', FileRecord)          new regular file (or one moved in)
+    ('update', FileRecord)       size/mtime changed (e.g. writer closed it)
+    ('remove', name)             file deleted or moved out
+    ('rename', old, FileRecord)  renamed inside the folder
+    ('other', name)              a non-file entry appeared (keeps conflict checks honest)
+    ('rescan',)                  events were lost; re-list the folder
+
+``watch_job(listing)`` returns a TaskRunner job that streams ``(events, stamp)``
+batches through ``task.partial``. ``stamp`` is the folder stamp the listing
+matches once the events are applied, or None while changes are still
+arriving (the listing counts as stale until then). The tool's own journal and
+temporary names, and files the listing's scan filter leaves out, are reported
+as non-file entries, like the scan does.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import stat
+import struct
+import sys
+import time
+
+from .scan import FileRecord, RESERVED_PREFIX, folder_stamp, iter_records
+
+# inotify constants (linux/inotify.h)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+
+
+class Inotify:
+    """Minimal inotify binding for a single folder."""
+
+    def __init__(self, folder):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch failed for {folder}")
+
+    def wait(self, timeout):
+        r, _, _ = select.select([self.fd], [], [], timeout)
+        return bool(r)
+
+    def read(self):
+        """Drain pending events as (mask, cookie, name) tuples."""
+        events = []
+        while True:
+            try:
+                buf = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return events
+            pos = 0
+            while pos < len(buf):
+                _, mask, cookie, length = _EVENT.unpack_from(buf, pos)
+                pos += _EVENT.size
+                name = os.fsdecode(buf[pos:pos + length].rstrip(b'\0'))
+                pos += length
+                events.append((mask, cookie, name))
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available():
+    return sys.platform.startswith('linux') and bool(ctypes.util.find_library('c'))
+
+
+def _record(folder, name, file_filter=None):
+    """FileRecord for ``name``; None if it is gone, not a file, one of ours or filtered out."""
+    if name.startswith(RESERVED_PREFIX) or file_filter and not file_filter.keep_name(name):
+        return None
+    try:
+        st = os.stat(os.path.join(folder, name))
+    except OSError:
+        return None
+    if not stat.S_ISREG(st.st_mode):
+        return None
+    if file_filter and file_filter.uses_stat and not file_filter.keep_stat(st.st_size, st.st_mtime, time.time()):
+        return None
+    return FileRecord(name, st.st_size, st.st_mtime)
+
+
+def _exists(folder, name):
+    return os.path.lexists(os.path.join(folder, name))
+
+
+def translate(folder, raw, file_filter=None):
+    """Turn raw inotify (mask, cookie, name) tuples into change events."""
+    events = []
+    moved_from = {}
+    for mask, cookie, name in raw:
+        if mask & IN_Q_OVERFLOW or mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+            return [('rescan',)]
+        if not name:
+            continue
+        if mask & IN_MOVED_FROM:
+            moved_from[cookie] = name
+        elif mask & IN_MOVED_TO:
+            old = moved_from.pop(cookie, None)
+            rec = _record(folder, name, file_filter)
+            if old is not None and rec is not None:
+                events.append(('rename', old, rec))
+            else:
+                if old is not None:
+                    events.append(('remove', old))
+                events.append(('add', rec) if rec is not None else ('other', name))
+        elif mask & IN_CREATE:
+            rec = _record(folder, name, file_filter)
+            if rec is not None:
+                events.append(('add', rec))
+            elif _exists(folder, name):
+                events.append(('other', name))
+        elif mask & IN_DELETE:
+            events.append(('remove', name))
+        elif mask & (IN_CLOSE_WRITE | IN_ATTRIB):
+            rec = _record(folder, name, file_filter)
+            if rec is not None:
+                events.append(('update', rec))
+            elif file_filter and _exists(folder, name):
+                events.append(('other', name))  # no longer passes the filter (e.g. size bound)
+    # Moved out of the folder (no matching MOVED_TO in this batch)
+    events.extend(('remove', name) for name in moved_from.values())
+    return events
+
+
+def diff_snapshots(before, after):
+    """Events turning snapshot ``before`` into ``after`` ({name: FileRecord}).
+
+    A vanished and an appeared file sharing a (size, mtime) that no other
+    vanished or appeared file has are reported as a rename, which is what a
+    poll sees when a file is renamed.
+    """
+    removed = _by_identity(before[n] for n in before if n not in after)
+    added = _by_identity(after[n] for n in after if n not in before)
+    events = []
+    for key, olds in removed.items():
+        news = added.get(key, ())
+        if len(olds) == 1 and len(news) == 1:
+            events.append(('rename', olds[0].name, news[0]))
+            del added[key]
+        else:
+            events.extend(('remove', rec.name) for rec in olds)
+    events.extend(('add', rec) for news in added.values() for rec in news)
+    return events + _updates(before, after)
+
+
+def _by_identity(records):
+    groups = {}
+    for rec in records:
+        groups.setdefault((rec.size, rec.mtime), []).append(rec)
+    return groups
+
+
+def _updates(before, after):
+    return [('update', rec) for n, rec in after.items()
+            if n in before and before[n] != rec]
+
+
+def _snapshot(folder, file_filter=None):
+    others = set()
+    return {rec.name: rec for rec in iter_records(folder, others, file_filter)}, others
+
+
+def _catch_up(task, folder, known, others, file_filter=None):
+    """Diff a fresh scan against the last known state; returns the new state.
+
+    The stamp sent along is taken before the scan, so a change racing with it
+    still shows the listing as stale.
+    """
+    stamp = folder_stamp(folder)
+    new_known, new_others = _snapshot(folder, file_filter)
+    events = diff_snapshots(known, new_known)
+    events.extend(('other', n) for n in new_others - others)
+    events.extend(('remove', n) for n in others - new_others)
+    task.partial((events, stamp))
+    return stamp, new_known, new_others
+
+
+def watch_job(listing, poll_interval=1.0, quiet=0.25, force_poll=False, file_filter=None):
+    """TaskRunner job that keeps ``listing`` current until the task is cancelled.
+
+    Watching starts from the listing itself: whatever changed between its scan
+    and the watch being set up is caught up with one diffing re-scan first.
+    ``file_filter`` should be the filter the listing was scanned with.
+    """
+    folder = listing.folder
+    known = {rec.name: rec for rec in listing.records}
+    others = listing.others | listing.skipped
+
+    def job(task):
+        watcher = None
+        if not force_poll and inotify_available():
+            try:
+                watcher = Inotify(folder)
+            except OSError:
+                watcher = None
+        try:
+            state = (listing.stamp, known, others)
+            if folder_stamp(folder) != listing.stamp:
+                state = _catch_up(task, folder, known, others, file_filter)
+            if watcher is not None:
+                _run_inotify(task, folder, watcher, quiet, file_filter)
+            else:
+                _run_poll(task, folder, poll_interval, *state, file_filter)
+        except OSError:
+            task.partial(([('rescan',)], None))  # folder gone or unreadable
+        finally:
+            if watcher is not None:
+                watcher.close()
+    return job
+
+
+def _run_inotify(task, folder, watcher, quiet, file_filter):
+    dirty = False
+    while not task.cancelled:
+        if watcher.wait(quiet):
+            events = translate(folder, watcher.read(), file_filter)
+            if events:
+                task.partial((events, None))
+                dirty = True
+        elif dirty:
+            # Quiet for a moment: every change so far has been delivered,
+            # unless one slipped in while stamping
+            stamp = folder_stamp(folder)
+            if not watcher.wait(0):
+                task.partial(([], stamp))
+                dirty = False
+
+
+def _run_poll(task, folder, interval, stamp, known, others, file_filter):
+    while not task.cancelled:
+        time.sleep(interval)
+        if folder_stamp(folder) != stamp:
+            stamp, known, others = _catch_up(task, folder, known, others, file_filter)
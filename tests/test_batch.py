@@ -0,0 +1,45 @@
+import os
+
+from folder_renamer import cli
+from folder_renamer.batch import leaf_folders
+from folder_renamer.filters import compile_filter
+
+
+def make_tree(root, files):
+    for path in files:
+        full = root / path
+        full.parent.mkdir(parents=True, exist_ok=True)
+        if not path.endswith('/'):
+            full.write_text(path)
+    return str(root)
+
+
+TREE = ['Show/poster.jpg', 'Show/Season 1/b.mkv', 'Show/Season 1/a.mkv', 'Show/Season 1/Subs/a.srt',
+        'Show/Season 2/x.mkv', 'Show/Season 3/Episode 01.mkv', 'Show/Extras/empty/', 'Show/Notes/readme.txt']
+
+
+def rel(root, folders):
+    return [os.path.relpath(f, root) for f in folders]
+
+
+def test_leaf_folders_report_the_folders_they_pass_over(tmp_path):
+    root = make_tree(tmp_path, TREE)
+    passed_over = []
+    leaves = leaf_folders(root, passed_over=passed_over)
+    assert rel(root, leaves) == ['Show/Notes', 'Show/Season 1/Subs', 'Show/Season 2', 'Show/Season 3']
+    assert rel(root, passed_over) == ['Show', 'Show/Season 1']
+    passed_over = []
+    leaves = leaf_folders(root, compile_filter('.mkv'), passed_over)
+    assert rel(root, leaves) == ['Show/Season 2', 'Show/Season 3']
+    assert rel(root, passed_over) == ['Show/Season 1']
+
+
+def test_batch_summary(tmp_path, capsys):
+    root = make_tree(tmp_path, TREE)
+    assert cli.main(['batch', root, '--filter', '.mkv', '-P', '1']) == 0
+    out = capsys.readouterr().out
+    assert 'Show/Season 2: renamed 1' in out
+    assert 'Season 3' not in out  # already numbered: counted, not listed
+    assert '2 of 2 folders ok, 1 already numbered, 1 files renamed' in out
+    assert out.rstrip().endswith("sub-folders (use 'rename' on them):\n  Show/Season 1")
+    assert sorted(os.listdir(tmp_path / 'Show' / 'Season 1')) == ['Subs', 'a.mkv', 'b.mkv']
@@ -0,0 +1,70 @@
+import os
+import time
+
+from folder_renamer import scan
+from folder_renamer.cache import ListingCache
+from folder_renamer.filters import compile_filter
+
+
+def make_folder(path, names):
+    path.mkdir()
+    for name in names:
+        (path / name).write_text(name)
+    settle(path)
+    return str(path)
+
+
+def settle(path):
+    # Entries of folders changed in the last couple of seconds are not trusted
+    old = time.time() - 60
+    os.utime(path, (old, old))
+
+
+def cached_names(cache, folder, file_filter=None):
+    hit = cache.load(folder, file_filter)
+    return None if hit is None else ([r.name for r in hit[0].records], hit[1])
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ListingCache(str(tmp_path / 'cache'))
+    folder = make_folder(tmp_path / 'show', ['b.mkv', 'a.mkv'])
+    assert cache.load(folder) is None
+    listing = scan.scan_listing(folder)
+    listing.records.sort()
+    assert cache.save(listing, manual=True)
+    assert cached_names(cache, folder) == (['a.mkv', 'b.mkv'], True)
+    # Saved for another filter: a miss
+    assert cache.load(folder, compile_filter('.mp4')) is None
+
+
+def test_small_unarranged_folders_are_not_cached(tmp_path):
+    cache = ListingCache(str(tmp_path / 'cache'))
+    folder = make_folder(tmp_path / 'show', ['a.mkv'])
+    assert not cache.save(scan.scan_listing(folder))
+    assert cache.load(folder) is None
+
+
+def test_folder_change_invalidates(tmp_path):
+    cache = ListingCache(str(tmp_path / 'cache'))
+    folder = make_folder(tmp_path / 'show', ['a.mkv', 'b.mkv'])
+    assert cache.save(scan.scan_listing(folder), manual=True)
+    (tmp_path / 'show' / 'c.mkv').write_text('c')
+    assert cache.load(folder) is None
+
+
+def test_recent_change_is_not_cached(tmp_path):
+    cache = ListingCache(str(tmp_path / 'cache'))
+    folder = make_folder(tmp_path / 'show', ['a.mkv'])
+    (tmp_path / 'show' / 'b.mkv').write_text('b')
+    assert not cache.save(scan.scan_listing(folder), manual=True)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ListingCache(str(tmp_path / 'cache'), max_entries=2)
+    folders = [make_folder(tmp_path / name, ['a.mkv']) for name in ('one', 'two', 'three')]
+    for i, folder in enumerate(folders[:2]):
+        assert cache.save(scan.scan_listing(folder), manual=True)
+        os.utime(cache._path(folder), (1000 + i, 1000 + i))
+    assert cached_names(cache, folders[0]) is not None  # 'one' becomes the most recently used
+    assert cache.save(scan.scan_listing(folders[2]), manual=True)
+    assert [cached_names(cache, f) is not None for f in folders] == [True, False, True]
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from folder_renamer import cli, journal
+from folder_renamer.errors import RenameError
+
+
+def make_folder(path, names):
+    for name in names:
+        (path / name).write_text(name)
+    return str(path)
+
+
+def listing(folder):
+    return sorted(name for name in os.listdir(folder) if name != journal.JOURNAL_NAME)
+
+
+RENAMED = ['Episode 01.mkv', 'Episode 02.mkv', 'Episode 03.mkv']
+
+
+@pytest.mark.parametrize('extra', [['--prefix', 'A:'], ['--template', '{prefix}{ext}']])
+def test_rejected_plan_does_not_offer_rollback(tmp_path, capsys, extra):
+    # A committed journal from the first run must not be offered for rollback
+    # when the second run is rejected before anything is renamed
+    folder = make_folder(tmp_path, ['a.mkv', 'b.mkv', 'c.mkv'])
+    assert cli.main(['rename', folder]) == 0
+    capsys.readouterr()
+    assert cli.main(['rename', folder] + extra) == 1
+    err = capsys.readouterr().err
+    assert 'Aborting.' in err and 'Journal kept' not in err
+    assert listing(folder) == RENAMED
+
+
+def test_failed_rename_offers_recovery(tmp_path, capsys, monkeypatch):
+    folder = make_folder(tmp_path, ['a.mkv', 'b.mkv'])
+    real = journal.execute_plan
+
+    def failing(folder, plan, workers, progress=None, should_stop=None, on_step=None):
+        # The first step lands, then the batch fails
+        done = [0]
+        real(folder, plan, 1, lambda k, total: done.__setitem__(0, k), lambda: done[0] >= 1, on_step)
+        raise RenameError("simulated failure")
+
+    monkeypatch.setattr(journal, 'execute_plan', failing)
+    assert cli.main(['rename', folder]) == 1
+    assert 'Journal kept' in capsys.readouterr().err
+    monkeypatch.undo()
+    assert cli.main(['rollback', folder]) == 0
+    assert listing(folder) == ['a.mkv', 'b.mkv']
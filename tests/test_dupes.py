@@ -0,0 +1,70 @@
+import pytest
+
+from folder_renamer import dupes, scan
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Partial hashes over 16-byte head/tail blocks, so tiny files take every path
+    monkeypatch.setattr(dupes, 'PARTIAL_BYTES', 16)
+    full = []
+    real = dupes._full_hash
+
+    def counted(path, should_stop):
+        full.append(path.rsplit('/', 1)[-1])
+        return real(path, should_stop)
+
+    monkeypatch.setattr(dupes, '_full_hash', counted)
+    return full
+
+
+def make_folder(path, files):
+    for name, data in files.items():
+        (path / name).write_bytes(data)
+    return str(path)
+
+
+HEAD, TAIL = b'h' * 16, b't' * 16
+FILES = {
+    'a.mkv': HEAD + b'middle one' + TAIL,
+    'b.mkv': HEAD + b'middle two' + TAIL,  # same size, head and tail as a.mkv
+    'c.mkv': HEAD + b'middle one' + TAIL,  # a copy of a.mkv
+    'd.mkv': b'short',
+    'e.mkv': b'shorT',  # same size as d.mkv, fully covered by the partial hash
+    'f.mkv': b'short',  # a copy of d.mkv
+    'g.mkv': b'x' * 50,  # a size of its own is never read
+    'h.mkv': HEAD + b'other size' + b'!' + TAIL,
+    'empty1.mkv': b'',
+    'empty2.mkv': b'',
+}
+
+
+def test_size_then_partial_then_full_hash(tmp_path, small_blocks):
+    folder = make_folder(tmp_path, FILES)
+    records = sorted(scan.scan_folder(folder))
+    assert dupes.find_duplicates(folder, records) == [['a.mkv', 'c.mkv'], ['d.mkv', 'f.mkv']]
+    # Only the large same-size files whose head and tail agree are read in full
+    assert sorted(small_blocks) == ['a.mkv', 'b.mkv', 'c.mkv']
+
+
+def test_groups_follow_the_numbering_order(tmp_path, small_blocks):
+    folder = make_folder(tmp_path, FILES)
+    records = sorted(scan.scan_folder(folder), reverse=True)
+    groups = dupes.find_duplicates(folder, records)
+    assert groups == [['f.mkv', 'd.mkv'], ['c.mkv', 'a.mkv']]
+    assert dupes.duplicate_extras(groups) == {'d.mkv': 'f.mkv', 'a.mkv': 'c.mkv'}
+
+
+def test_drop_duplicates_keeps_them_taken(tmp_path, small_blocks):
+    folder = make_folder(tmp_path, FILES)
+    listing = scan.scan_listing(folder)
+    listing.records.sort()
+    extras = dupes.duplicate_extras(dupes.find_duplicates(folder, listing.records))
+    assert dupes.drop_duplicates(listing, extras) == 2
+    assert {'c.mkv', 'f.mkv'} <= listing.taken_names()
+    assert [r.name for r in listing.records if r.name in FILES] == sorted(set(FILES) - {'c.mkv', 'f.mkv'})
+
+
+def test_stop(tmp_path, small_blocks):
+    folder = make_folder(tmp_path, FILES)
+    assert dupes.find_duplicates(folder, scan.scan_folder(folder), should_stop=lambda: True) is None
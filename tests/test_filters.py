@@ -0,0 +1,28 @@
+import pytest
+
+from folder_renamer.errors import FilterError
+from folder_renamer.filters import compile_filter
+
+
+def kept(spec, names):
+    f = compile_filter(spec)
+    return [name for name in names if f.keep_name(name)]
+
+
+NAMES = ['Show S01E01.mkv', 'show s01e02.MP4', 'sample.mkv', 'notes.nfo', 'FOO.txt']
+
+
+def test_extensions_globs_and_excludes():
+    assert kept('.mkv .mp4 !*sample*', NAMES) == ['Show S01E01.mkv', 'show s01e02.MP4']
+    assert kept('!.nfo', NAMES) == ['Show S01E01.mkv', 'show s01e02.MP4', 'sample.mkv', 'FOO.txt']
+
+
+def test_regex_terms_keep_their_own_flags_and_groups():
+    assert kept('re:(?i)foo re:sample', NAMES) == ['sample.mkv', 'FOO.txt']
+    assert kept(r're:(s)\d+e\1 re:(o)\1', ['s1es', 'foo', 'bar']) == ['s1es', 'foo']
+    assert kept('!re:(?i)^show', NAMES) == ['sample.mkv', 'notes.nfo', 'FOO.txt']
+
+
+def test_bad_regex():
+    with pytest.raises(FilterError):
+        compile_filter('re:(')
@@ -0,0 +1,228 @@
+import json
+import os
+
+import pytest
+
+from folder_renamer import executor, journal
+from folder_renamer.errors import RenameError
+from folder_renamer.planner import TEMP_PREFIX, plan_moves
+from folder_renamer.preflight import name_key
+
+
+def make_folder(path, names):
+    for name in names:
+        (path / name).write_text(name)
+    return str(path)
+
+
+def contents(folder):
+    # {current name: original name} for every file but the journal
+    return {name: open(os.path.join(folder, name)).read()
+            for name in os.listdir(folder) if name != journal.JOURNAL_NAME}
+
+
+# A new first file shifts a numbered folder (a chain), plus a swap (a cycle)
+BEFORE = ['new.mkv', 'Episode 01.mkv', 'Episode 02.mkv', 'x.mkv', 'y.mkv']
+MOVES = {'new.mkv': 'Episode 01.mkv', 'Episode 01.mkv': 'Episode 02.mkv', 'Episode 02.mkv': 'Episode 03.mkv',
+         'x.mkv': 'y.mkv', 'y.mkv': 'x.mkv'}
+AFTER = {dst: src for src, dst in MOVES.items()}
+ORIGINAL = {name: name for name in BEFORE}
+
+
+def test_plan_orders_chains_and_cycles():
+    plan = plan_moves(MOVES, set(BEFORE))
+    assert len(plan.chains) == 2
+    assert plan.temp_count == 1 and plan.file_count == 5
+    chain = next(c for c in plan.chains if ('new.mkv', 'Episode 01.mkv') in c)
+    assert chain == [('Episode 02.mkv', 'Episode 03.mkv'), ('Episode 01.mkv', 'Episode 02.mkv'),
+                     ('new.mkv', 'Episode 01.mkv')]
+
+
+def test_run_and_rollback(tmp_path):
+    folder = make_folder(tmp_path, BEFORE)
+    journal.run_journaled(folder, plan_moves(MOVES, set(BEFORE)))
+    assert contents(folder) == AFTER
+    journal.rollback(folder)
+    assert contents(folder) == ORIGINAL
+    with pytest.raises(RenameError):
+        journal.rollback(folder)  # never re-applies the batch
+    assert contents(folder) == ORIGINAL
+
+
+def _stop_after(n):
+    done = [0]
+
+    def progress(k, total):
+        done[0] = k
+
+    return progress, lambda: done[0] >= n
+
+
+STEPS = len(plan_moves(MOVES, set(BEFORE)))
+
+
+@pytest.mark.parametrize('stop', range(STEPS + 1))
+def test_stop_then_resume_then_rollback(tmp_path, stop):
+    folder = make_folder(tmp_path, BEFORE)
+    progress, should_stop = _stop_after(stop)
+    stats = journal.run_journaled(folder, plan_moves(MOVES, set(BEFORE)), 1, progress, should_stop)
+    if stats.stopped:
+        journal.resume(folder)
+    assert contents(folder) == AFTER
+    journal.rollback(folder)  # undoes the whole batch, resumed steps or not
+    assert contents(folder) == ORIGINAL
+
+
+@pytest.mark.parametrize('stop', range(STEPS))
+def test_stop_then_rollback(tmp_path, stop):
+    folder = make_folder(tmp_path, BEFORE)
+    progress, should_stop = _stop_after(stop)
+    journal.run_journaled(folder, plan_moves(MOVES, set(BEFORE)), 1, progress, should_stop)
+    journal.rollback(folder)
+    assert contents(folder) == ORIGINAL
+
+
+def _drop_lazy_markers(folder):
+    # Simulates a crash before the group commit: only the forced park-to-temp
+    # markers (and the plan) reached the disk
+    path = journal.journal_path(folder)
+    lines, chains = [], []
+    for line in open(path):
+        rec = json.loads(line)
+        if 'c' in rec:
+            chains.append(rec['steps'])
+        if 'd' in rec:
+            ci, k = rec['d']
+            if not chains[ci][k - 1][1].startswith(TEMP_PREFIX):
+                continue
+        lines.append(line)
+    with open(path, 'w') as fh:
+        fh.writelines(lines)
+
+
+@pytest.mark.parametrize('stop', range(STEPS))
+def test_crash_recovery_from_the_folder(tmp_path, stop):
+    folder = make_folder(tmp_path, BEFORE)
+    progress, should_stop = _stop_after(stop)
+    journal.run_journaled(folder, plan_moves(MOVES, set(BEFORE)), 1, progress, should_stop)
+    _drop_lazy_markers(folder)
+    with pytest.raises(RenameError):
+        journal.run_journaled(folder, plan_moves({'a': 'b'}))  # the unfinished batch comes first
+    journal.resume(folder)
+    assert contents(folder) == AFTER
+    journal.rollback(folder)
+    assert contents(folder) == ORIGINAL
+
+
+def test_interrupted_rollback_is_finished_not_reversed(tmp_path):
+    folder = make_folder(tmp_path, BEFORE)
+    journal.run_journaled(folder, plan_moves(MOVES, set(BEFORE)))
+    state = journal.read_journal(folder)
+    plan = journal.rollback_plan(state, journal.recover_progress(folder, state))
+    progress, should_stop = _stop_after(1)
+    j = journal.Journal(folder).open(plan, undo=True)
+    try:
+        journal.execute_plan(folder, plan, 1, progress, should_stop, on_step=j.mark)
+    finally:
+        j.close()
+    journal.rollback(folder)
+    assert contents(folder) == ORIGINAL
+
+
+def test_rollback_never_replaces_a_new_file(tmp_path):
+    folder = make_folder(tmp_path, ['aaa.mkv', 'bbb.mkv'])
+    journal.run_journaled(folder, plan_moves({'aaa.mkv': 'Episode 01.mkv', 'bbb.mkv': 'Episode 02.mkv'},
+                                             {'aaa.mkv', 'bbb.mkv'}))
+    (tmp_path / 'aaa.mkv').write_text('new')
+    with pytest.raises(RenameError, match='aaa.mkv'):
+        journal.rollback(folder)
+    assert contents(folder) == {'aaa.mkv': 'new', 'Episode 01.mkv': 'aaa.mkv', 'Episode 02.mkv': 'bbb.mkv'}
+
+
+def test_rollback_needs_every_file(tmp_path):
+    folder = make_folder(tmp_path, ['aaa.mkv'])
+    journal.run_journaled(folder, plan_moves({'aaa.mkv': 'Episode 01.mkv'}, {'aaa.mkv'}))
+    os.remove(os.path.join(folder, 'Episode 01.mkv'))
+    with pytest.raises(RenameError, match='Episode 01.mkv'):
+        journal.rollback(folder)
+
+
+def test_rename_refuses_an_existing_target(tmp_path):
+    # The plan thinks 'b' is free; the file created since must survive
+    folder = make_folder(tmp_path, ['a', 'b'])
+    with pytest.raises(RenameError):
+        journal.run_journaled(folder, plan_moves({'a': 'b'}, {'a'}))
+    assert contents(folder) == {'a': 'a', 'b': 'b'}
+
+
+FOLDED = {'a.mkv': 'Episode 02.mkv', 'EPISODE 02.mkv': 'Episode 03.mkv'}
+
+
+@pytest.mark.parametrize('stop', range(3))
+def test_case_insensitive_chain_recovers(tmp_path, stop):
+    folder = make_folder(tmp_path, FOLDED)
+    plan = plan_moves(FOLDED, set(FOLDED), name_key)
+    progress, should_stop = _stop_after(stop)
+    journal.run_journaled(folder, plan, 1, progress, should_stop)
+    _drop_lazy_markers(folder)
+    if stop < len(plan):
+        journal.resume(folder)
+    assert contents(folder) == {dst: src for src, dst in FOLDED.items()}
+    journal.rollback(folder)
+    assert contents(folder) == {name: name for name in FOLDED}
+
+
+class Crash(BaseException):
+    pass
+
+
+def _link_fallback(monkeypatch, unlink_fails):
+    # No renameat2: every step is a hard link plus an unlink of the old name
+    monkeypatch.setattr(executor, '_renameat2', lambda: None)
+    unlink = os.unlink
+
+    def failing(path, *, dir_fd=None):
+        if unlink_fails():
+            raise Crash() if unlink_fails.crash else PermissionError(13, 'Permission denied', path)
+        unlink(path, dir_fd=dir_fd)
+
+    monkeypatch.setattr(os, 'unlink', failing)
+
+
+def _after(n, crash=True):
+    calls = [0]
+
+    def fails():
+        calls[0] += 1
+        return calls[0] == n + 1  # only the unlink of step n + 1
+
+    fails.crash = crash
+    return fails
+
+
+@pytest.mark.parametrize('stop', range(STEPS))
+@pytest.mark.parametrize('action', [journal.resume, journal.rollback])
+def test_crash_between_link_and_unlink_is_finished(tmp_path, monkeypatch, stop, action):
+    folder = make_folder(tmp_path, BEFORE)
+    _link_fallback(monkeypatch, _after(stop))
+    with pytest.raises(Crash):
+        journal.run_journaled(folder, plan_moves(MOVES, set(BEFORE)), 1)
+    monkeypatch.undo()
+    assert len(contents(folder)) == len(BEFORE) + 1  # one file under two names
+    _drop_lazy_markers(folder)
+    action(folder)
+    if action is journal.resume:
+        assert contents(folder) == AFTER
+        journal.rollback(folder)
+    assert contents(folder) == ORIGINAL
+
+
+def test_failed_unlink_takes_the_link_back(tmp_path, monkeypatch):
+    folder = make_folder(tmp_path, BEFORE)
+    _link_fallback(monkeypatch, _after(2, crash=False))
+    with pytest.raises(RenameError, match='Permission denied'):
+        journal.run_journaled(folder, plan_moves(MOVES, set(BEFORE)), 1)
+    monkeypatch.undo()
+    assert len(contents(folder)) == len(BEFORE)
+    journal.rollback(folder)
+    assert contents(folder) == ORIGINAL
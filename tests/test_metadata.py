@@ -0,0 +1,123 @@
+import calendar
+import struct
+
+from folder_renamer import core
+from folder_renamer.metadata import NO_META, MediaMeta, read_media_meta
+
+
+def utc(*fields):
+    return float(calendar.timegm(fields + (0,) * (6 - len(fields)) + (0, 0, 0)))
+
+
+# ------------------------------------------------------------ MP4
+def box(kind, payload):
+    return struct.pack('>I4s', 8 + len(payload), kind) + payload
+
+
+def ilst_item(kind, value, data_type=21):
+    return box(kind, box(b'data', struct.pack('>II', data_type, 0) + value))
+
+
+def write_mp4(path, episode=None, season=None, day=None, created=0, gap=0):
+    items = b''
+    if episode is not None:
+        items += ilst_item(b'tves', struct.pack('>I', episode))
+    if season is not None:
+        items += ilst_item(b'tvsn', struct.pack('>I', season))
+    if day:
+        items += ilst_item(b'\xa9day', day.encode(), 1)
+    meta = box(b'meta', b'\0\0\0\0' + box(b'hdlr', b'\0' * 25) + box(b'ilst', items))
+    mvhd = box(b'mvhd', b'\0\0\0\0' + struct.pack('>I', created) + b'\0' * 92)
+    with open(path, 'wb') as fh:
+        fh.write(box(b'ftyp', b'isom\0\0\0\0isom'))
+        # A 64-bit mdat before the moov, skipped by its header
+        fh.write(struct.pack('>I4sQ', 1, b'mdat', 16 + gap) + b'\0' * gap)
+        fh.write(box(b'moov', mvhd + box(b'udta', meta)))
+
+
+def test_mp4_episode_and_season(tmp_path):
+    path = str(tmp_path / 'a.mp4')
+    write_mp4(path, episode=7, season=2, day='2020-05-01', gap=4096)
+    assert read_media_meta(path) == MediaMeta(2, 7, utc(2020, 5, 1))
+
+
+def test_mp4_creation_time_without_tags(tmp_path):
+    path = str(tmp_path / 'a.mov')
+    write_mp4(path, created=int(utc(2019, 1, 2)) + 2082844800)  # seconds since 1904
+    assert read_media_meta(path) == MediaMeta(date=utc(2019, 1, 2))
+
+
+# ------------------------------------------------------------ MATROSKA
+def element(ident, payload):
+    size = len(payload)
+    length = next(n for n in range(1, 9) if size < (1 << (7 * n)) - 1)
+    header = ident.to_bytes((ident.bit_length() + 7) // 8, 'big') + ((1 << (7 * length)) | size).to_bytes(length, 'big')
+    return header + payload
+
+
+def uint(n):
+    return n.to_bytes(max(1, (n.bit_length() + 7) // 8), 'big')
+
+
+def tag(target, name, value):
+    targets = element(0x63C0, element(0x68CA, uint(target))) if target else b''
+    return element(0x7373, targets + element(0x67C8, element(0x45A3, name) + element(0x4487, value)))
+
+
+def write_mkv(path, tags=b'', date_utc=None):
+    info = element(0x2AD7B1, uint(1000000))
+    if date_utc is not None:
+        info += element(0x4461, struct.pack('>q', int((date_utc - 978307200) * 1e9)))
+    segment = element(0x1549A966, info) + element(0x1254C367, tags) + element(0x1F43B675, b'\0' * 16)
+    with open(path, 'wb') as fh:
+        fh.write(element(0x1A45DFA3, element(0x4282, b'matroska')) + element(0x18538067, segment))
+
+
+def test_mkv_part_numbers_by_target_level(tmp_path):
+    path = str(tmp_path / 'a.mkv')
+    tags = tag(30, b'PART_NUMBER', b'9') + tag(50, b'PART_NUMBER', b'4') + tag(60, b'part_number', b'3')
+    write_mkv(path, tags + tag(0, b'DATE_RECORDED', b'2018-07-01'), date_utc=utc(2021, 1, 1))
+    assert read_media_meta(path) == MediaMeta(3, 4, utc(2018, 7, 1))
+
+
+def test_mkv_date_utc_without_tags(tmp_path):
+    path = str(tmp_path / 'a.mkv')
+    write_mkv(path, date_utc=utc(2021, 1, 1, 12))
+    assert read_media_meta(path) == MediaMeta(date=utc(2021, 1, 1, 12))
+
+
+# ------------------------------------------------------------ EXIF
+def write_jpeg(path, date, order='<'):
+    text = date.encode() + b'\0'
+    # IFD0 at 8 points to the Exif IFD at 26, whose DateTimeOriginal text sits at 44
+    ifd0 = struct.pack(order + 'HHHIII', 1, 0x8769, 4, 1, 26, 0)
+    exif = struct.pack(order + 'HHHIII', 1, 0x9003, 2, len(text), 44, 0)
+    tiff = (b'II' if order == '<' else b'MM') + struct.pack(order + 'HI', 42, 8) + ifd0 + exif + text
+    app1 = b'Exif\0\0' + tiff
+    with open(path, 'wb') as fh:
+        fh.write(b'\xff\xd8\xff\xe0' + struct.pack('>H', 16) + b'JFIF\0' + b'\0' * 9)
+        fh.write(b'\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1 + b'\xff\xda\0\x02')
+
+
+def test_exif_date_either_byte_order(tmp_path):
+    for order in '<>':
+        path = str(tmp_path / 'p.jpg')
+        write_jpeg(path, '2017:07:01 10:00:00', order)
+        assert read_media_meta(path) == MediaMeta(date=utc(2017, 7, 1, 10))
+
+
+def test_unreadable_and_other_files(tmp_path):
+    (tmp_path / 'broken.mkv').write_bytes(b'\x1a\x45\xdf\xa3garbage')
+    (tmp_path / 'short.mp4').write_bytes(b'\0\0')
+    (tmp_path / 'notes.txt').write_text('hi')
+    for name in ('broken.mkv', 'short.mp4', 'notes.txt'):
+        assert read_media_meta(str(tmp_path / name)) == NO_META
+
+
+def test_metadata_order(tmp_path):
+    write_mp4(str(tmp_path / 'b.mp4'), episode=2, season=1)
+    write_mp4(str(tmp_path / 'a.mp4'), episode=10, season=1)
+    write_mp4(str(tmp_path / 'c.mp4'), episode=1, season=2)
+    write_mkv(str(tmp_path / 'z.mkv'), tag(50, b'PART_NUMBER', b'3') + tag(60, b'PART_NUMBER', b'1'))
+    names = [r.name for r in core.list_records(str(tmp_path), 'metadata')]
+    assert names == ['b.mp4', 'z.mkv', 'a.mp4', 'c.mp4']
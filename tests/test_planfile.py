@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+from folder_renamer import cli, journal, planfile
+from folder_renamer.errors import PlanError
+
+NAMES = ['b, "quoted".mkv', 'a.mkv', 'c.mkv']
+RENAMED = ['Episode 01.mkv', 'Episode 02.mkv', 'Episode 03.mkv']
+
+
+def make_folder(path, names):
+    folder = path / 'show'
+    folder.mkdir()
+    for name in names:
+        (folder / name).write_text(name)
+    return str(folder)
+
+
+def contents(folder):
+    return {name: open(os.path.join(folder, name)).read()
+            for name in os.listdir(folder) if name != journal.JOURNAL_NAME}
+
+
+@pytest.mark.parametrize('ext', ['.jsonl', '.csv'])
+def test_export_then_apply(tmp_path, ext):
+    folder = make_folder(tmp_path, NAMES)
+    plan = str(tmp_path / ('plan' + ext))
+    assert cli.main(['rename', folder, '--export', plan]) == 0
+    assert sorted(os.listdir(folder)) == sorted(NAMES)  # exporting renames nothing
+    entries = list(planfile.iter_plan(plan))
+    assert [(e.old, e.new) for e in entries] == list(zip(sorted(NAMES), RENAMED))
+    assert cli.main(['apply', plan, folder]) == 0
+    assert contents(folder) == dict(zip(RENAMED, sorted(NAMES)))
+
+
+def test_jsonl_plan_records_its_folder(tmp_path):
+    folder = make_folder(tmp_path, NAMES)
+    plan = str(tmp_path / 'plan.jsonl')
+    planfile.write_plan(plan, planfile.plan_entries(['a.mkv'], ['x.mkv'], [1], [2.5]), folder, 1)
+    assert planfile.read_plan_header(plan) == {'folder_renamer_plan': 1, 'folder': folder, 'files': 1}
+    assert list(planfile.iter_plan(plan)) == [('a.mkv', 'x.mkv', 1, 2.5)]
+
+
+@pytest.mark.parametrize('ext', ['.jsonl', '.csv'])
+def test_stale_plan_is_rejected(tmp_path, ext):
+    folder = make_folder(tmp_path, NAMES)
+    plan = str(tmp_path / ('plan' + ext))
+    assert cli.main(['rename', folder, '--export', plan]) == 0
+    (tmp_path / 'show' / 'a.mkv').write_text('edited since')
+    os.remove(os.path.join(folder, 'c.mkv'))
+    with pytest.raises(PlanError) as info:
+        planfile.load_plan(plan, folder)
+    assert 'changed since the plan was made: a.mkv' in str(info.value)
+    assert 'missing: c.mkv' in str(info.value)
+    assert cli.main(['apply', plan, folder]) == 1
+    assert sorted(contents(folder)) == sorted(NAMES[:2])
+
+
+def test_malformed_plan(tmp_path):
+    plan = tmp_path / 'plan.csv'
+    plan.write_text('old,new,size,mtime\na.mkv,b.mkv,big,1.0\n')
+    with pytest.raises(PlanError, match='plan.csv:2'):
+        list(planfile.iter_plan(str(plan)))
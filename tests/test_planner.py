@@ -0,0 +1,61 @@
+import pytest
+
+from folder_renamer.errors import ConflictError
+from folder_renamer.planner import TEMP_PREFIX, plan_moves
+
+
+def apply(plan, names):
+    # Runs the plan on a set of names, refusing to replace one
+    names = set(names)
+    for src, dst in plan:
+        assert src in names and dst not in names, (src, dst)
+        names.remove(src)
+        names.add(dst)
+    return names
+
+
+def test_unchanged_names_are_left_out():
+    plan = plan_moves({'a': 'a', 'b': 'c'}, {'a', 'b'})
+    assert list(plan) == [('b', 'c')] and plan.file_count == 1
+
+
+def test_chain_runs_from_its_free_end():
+    moves = {'e1': 'e2', 'e2': 'e3', 'e3': 'e4'}
+    plan = plan_moves(moves, set(moves))
+    assert list(plan) == [('e3', 'e4'), ('e2', 'e3'), ('e1', 'e2')]
+    assert plan.temp_count == 0
+
+
+def test_cycles_park_one_file_under_a_free_temp_name():
+    moves = {'a': 'b', 'b': 'c', 'c': 'a', 'x': 'y', 'y': 'x'}
+    taken = set(moves) | {TEMP_PREFIX + '0'}
+    plan = plan_moves(moves, taken)
+    assert plan.temp_count == 2 and len(plan.chains) == 2
+    temps = {dst for _, dst in plan if dst.startswith(TEMP_PREFIX)}
+    assert len(temps) == 2 and TEMP_PREFIX + '0' not in temps
+    assert apply(plan, taken) == taken
+
+
+def test_independent_chains():
+    moves = {'a': 'b', 'b': 'c', 'x': 'y'}
+    plan = plan_moves(moves, set(moves))
+    assert sorted(map(len, plan.chains)) == [1, 2]
+    assert apply(plan, moves) == {'b', 'c', 'y'}
+
+
+@pytest.mark.parametrize('moves, taken', [
+    ({'a': 'c', 'b': 'c'}, {'a', 'b'}),  # two files, one name
+    ({'a': 'b'}, {'a', 'b'}),  # 'b' stays where it is
+])
+def test_conflicts(moves, taken):
+    with pytest.raises(ConflictError):
+        plan_moves(moves, taken)
+
+
+def test_case_folded_targets():
+    fold = str.casefold
+    with pytest.raises(ConflictError):
+        plan_moves({'a': 'X', 'b': 'x'}, {'a', 'b'}, fold)
+    # 'B' moves out before 'a' takes 'b' on a case-insensitive folder
+    plan = plan_moves({'a': 'b', 'B': 'c'}, {'a', 'B'}, fold)
+    assert list(plan) == [('B', 'c'), ('a', 'b')]
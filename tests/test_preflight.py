@@ -0,0 +1,65 @@
+import pytest
+
+from folder_renamer import core
+from folder_renamer.errors import ConflictError, ValidationError
+from folder_renamer.planner import plan_moves
+from folder_renamer.preflight import check_batch, name_key, name_problem
+
+
+def kinds(*args, **kwargs):
+    return [(p.index, p.kind, p.other) for p in check_batch(*args, **kwargs)]
+
+
+def test_clashes_inside_the_batch():
+    assert kinds(['a', 'b'], ['x', 'x']) == [(1, 'duplicate', 0)]
+    assert kinds(['a', 'b'], ['x', 'X']) == [(1, 'case', 0)]
+    assert kinds(['a', 'b'], ['x', 'X'], portable=False) == []
+    assert kinds(['a', 'b'], ['b', 'a']) == []
+
+
+def test_clashes_with_files_that_stay():
+    assert kinds(['a'], ['keep'], {'a', 'keep'}) == [(0, 'taken', None)]
+    assert kinds(['a'], ['KEEP'], {'a', 'keep'}) == [(0, 'case', None)]
+    assert kinds(['a'], ['é'], {'a', 'é'}) == [(0, 'case', None)]
+    assert kinds(['A', 'a'], ['A', 'a'], {'A', 'a'}) == []  # both exist already and stay
+
+
+@pytest.mark.parametrize('name, kind', [
+    ('', 'invalid'), ('..', 'invalid'), ('x/y', 'invalid'),
+    ('x' * 256, 'length'), ('é' * 128, 'length'),
+    ('x:y', 'portable'), ('x. ', 'portable'), ('con.txt', 'portable'), ('a\tb', 'portable'),
+])
+def test_name_rules(name, kind):
+    assert name_problem(name)[0] == kind
+
+
+def test_portable_rules_can_be_skipped():
+    assert name_problem('x:y', portable=False) is None
+    assert name_problem('é' * 128, portable=False)[0] == 'length'  # 256 bytes
+
+
+def test_plan_renames_reports_every_problem():
+    with pytest.raises(ValidationError) as info:
+        core.plan_renames(['a', 'b', 'c'], ['x', 'X', 'c:'])
+    assert [p.kind for p in info.value.problems] == ['case', 'portable']
+
+
+def test_case_only_source_moves_first():
+    # On a case-insensitive mount 'Episode 02.mkv' is 'EPISODE 02.mkv' until that one moves
+    moves = {'a.mkv': 'Episode 02.mkv', 'EPISODE 02.mkv': 'Episode 03.mkv'}
+    assert check_batch(list(moves), list(moves.values()), set(moves)) == []
+    plan = plan_moves(moves, set(moves), name_key)
+    assert plan.chains == [[('EPISODE 02.mkv', 'Episode 03.mkv'), ('a.mkv', 'Episode 02.mkv')]]
+    assert len(plan_moves(moves, set(moves)).chains) == 2  # exact names only: independent
+
+
+def test_case_insensitive_cycle_and_case_only_rename():
+    plan = plan_moves({'A': 'b', 'B': 'a'}, {'A', 'B'}, name_key)
+    assert plan.temp_count == 1 and len(plan.chains) == 1
+    plan = plan_moves({'episode 01': 'Episode 01'}, {'episode 01'}, name_key)
+    assert plan.chains == [[('episode 01', 'Episode 01')]] and plan.temp_count == 0
+
+
+def test_folded_duplicate_targets_conflict():
+    with pytest.raises(ConflictError):
+        plan_moves({'a': 'x', 'b': 'X'}, {'a', 'b'}, name_key)
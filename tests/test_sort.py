@@ -0,0 +1,20 @@
+from folder_renamer import core
+from folder_renamer.scan import FileRecord
+
+
+def records(names):
+    return [FileRecord(name, 1, 0.0) for name in names]
+
+
+def test_fork_keeps_the_original_untouched_and_merges_back():
+    keys = core.SortKeys()
+    assert keys.ranks_for(['ep10', 'ep2'], 'natural') == [1, 0]
+    worker = keys.fork()
+    recs = records(['ep10', 'ep2', 'ep1'])
+    core.sort_records(recs, 'natural', keys=worker)
+    core.sort_records(recs, 'number', r'(\d+)', keys=worker)
+    assert [r.name for r in recs] == ['ep1', 'ep2', 'ep10']
+    assert keys.ranks_for(['ep10', 'ep2'], 'natural') == [1, 0]  # not grown by the worker
+    keys.merge(worker)
+    assert keys._tables['natural'][0].keys() == {'ep10', 'ep2', 'ep1'}
+    assert keys.ranks_for(['ep10', 'ep2', 'ep1'], 'number', r'(\d+)') == [2, 1, 0]
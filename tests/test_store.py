@@ -0,0 +1,66 @@
+import pytest
+
+from folder_renamer import core
+from folder_renamer.scan import FileRecord, Listing
+from folder_renamer.store import FileStore
+
+
+def make_store(names):
+    return FileStore(FileRecord(name, i, float(i)) for i, name in enumerate(names))
+
+
+def test_removed_names_are_no_longer_taken():
+    store = make_store(['a', 'b', 'c'])
+    store.remove([1])
+    assert Listing('/x', store, {'dir'}).taken_names() == {'a', 'c', 'dir'}
+
+
+def names(store):
+    return [r.name for r in store]
+
+
+@pytest.mark.parametrize('indices, insert_at, expected, changed', [
+    ([1, 2], 0, 'bcadef', (0, 3)),
+    ([0], 5, 'bcdefa', (0, 6)),
+    ([1, 4], 2, 'acbedf', (1, 5)),
+    ([3, 4], 9, 'abcfde', (3, 6)),  # clamped to the end
+])
+def test_move_block_on_the_display_order(indices, insert_at, expected, changed):
+    store = make_store('abcdef')
+    new_range, span = core.move_block(store.order, indices, insert_at)
+    assert ''.join(names(store)) == expected
+    assert span == changed
+    assert [store.name_at(i) for i in new_range] == [c for i, c in enumerate('abcdef') if i in indices]
+    assert list(store) == [FileRecord(c, 'abcdef'.index(c), float('abcdef'.index(c))) for c in expected]
+
+
+def test_remove_keeps_the_display_order():
+    store = make_store('abcdef')
+    core.move_block(store.order, [4, 5], 0)
+    store.remove([0, 3])
+    assert names(store) == ['f', 'a', 'c', 'd']
+    assert len(store) == 4 and store.ordered(store.sizes) == [5, 0, 2, 3]
+
+
+def test_slot_index_follows_edits():
+    store = make_store('abcd')
+    assert store.slot_of('c') == 2
+    store.permute([3, 2, 1, 0])  # reorders leave the slots alone
+    store.set_slot(2, FileRecord('z', 9, 9.0))
+    store.append(FileRecord('e', 4, 4.0))
+    assert store.remove_slots([store.slot_of('b'), store.slot_of('d')]) == [0, 2]
+    assert names(store) == ['z', 'a', 'e']
+    assert [store.slot_of(n) for n in 'abcdze'] == [0, None, None, None, 2, 4]
+
+
+def test_dead_slots_are_compacted():
+    store = make_store('abcdef')
+    store.slot_of('a')
+    store.remove([0, 1])
+    assert len(store.names) == 6  # kept until they outnumber the live ones
+    store.remove([0, 1, 2])
+    assert store.names == ['f'] and names(store) == ['f'] and store.slot_of('f') == 0
+    store = make_store('abc')
+    store.remove([1])
+    core.sort_records(store, 'name')
+    assert store.names == ['a', 'c']
@@ -0,0 +1,17 @@
+import re
+
+from folder_renamer import core
+from folder_renamer.template import compile_template
+
+
+def test_groups_come_from_the_same_match_as_the_number_order():
+    pattern = r'E(\d+)\.mkv'
+    names = ['Show E10.mkv', 'Show E2.mkv']
+    regex = re.compile(pattern)
+    assert sorted(names, key=lambda n: core.number_key(n, regex)) == ['Show E2.mkv', 'Show E10.mkv']
+    template = compile_template('{prefix} {g1:0>2}{ext}', 'Ep', pattern=pattern)
+    assert template.render(names) == ['Ep 10.mkv', 'Ep 02.mkv']
+
+
+def test_default_template():
+    assert compile_template(prefix='Episode').render(['b.mkv', 'a.mp4']) == ['Episode 01.mkv', 'Episode 02.mp4']
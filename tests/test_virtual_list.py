@@ -0,0 +1,91 @@
+import itertools
+
+from folder_renamer.virtual_list import VirtualList
+
+
+class StubTree:
+    """The slice of ttk.Treeview that VirtualList uses, without Tk."""
+
+    def __init__(self):
+        self.items = {}
+        self.order = []
+        self.selected = ()
+        self._ids = itertools.count()
+
+    def bind(self, *args):
+        pass
+
+    def insert(self, parent, where, values=()):
+        item = f'I{next(self._ids)}'
+        self.items[item] = values
+        self.order.append(item)
+        return item
+
+    def delete(self, *items):
+        for item in items:
+            del self.items[item]
+            self.order.remove(item)
+
+    def item(self, item, values=None, tags=None):
+        self.items[item] = values
+
+    def configure(self, **options):
+        pass
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+    def shown(self):
+        return [self.items[item] for item in self.order]
+
+
+def make_list(rows, visible=4):
+    tree = StubTree()
+    vlist = VirtualList(tree, lambda i: ((rows[i],), ()), visible)
+    vlist.set_count(len(rows))
+    return tree, vlist
+
+
+def remove(rows, vlist, gone):
+    # What the GUI does: drop the rows from the data, then from the list
+    rows[:] = [row for i, row in enumerate(rows) if i not in gone]
+    vlist.remove_rows(gone)
+
+
+def test_selection_anchor_and_cursor_follow_their_rows():
+    rows = list('abcdefghij')
+    tree, vlist = make_list(rows)
+    vlist.selection_set([5, 6, 8], anchor=5, cursor=8)
+    remove(rows, vlist, {1, 3, 6})
+    assert [rows[i] for i in vlist.selection()] == ['f', 'i']
+    assert rows[vlist.anchor] == 'f' and rows[vlist.cursor] == 'i'
+    assert vlist.count == 7
+
+
+def test_top_row_stays_in_view():
+    rows = list('abcdefghij')
+    tree, vlist = make_list(rows)
+    vlist.scroll_to(5)
+    remove(rows, vlist, {0, 2})
+    assert vlist.top == 3 and tree.shown() == [('f',), ('g',), ('h',), ('i',)]
+    # Removing the rows below the window pulls it up to stay full
+    remove(rows, vlist, {6, 7})
+    assert vlist.top == 2 and tree.shown() == [('e',), ('f',), ('g',), ('h',)]
+
+
+def test_removing_a_selected_anchor():
+    rows = list('abcdef')
+    tree, vlist = make_list(rows)
+    vlist.selection_set([2, 3], anchor=2, cursor=3)
+    remove(rows, vlist, {2})
+    assert [rows[i] for i in vlist.selection()] == ['d']
+    assert rows[vlist.anchor] == 'd'  # the next row takes its place
+    assert tree.selected == (tree.order[2],)
+
+
+def test_shrinking_below_the_pool():
+    rows = list('abcde')
+    tree, vlist = make_list(rows)
+    remove(rows, vlist, {0, 1, 2})
+    assert vlist.count == 2 and len(vlist.pool) == 2
+    assert tree.shown() == [('d',), ('e',)]
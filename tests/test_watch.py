@@ -0,0 +1,104 @@
+import os
+
+from folder_renamer import scan
+from folder_renamer.filters import compile_filter
+from folder_renamer.scan import RESERVED_PREFIX, FileRecord
+from folder_renamer.watch import (IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_MOVED_FROM, IN_MOVED_TO,
+                                  IN_Q_OVERFLOW, diff_snapshots, translate, watch_job)
+
+
+def snapshot(*records):
+    return {rec.name: rec for rec in records}
+
+
+A, B, C = FileRecord('a.mkv', 1, 10.0), FileRecord('b.mkv', 2, 20.0), FileRecord('c.mkv', 3, 30.0)
+
+
+def test_diff_add_remove_update():
+    before = snapshot(A, B)
+    after = snapshot(FileRecord('a.mkv', 5, 11.0), C)
+    assert sorted(diff_snapshots(before, after)) == [
+        ('add', C), ('remove', 'b.mkv'), ('update', FileRecord('a.mkv', 5, 11.0))]
+
+
+def test_diff_pairs_a_unique_identity_as_rename():
+    renamed = B._replace(name='Episode 02.mkv')
+    assert diff_snapshots(snapshot(A, B), snapshot(A, renamed)) == [('rename', 'b.mkv', renamed)]
+
+
+def test_diff_ambiguous_identity_is_remove_and_add():
+    twin = FileRecord('twin.mkv', 1, 10.0)  # same size and mtime as A
+    x, y = A._replace(name='x.mkv'), twin._replace(name='y.mkv')
+    events = diff_snapshots(snapshot(A, twin), snapshot(x, y))
+    assert sorted(events) == [('add', x), ('add', y), ('remove', 'a.mkv'), ('remove', 'twin.mkv')]
+
+
+def make_folder(path, names):
+    for name in names:
+        (path / name).write_text(name)
+    return str(path)
+
+
+def record(folder, name):
+    st = os.stat(os.path.join(folder, name))
+    return FileRecord(name, st.st_size, st.st_mtime)
+
+
+def test_translate_inotify_events(tmp_path):
+    folder = make_folder(tmp_path, ['new.mkv', 'moved in.mkv', 'Episode 01.mkv', 'grown.mkv'])
+    (tmp_path / 'sub').mkdir()
+    raw = [
+        (IN_CREATE, 0, 'new.mkv'),
+        (IN_CREATE, 0, 'sub'),
+        (IN_DELETE, 0, 'gone.mkv'),
+        (IN_MOVED_FROM, 7, 'old.mkv'),
+        (IN_MOVED_TO, 7, 'Episode 01.mkv'),
+        (IN_MOVED_TO, 8, 'moved in.mkv'),  # from another folder
+        (IN_MOVED_FROM, 9, 'moved out.mkv'),  # to another folder
+        (IN_CLOSE_WRITE, 0, 'grown.mkv'),
+    ]
+    assert translate(folder, raw) == [
+        ('add', record(folder, 'new.mkv')),
+        ('other', 'sub'),
+        ('remove', 'gone.mkv'),
+        ('rename', 'old.mkv', record(folder, 'Episode 01.mkv')),
+        ('add', record(folder, 'moved in.mkv')),
+        ('update', record(folder, 'grown.mkv')),
+        ('remove', 'moved out.mkv'),
+    ]
+
+
+def test_translate_filters_and_reserved_names(tmp_path):
+    folder = make_folder(tmp_path, ['notes.txt', 'a.mkv', RESERVED_PREFIX + 'tmp0'])
+    raw = [(IN_CREATE, 0, 'notes.txt'), (IN_MOVED_FROM, 1, 'b.mkv'),
+           (IN_MOVED_TO, 1, 'notes.txt'), (IN_CREATE, 0, RESERVED_PREFIX + 'tmp0')]
+    assert translate(folder, raw, compile_filter('.mkv')) == [
+        ('other', 'notes.txt'), ('remove', 'b.mkv'), ('other', 'notes.txt'),
+        ('other', RESERVED_PREFIX + 'tmp0')]
+
+
+def test_translate_lost_events_ask_for_a_rescan(tmp_path):
+    assert translate(str(tmp_path), [(IN_CREATE, 0, 'a'), (IN_Q_OVERFLOW, 0, '')]) == [('rescan',)]
+
+
+class Task:
+    # Collects the batches a job sends, then cancels it
+    def __init__(self):
+        self.batches = []
+        self.cancelled = False
+
+    def partial(self, payload):
+        self.batches.append(payload)
+        self.cancelled = True
+
+
+def test_watch_catches_up_with_changes_made_before_it_started(tmp_path):
+    folder = make_folder(tmp_path, ['a.mkv', 'b.mkv'])
+    listing = scan.scan_listing(folder)
+    os.rename(os.path.join(folder, 'a.mkv'), os.path.join(folder, 'Episode 01.mkv'))
+    os.remove(os.path.join(folder, 'b.mkv'))
+    task = Task()
+    watch_job(listing, force_poll=True)(task)
+    [(events, stamp)] = task.batches
+    assert sorted(events) == [('remove', 'b.mkv'), ('rename', 'a.mkv', record(folder, 'Episode 01.mkv'))]
+    assert stamp == scan.folder_stamp(folder)